@@ -1,13 +1,13 @@
 """
 政策文档分析系统 - Flask后端主入口
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
+import json
 import time
-import requests
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,6 +23,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from core.opencode_client import OpenCodeClient
+from core.session_pool import SessionPool
 from core.analyzer import PolicyAnalyzer
 from core.scheduler import AnalysisScheduler, APSCHEDULER_AVAILABLE
 
@@ -32,6 +33,7 @@ from backend.api.analysis import analysis_bp
 from backend.api.auth import auth_bp
 from backend.api.system import system_bp
 from backend.api.crawl import crawl_bp
+from backend.api.events import events_bp
 
 OPENCODE_SERVER_URL = os.getenv('OPENCODE_SERVER_URL', 'http://127.0.0.1:4096')
 FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
@@ -55,14 +57,20 @@ limiter = Limiter(
 
 # 初始化服务
 opencode_client = OpenCodeClient(OPENCODE_SERVER_URL)
-analyzer = PolicyAnalyzer(opencode_client)
+session_pool = SessionPool(opencode_client)
+analyzer = PolicyAnalyzer(opencode_client, session_pool=session_pool)
 scheduler = AnalysisScheduler(analyzer)
+# API 蓝图通过 current_app.extensions 复用同一个分析器和 session 池
+app.extensions['policy_analyzer'] = analyzer
 
 # 初始化数据库
 try:
     from backend.database import init_db
     init_db()
     logger.info("数据库初始化成功")
+    # 后台增量建立全文索引（首次启动时索引全部文档）
+    from core.search_index import refresh_search_index_async
+    refresh_search_index_async()
 except Exception as e:
     logger.error(f"数据库初始化失败: {e}")
 
@@ -72,32 +80,19 @@ app.register_blueprint(analysis_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(system_bp)
 app.register_blueprint(crawl_bp)
-
-SESSION_ID = None
+app.register_blueprint(events_bp)
 
 
 def get_session_id():
-    """获取OpenCode会话ID"""
-    global SESSION_ID
-    if SESSION_ID:
-        try:
-            resp = requests.get(f"{OPENCODE_SERVER_URL}/session/{SESSION_ID}", timeout=30)
-            if resp.status_code == 200:
-                return SESSION_ID
-        except Exception:
-            pass
-        SESSION_ID = None
-
+    """获取OpenCode会话ID（session 池中的共享 session，过期才重新验证）"""
     for attempt in range(3):
         try:
             if attempt > 0:
                 logger.info(f"第 {attempt + 1} 次重试连接 OpenCode 服务器...")
                 time.sleep(1)
-            logger.info(f"正在连接 OpenCode 服务器: {OPENCODE_SERVER_URL}")
-            SESSION_ID = opencode_client.create_session()
-            if SESSION_ID:
-                logger.info(f"创建新会话: {SESSION_ID}")
-                return SESSION_ID
+            session_id = session_pool.shared_session()
+            if session_id:
+                return session_id
         except Exception as e:
             logger.warning(f"第 {attempt + 1} 次连接尝试失败: {e}")
             if attempt == 2:
@@ -148,8 +143,9 @@ def health():
 @limiter.limit("10 per minute")
 @app.route("/ask", methods=["POST"])
 def ask():
-    """OpenCode AI问答"""
+    """OpenCode AI问答（请求体带 stream: true 时以 SSE 流式返回）"""
     user_message = request.json.get("message", "").strip()
+    stream = bool(request.json.get("stream", False))
     if not user_message:
         return jsonify({"response": "请输入有效的问题。"})
 
@@ -161,8 +157,16 @@ def ask():
         logger.error(error_msg)
         return jsonify({"response": error_msg})
 
+    if stream:
+        return Response(
+            stream_with_context(stream_answer(session_id, user_message)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     try:
         result = opencode_client.send_message(session_id, user_message)
+        session_pool.report_shared_result(session_id, bool(result) and not result.startswith("分析失败"))
         if result:
             logger.info(f"回复长度: {len(result)} 字符")
             return jsonify({"response": result})
@@ -172,6 +176,30 @@ def ask():
         return jsonify({"response": f"连接 OpenCode 服务器失败: {str(e)}"})
 
 
+def stream_answer(session_id, user_message):
+    """
+    流式问答生成器：在请求线程中直接读取 OpenCode 回复的增量文本，逐段以 SSE 推送
+
+    事件: chunk（增量文本）、done（完整回复）；15 秒内没有新内容时发送心跳注释
+    """
+    try:
+        for kind, text in opencode_client.iter_message(session_id, user_message, heartbeat=15):
+            if kind == "heartbeat":
+                # 心跳，避免代理断开长时间无输出的连接
+                yield ": heartbeat\n\n"
+            elif kind == "chunk":
+                yield f"event: chunk\ndata: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
+            else:
+                session_pool.report_shared_result(session_id, bool(text) and not text.startswith("分析失败"))
+                result = text or "分析失败，请重试。"
+                logger.info(f"回复长度: {len(result)} 字符")
+                yield f"event: done\ndata: {json.dumps({'response': result}, ensure_ascii=False)}\n\n"
+                return
+    except Exception as e:
+        logger.error(f"请求异常: {e}")
+        yield f"event: done\ndata: {json.dumps({'response': f'连接 OpenCode 服务器失败: {str(e)}'}, ensure_ascii=False)}\n\n"
+
+
 # ============ 启动入口 ============
 
 if __name__ == "__main__":
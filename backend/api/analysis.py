@@ -1,7 +1,6 @@
 """分析结果API端点"""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import os
-import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,81 +33,51 @@ def get_file_service():
 
 @analysis_bp.route("/api/analysis/list", methods=["GET"])
 def list_analysis_dir():
-    """列出分析结果目录的内容（资源管理器风格）"""
+    """
+    列出分析结果目录的内容（资源管理器风格）
+
+    查询参数:
+        baseDir: analyze_result 或 policy_document_word
+        path / keyword / minScore: 子目录、文件名关键词、最低分数
+        sort: title（默认）、score 或 date；order: asc 或 desc
+        limit / cursor: 分页大小和上一页返回的 nextCursor，不传 limit 时返回全部文件
+    """
+    from backend.services.file_index import FileIndex, ROOT_EXTENSIONS
+
     base_dir = request.args.get("baseDir", "").strip()  # analyze_result 或 policy_document_word
     rel_path = request.args.get("path", "").strip()
     keyword = request.args.get("keyword", "").strip()
     min_score = request.args.get("minScore")
+    empty = {"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": "",
+             "total": 0, "nextCursor": None}
+
+    try:
+        options = FileIndex.parse_args(request.args)
+        min_score = float(min_score) if min_score else None
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
     try:
+        if base_dir not in ROOT_EXTENSIONS or base_dir == 'policy_document':
+            return jsonify(empty)
+
         # 从 backend/api/ 向上两级到项目根目录
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        base_path = os.path.join(project_root, base_dir)
-
-        if not os.path.exists(base_path):
-            return jsonify({"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": ""})
-
-        current_dir = os.path.join(base_path, rel_path) if rel_path else base_path
-
-        if not os.path.exists(current_dir):
-            return jsonify({"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": ""})
-
-        parent_path = os.path.dirname(rel_path) if rel_path else ""
-        current_path = rel_path
-
-        items = os.listdir(current_dir)
-        folders = []
-        files = []
-
-        for item in items:
-            item_path = os.path.join(current_dir, item)
-            if os.path.isdir(item_path):
-                folders.append(item)
-            elif base_dir == 'analyze_result':
-                # 分析结果目录：只显示 .md 文件
-                if item.endswith('.md'):
-                    # 搜索关键词筛选
-                    if keyword and keyword.lower() not in item.lower():
-                        continue
-                    # 分数筛选 - 从文件名末尾提取分数（如 xxx_58.0.md）
-                    if min_score:
-                        score_val = float(min_score)
-                        # 从右向左匹配最后一个下划线后的数字
-                        match = re.match(r'.*[_-](\d+\.?\d*)\.md$', item)
-                        if match:
-                            file_score = float(match[1])
-                            if file_score < score_val:
-                                continue
-                    files.append(item)
-            elif base_dir == 'policy_document_word':
-                # 高亮文档目录：只显示 .docx 文件
-                if item.endswith('.docx'):
-                    # 搜索关键词筛选
-                    if keyword and keyword.lower() not in item.lower():
-                        continue
-                    # 分数筛选 - 从文件名末尾提取分数（如 xxx_58.0.docx）
-                    if min_score:
-                        score_val = float(min_score)
-                        # 从右向左匹配最后一个下划线后的数字
-                        match = re.match(r'.*[_-](\d+\.?\d*)\.docx$', item)
-                        if match:
-                            file_score = float(match[1])
-                            if file_score < score_val:
-                                continue
-                    files.append(item)
-
-        folders.sort()
-        files.sort()
+        listing = FileIndex.list_directory(base_dir, os.path.join(project_root, base_dir), rel_path,
+                                           keyword, min_score, **options)
+        if listing is None:
+            return jsonify(empty)
 
         return jsonify({
             "success": True,
-            "files": files,
-            "folders": folders,
-            "currentPath": current_path,
-            "parentPath": parent_path,
+            **listing,
+            "currentPath": rel_path,
+            "parentPath": os.path.dirname(rel_path) if rel_path else "",
             "keyword": keyword
         })
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         logger.error(f"获取分析目录内容失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -286,12 +255,7 @@ def save_analysis():
 def analyze_status():
     """获取分析状态"""
     try:
-        from core.analyzer import PolicyAnalyzer
-        from core.opencode_client import OpenCodeClient
-
-        opencode_client = OpenCodeClient(OPENCODE_SERVER_URL)
-        analyzer = PolicyAnalyzer(opencode_client)
-        status = analyzer.get_status()
+        status = get_analyzer().get_status()
 
         if status:
             status_text = status.get('status', 'unknown')
@@ -309,26 +273,52 @@ def analyze_status():
         return jsonify({"success": True, "status": "pending", "text": "等待自动分析"})
 
 
+def get_analyzer():
+    """
+    获取应用共享的分析器（app.py 启动时登记到 app.extensions）
+
+    复用同一个 OpenCode 客户端和 session 池，不在每个请求中新建，避免 session 泄漏。
+    """
+    analyzer = current_app.extensions.get('policy_analyzer')
+    if analyzer is None:
+        # 蓝图被单独注册（未经 app.py 初始化）时创建一次并登记
+        from core.analyzer import PolicyAnalyzer
+        from core.opencode_client import OpenCodeClient
+        analyzer = current_app.extensions.setdefault('policy_analyzer',
+                                                     PolicyAnalyzer(OpenCodeClient(OPENCODE_SERVER_URL)))
+    return analyzer
+
+
+def get_job_manager():
+    """获取后台任务管理器（延迟导入避免循环依赖）"""
+    from core.jobs import get_job_manager
+    return get_job_manager()
+
+
 @analysis_bp.route("/api/analyze-progress", methods=["GET"])
 def analyze_progress():
-    """获取分析进度"""
-    from core.analyzer import PolicyAnalyzer
-    from core.opencode_client import OpenCodeClient
+    """获取分析进度（默认返回最近一次分析任务，可通过 jobId 指定）"""
+    job_id = request.args.get("jobId", "").strip()
 
     try:
-        opencode_client = OpenCodeClient(OPENCODE_SERVER_URL)
-        analyzer = PolicyAnalyzer(opencode_client)
-        progress = analyzer.get_progress()
+        manager = get_job_manager()
+        job = manager.get(job_id) if job_id else manager.latest('analysis')
+        if job_id and not job:
+            return jsonify({"success": False, "error": "任务不存在"}), 404
+        job = job or {}
 
         return jsonify({
             "success": True,
-            "running": progress.get('running', False),
-            "total": progress.get('total', 0),
-            "current": progress.get('current', 0),
-            "success_count": progress.get('success', 0),
-            "failed_count": progress.get('failed', 0),
-            "current_file": progress.get('current_file', ''),
-            "progress_percent": progress.get('progress_percent', 0)
+            "jobId": job.get('id'),
+            "status": job.get('status', ''),
+            "running": job.get('running', False),
+            "total": job.get('total', 0),
+            "current": job.get('current', 0),
+            "success_count": job.get('success', 0),
+            "failed_count": job.get('failed', 0),
+            "current_file": job.get('current_file', ''),
+            "progress_percent": job.get('progress_percent', 0),
+            "message": job.get('message', '')
         })
 
     except Exception as e:
@@ -338,36 +328,54 @@ def analyze_progress():
 
 @analysis_bp.route("/api/trigger-analyze", methods=["POST"])
 def trigger_analyze():
-    """手动触发分析任务"""
-    from core.analyzer import PolicyAnalyzer
-    from core.opencode_client import OpenCodeClient
-
+    """手动触发分析任务（后台执行，立即返回任务 ID）"""
     try:
         logger.info("手动触发政策文档分析（并行模式）...")
         # 从 backend/api/ 向上两级到项目根目录
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         policy_dir = os.path.join(project_root, 'policy_document')
 
-        opencode_client = OpenCodeClient(OPENCODE_SERVER_URL)
-        analyzer = PolicyAnalyzer(opencode_client)
-
-        # 使用并行分析
-        success_count, failed_count = analyzer.run_parallel_analysis(policy_dir, max_workers=5)
-
-        if success_count > 0 or failed_count > 0:
-            return jsonify({
-                "success": True,
-                "message": f"分析完成！成功: {success_count}, 失败: {failed_count}",
-                "successCount": success_count,
-                "failedCount": failed_count
-            })
-        else:
-            doc_files = analyzer.get_policy_documents(policy_dir)
-            if not doc_files:
-                return jsonify({"success": False, "message": "没有找到政策文档"})
-            else:
-                return jsonify({"success": True, "message": "所有政策文档已分析完成，无需新分析"})
+        analyzer = get_analyzer()
+
+        # 使用并行分析（并发数由 ANALYSIS_MAX_WORKERS 配置）
+        job, created = analyzer.submit_parallel_analysis(policy_dir)
+
+        return jsonify({
+            "success": True,
+            "message": "分析任务已提交" if created else "已有分析任务在执行，返回该任务",
+            "jobId": job['id'],
+            "status": job['status'],
+            "existing": not created
+        }), 202
 
     except Exception as e:
         logger.error(f"手动分析失败: {e}")
         return jsonify({"success": False, "message": str(e)})
+
+
+@analysis_bp.route("/api/analysis/jobs", methods=["GET"])
+def list_analysis_jobs():
+    """列出最近的分析任务"""
+    try:
+        limit = min(int(request.args.get("limit", 20)), 100)
+        return jsonify({"success": True, "jobs": get_job_manager().list('analysis', limit)})
+    except Exception as e:
+        logger.error(f"获取分析任务列表失败: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@analysis_bp.route("/api/analysis/jobs/<job_id>", methods=["GET"])
+def get_analysis_job(job_id):
+    """获取单个分析任务的状态和进度"""
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "任务不存在"}), 404
+    return jsonify({"success": True, "job": job})
+
+
+@analysis_bp.route("/api/analysis/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_analysis_job(job_id):
+    """取消分析任务（正在分析的文档会完成，不再领取新文档）"""
+    if not get_job_manager().cancel(job_id):
+        return jsonify({"success": False, "message": "任务不存在或已结束"}), 400
+    return jsonify({"success": True, "message": "已请求取消任务"})
@@ -7,6 +7,7 @@
 import sys
 import io
 import os
+import uuid
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_cors import CORS
@@ -93,7 +94,77 @@ def sanitize_filename(filename, max_length=100):
     return filename or "无标题"
 
 
-def save_markdown_content(results, keywords, region, department):
+def publish_crawl_event(crawl_id, phase, **data):
+    """发布爬取进度事件（crawl_id 为空时不发布）"""
+    if not crawl_id:
+        return
+    from core.events import EVENT_CRAWL, publish_event
+    publish_event(EVENT_CRAWL, dict(data, jobId=crawl_id, kind='crawl', phase=phase))
+
+
+def parse_keywords(value):
+    """解析关键词：列表，或以顿号、逗号分隔的字符串"""
+    if isinstance(value, (list, tuple)):
+        return [str(k).strip() for k in value if str(k).strip()]
+    value = value or ''
+    keywords = [k.strip() for k in value.split('、') if k.strip()]
+    if not keywords:
+        keywords = [k.strip() for k in value.split(',') if k.strip()]
+    if not keywords:
+        keywords = [k.strip() for k in value.split('，') if k.strip()]
+    return keywords
+
+
+def parse_date_range(data):
+    """解析请求中的 start_date、end_date，返回 (开始日期, 结束日期或 None)"""
+    start_date = data.get('start_date', '2025-01-01')
+    end_date = data.get('end_date', '')
+    try:
+        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d') if start_date else datetime(2025, 1, 1)
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+    except ValueError:
+        start_date_obj = datetime(2025, 1, 1)
+        end_date_obj = None
+    return start_date_obj, end_date_obj
+
+
+def download_result_attachments(scraper, results, parent_folder_path):
+    """
+    并发下载所有结果的附件（按域名限制并发数和请求间隔）
+
+    Returns:
+        {(结果序号, 附件序号): 本地文件路径，下载失败为 None}
+    """
+    from functools import partial
+    from scrapers.fetcher import run_concurrently
+
+    keys = []
+    tasks = []
+    for idx, r in enumerate(results, 1):
+        attachments = r.get('attachments', [])
+        if not r.get('full_content', '').strip() or not attachments:
+            continue
+
+        safe_title = sanitize_filename(r.get('title', '无标题'), max_length=100)
+        item_folder = os.path.join(parent_folder_path, f"{idx:03d}_{safe_title}")
+        os.makedirs(item_folder, exist_ok=True)
+
+        for att_idx, att in enumerate(attachments):
+            att_url = att.get('url', '')
+            if not att_url:
+                continue
+            att_type = att.get('file_type', '')
+            safe_att_name = sanitize_filename(att.get('name', '未知'), max_length=150)
+            if att_type and '.' not in safe_att_name:
+                safe_att_name = f"{safe_att_name}.{att_type}"
+            keys.append((idx, att_idx))
+            tasks.append((att_url, partial(scraper.download_attachment,
+                                           attachment_url=att_url, save_dir=item_folder, filename=safe_att_name)))
+
+    return dict(zip(keys, run_concurrently(tasks)))
+
+
+def save_markdown_content(results, keywords, region, department, crawl_id=None):
     """保存爬取结果到Markdown文件"""
     if not results:
         return None
@@ -118,6 +189,7 @@ def save_markdown_content(results, keywords, region, department):
         os.makedirs(parent_folder_path, exist_ok=True)
 
         saved_count = 0
+        downloaded = download_result_attachments(scraper, results, parent_folder_path)
 
         for idx, r in enumerate(results, 1):
             title = r.get('title', '无标题')
@@ -131,15 +203,9 @@ def save_markdown_content(results, keywords, region, department):
 
             attachments = r.get('attachments', [])
             safe_title = sanitize_filename(title, max_length=100)
+            # 有附件时附件保存在同名子文件夹中（download_result_attachments 已创建）
             folder_name = f"{idx:03d}_{safe_title}"
 
-            # 有附件时创建子文件夹，无附件时不创建
-            if attachments:
-                item_folder = os.path.join(parent_folder_path, folder_name)
-                os.makedirs(item_folder, exist_ok=True)
-            else:
-                item_folder = None
-
             # md文件始终保存在父目录
             md_filepath = os.path.join(parent_folder_path, f"{folder_name}.md")
 
@@ -159,30 +225,18 @@ def save_markdown_content(results, keywords, region, department):
                     md_lines.append("")
                     md_lines.append("**附件:**")
 
-                    for att in attachments:
+                    for att_idx, att in enumerate(attachments):
                         att_name = att.get('name', '未知')
                         att_url = att.get('url', '')
                         att_type = att.get('file_type', '')
 
                         if att_url:
-                            try:
-                                safe_att_name = sanitize_filename(att_name, max_length=150)
-                                if att_type and '.' not in safe_att_name:
-                                    safe_att_name = f"{safe_att_name}.{att_type}"
-
-                                download_path = scraper.download_attachment(
-                                    attachment_url=att_url,
-                                    save_dir=item_folder,
-                                    filename=safe_att_name
-                                )
-
-                                if download_path:
-                                    downloaded_attachments.append(os.path.basename(download_path))
-                                    md_lines.append(f"- [{att_name}](./{os.path.basename(download_path)})" if att_type else f"- [{att_name}](./{os.path.basename(download_path)})")
-                                else:
-                                    md_lines.append(f"- [{att_name}]({att_url})" if att_type else f"- [{att_name}]({att_url})")
-                            except:
-                                md_lines.append(f"- [{att_name}]({att_url})" if att_type else f"- [{att_name}]({att_url})")
+                            download_path = downloaded.get((idx, att_idx))
+                            if download_path:
+                                downloaded_attachments.append(os.path.basename(download_path))
+                                md_lines.append(f"- [{att_name}](./{os.path.basename(download_path)})")
+                            else:
+                                md_lines.append(f"- [{att_name}]({att_url})")
                         else:
                             md_lines.append(f"- {att_name} ({att_type})" if att_type else f"- {att_name}")
 
@@ -197,9 +251,12 @@ def save_markdown_content(results, keywords, region, department):
 
                 if os.path.exists(md_filepath):
                     saved_count += 1
+                    publish_crawl_event(crawl_id, 'file_saved', file=os.path.basename(md_filepath),
+                                        title=title, saved=saved_count, total=len(content_results))
 
             except Exception as e:
                 logger.error(f"保存文件失败: {e}")
+                publish_crawl_event(crawl_id, 'file_error', title=title, error=str(e))
                 continue
 
         scraper.close_browser()
@@ -288,36 +345,21 @@ def get_keywords_by_category(category):
 
 @crawl_bp.route('/api/crawl', methods=['POST'])
 def crawl():
-    """执行爬取任务"""
+    """执行爬取任务（进度通过 /api/events/stream?jobId=<crawlId> 推送）"""
+    data = request.get_json() or {}
+    # 前端可预先生成 crawlId 并先订阅事件流，再发起爬取
+    crawl_id = data.get('crawlId') or uuid.uuid4().hex
+
     try:
         from scrapers import get_scraper
 
-        data = request.get_json()
-
         region = data.get('region', '')
         department = data.get('department', '')
-        keywords_str = data.get('keywords', '')
-        start_date = data.get('start_date', '2025-01-01')
-        end_date = data.get('end_date', '')
-
-        # 解析日期
-        try:
-            from datetime import datetime
-            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d') if start_date else datetime(2025, 1, 1)
-            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
-        except ValueError:
-            start_date_obj = datetime(2025, 1, 1)
-            end_date_obj = None
+        start_date_obj, end_date_obj = parse_date_range(data)
         date_filter = data.get('date_filter', '')
         section_filter = data.get('section_filter', 'all')
         fetch_content = data.get('fetch_content', True)
-
-        # 解析关键词
-        keywords = [k.strip() for k in keywords_str.split('、') if k.strip()]
-        if not keywords:
-            keywords = [k.strip() for k in keywords_str.split(',') if k.strip()]
-        if not keywords:
-            keywords = [k.strip() for k in keywords_str.split('，') if k.strip()]
+        keywords = parse_keywords(data.get('keywords', ''))
 
         if not region or not department:
             return jsonify({
@@ -343,6 +385,8 @@ def crawl():
                 "error": f"未找到 {region} - {department} 对应的爬虫"
             })
 
+        publish_crawl_event(crawl_id, 'start', region=region, department=department, keywords=keywords)
+
         scraper = ScraperClass()
 
         results = scraper.scrape(
@@ -357,12 +401,19 @@ def crawl():
         # 保存结果
         saved_csv_file = None
         saved_md_file = None
+        publish_crawl_event(crawl_id, 'scraped', count=len(results))
         if results:
             saved_csv_file = save_results_to_csv(results, keywords, region, department)
-            saved_md_file = save_markdown_content(results, keywords, region, department)
+            saved_md_file = save_markdown_content(results, keywords, region, department, crawl_id)
+            from backend.api.documents import notify_documents_changed
+            notify_documents_changed()
+
+        publish_crawl_event(crawl_id, 'finish', count=len(results),
+                            saved_md_file=os.path.basename(saved_md_file) if saved_md_file else None)
 
         return jsonify({
             "success": True,
+            "crawlId": crawl_id,
             "data": results,
             "count": len(results),
             "message": f"共找到 {len(results)} 条相关信息",
@@ -372,12 +423,176 @@ def crawl():
 
     except Exception as e:
         logger.error(f"爬取失败: {e}")
+        publish_crawl_event(crawl_id, 'error', error=str(e))
         return jsonify({
             "success": False,
+            "crawlId": crawl_id,
             "error": str(e)
         })
 
 
+def get_job_manager():
+    """获取后台任务管理器（延迟导入避免循环依赖）"""
+    from core.jobs import get_job_manager
+    return get_job_manager()
+
+
+def parse_crawl_plan(data):
+    """
+    解析批量爬取计划
+
+    站点未单独指定 keywords、section_filter 时使用请求顶层的值。
+
+    Returns:
+        (站点列表, 错误信息列表)
+    """
+    from scrapers import get_scraper
+    from scrapers.base import BaseScraper
+
+    default_keywords = parse_keywords(data.get('keywords', ''))
+    sites = []
+    errors = []
+    for site in data.get('sites') or []:
+        region = (site.get('region') or '').strip()
+        department = (site.get('department') or '').strip()
+        if not region or not department:
+            errors.append("站点需要指定地区和部门")
+            continue
+        ScraperClass = get_scraper(region, department)
+        if not ScraperClass or ScraperClass is BaseScraper:
+            errors.append(f"未找到 {region} - {department} 对应的爬虫")
+            continue
+        keywords = parse_keywords(site['keywords']) if site.get('keywords') else default_keywords
+        if not keywords:
+            errors.append(f"{region} - {department} 未指定关键词")
+            continue
+        sites.append({
+            "region": region,
+            "department": department,
+            "keywords": keywords,
+            "section_filter": site.get('section_filter') or data.get('section_filter') or 'all',
+        })
+    if not sites and not errors:
+        errors.append("请至少选择一个站点")
+    return sites, errors
+
+
+def run_crawl_plan(progress, sites, start_date, end_date, date_filter, fetch_content):
+    """后台执行批量爬取：并发搜索所有站点和关键词，按站点保存结果"""
+    from scrapers.orchestrator import CrawlOrchestrator
+
+    crawl_id = progress.job_id
+    publish_crawl_event(crawl_id, 'start', sites=[f"{s['region']}-{s['department']}" for s in sites])
+
+    orchestrator = CrawlOrchestrator(sites, start_date, end_date, date_filter=date_filter,
+                                     fetch_content=fetch_content)
+    outcomes = orchestrator.run(progress)
+
+    total = 0
+    saved_files = []
+    for outcome in outcomes:
+        results = outcome['results']
+        saved_md_file = None
+        if results:
+            save_results_to_csv(results, outcome['keywords'], outcome['region'], outcome['department'])
+            saved_md_file = save_markdown_content(results, outcome['keywords'], outcome['region'],
+                                                  outcome['department'], crawl_id)
+            if saved_md_file:
+                saved_files.append(os.path.basename(saved_md_file))
+        total += len(results)
+        publish_crawl_event(crawl_id, 'site', region=outcome['region'], department=outcome['department'],
+                            count=len(results), errors=outcome['errors'],
+                            saved_md_file=os.path.basename(saved_md_file) if saved_md_file else None)
+
+    if saved_files:
+        from backend.api.documents import notify_documents_changed
+        notify_documents_changed()
+
+    publish_crawl_event(crawl_id, 'finish', count=total, saved_md_files=saved_files)
+    progress.stop(complete=not progress.cancel_requested)
+
+    failed_sites = [f"{o['region']}-{o['department']}" for o in outcomes if o['errors']]
+    message = f"{len(outcomes)} 个站点共找到 {total} 条相关信息"
+    if failed_sites:
+        message += f"，部分任务失败: {'、'.join(failed_sites)}"
+    return message
+
+
+@crawl_bp.route('/api/crawl/batch', methods=['POST'])
+def crawl_batch():
+    """
+    批量爬取（后台执行，立即返回任务 ID）
+
+    一次提交多个站点，各站点的关键词并发搜索，结果按 URL 去重后分站点保存；
+    进度通过 /api/crawl/jobs/<jobId> 或 /api/events/stream?jobId=<jobId> 获取
+    """
+    data = request.get_json() or {}
+
+    try:
+        sites, errors = parse_crawl_plan(data)
+        if errors:
+            return jsonify({"success": False, "error": "；".join(errors)}), 400
+
+        start_date_obj, end_date_obj = parse_date_range(data)
+        date_filter = data.get('date_filter') or None
+        fetch_content = data.get('fetch_content', True)
+
+        params = {
+            "sites": sites,
+            "start_date": start_date_obj.strftime('%Y-%m-%d'),
+            "end_date": end_date_obj.strftime('%Y-%m-%d') if end_date_obj else '',
+            "date_filter": date_filter or '',
+            "fetch_content": bool(fetch_content),
+        }
+        logger.info(f"提交批量爬取: {len(sites)} 个站点")
+        job, created = get_job_manager().submit(
+            'crawl',
+            lambda progress: run_crawl_plan(progress, sites, start_date_obj, end_date_obj,
+                                            date_filter, fetch_content),
+            params=params
+        )
+
+        return jsonify({
+            "success": True,
+            "message": "爬取任务已提交" if created else "相同的爬取任务正在执行，返回该任务",
+            "jobId": job['id'],
+            "status": job['status'],
+            "existing": not created
+        }), 202
+
+    except Exception as e:
+        logger.error(f"提交批量爬取失败: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@crawl_bp.route('/api/crawl/jobs', methods=['GET'])
+def list_crawl_jobs():
+    """列出最近的爬取任务"""
+    try:
+        limit = min(int(request.args.get("limit", 20)), 100)
+        return jsonify({"success": True, "jobs": get_job_manager().list('crawl', limit)})
+    except Exception as e:
+        logger.error(f"获取爬取任务列表失败: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@crawl_bp.route('/api/crawl/jobs/<job_id>', methods=['GET'])
+def get_crawl_job(job_id):
+    """获取单个爬取任务的状态和进度"""
+    job = get_job_manager().get(job_id)
+    if not job or job.get('kind') != 'crawl':
+        return jsonify({"success": False, "error": "任务不存在"}), 404
+    return jsonify({"success": True, "job": job})
+
+
+@crawl_bp.route('/api/crawl/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_crawl_job(job_id):
+    """取消爬取任务（进行中的搜索会完成，不再开始新的搜索和正文提取，已找到的结果仍会保存）"""
+    if not get_job_manager().cancel(job_id):
+        return jsonify({"success": False, "message": "任务不存在或已结束"}), 400
+    return jsonify({"success": True, "message": "已请求取消任务"})
+
+
 @crawl_bp.route('/api/crawl/site-info', methods=['GET'])
 def get_site_info():
     """获取所有支持的网站信息"""
@@ -1,6 +1,7 @@
 """文档管理API端点"""
 from flask import Blueprint, request, jsonify
 import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,51 +23,66 @@ def get_file_service():
     return FileService
 
 
-@documents_bp.route("/api/documents", methods=["GET"])
-def list_documents():
-    """直接从 policy_document 目录获取文档列表（兼容旧接口）"""
-    from backend.auth import is_admin
-    keyword = request.args.get("keyword", "").strip()
-
+def notify_documents_changed():
+    """文档增删后刷新目录树缓存，并在后台更新全文索引"""
+    from backend.services.document_tree import invalidate_document_trees
+    from core.search_index import refresh_search_index_async, KIND_POLICY
+    invalidate_document_trees()
+    refresh_search_index_async([KIND_POLICY])
+
+
+@documents_bp.route("/api/search", methods=["GET"])
+def search_documents():
+    """
+    全文检索政策原文和分析结果
+
+    查询参数:
+        q: 检索词，空格分隔的多个词同时命中
+        type: policy（政策原文）或 analysis（分析结果），默认全部
+        limit / offset: 分页，limit 最大 100
+    """
+    from core.search_index import search, KIND_POLICY, KIND_ANALYSIS
+    query = request.args.get("q", "").strip()
+    kind = request.args.get("type", "").strip() or None
+    if kind and kind not in (KIND_POLICY, KIND_ANALYSIS):
+        return jsonify({"success": False, "message": f"不支持的类型: {kind}"}), 400
     try:
-        policy_dir = get_policy_dir()
-        if not os.path.exists(policy_dir):
-            return jsonify({"documents": [], "count": 0, "total": 0})
-
-        documents = []
-        total_count = 0
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit/offset 必须是整数"}), 400
 
-        def collect_folders(current_dir, parent_name=""):
-            nonlocal total_count
-            try:
-                items = os.listdir(current_dir)
-                folder_files = []
-                sub_folders = []
+    if not query:
+        return jsonify({"success": True, "results": [], "count": 0, "q": query})
 
-                for item in items:
-                    item_path = os.path.join(current_dir, item)
-                    if os.path.isfile(item_path) and (item.endswith('.md') or item.endswith('.docx')):
-                        if not keyword or keyword.lower() in item.lower():
-                            folder_files.append(item)
-                    elif os.path.isdir(item_path):
-                        sub_folders.append(item)
-
-                folder_name = "根目录" if current_dir == policy_dir else (
-                    parent_name + "/" + os.path.basename(current_dir) if parent_name else os.path.basename(current_dir)
-                )
+    try:
+        started = time.perf_counter()
+        results = search(query, kind, limit, offset)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        return jsonify({"success": True, "results": results, "count": len(results),
+                        "q": query, "tookMs": elapsed_ms})
+    except Exception as e:
+        logger.error(f"全文检索失败: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
 
-                if folder_files:
-                    documents.append({"name": folder_name, "files": sorted(folder_files)})
-                    total_count += len(folder_files)
 
-                for sub_folder in sub_folders:
-                    collect_folders(os.path.join(current_dir, sub_folder), folder_name)
+@documents_bp.route("/api/documents", methods=["GET"])
+def list_documents():
+    """
+    直接从 policy_document 目录获取文档列表（兼容旧接口）
 
-            except PermissionError:
-                pass
+    目录树在内存中缓存，文档增删后自动重建；响应带 ETag，内容未变化时返回 304。
+    """
+    from backend.services.document_tree import get_document_tree
+    keyword = request.args.get("keyword", "").strip()
 
-        collect_folders(policy_dir)
-        return jsonify({"documents": documents, "count": len(documents), "total": total_count, "keyword": keyword})
+    try:
+        data, etag = get_document_tree(get_policy_dir()).listing(keyword)
+        response = jsonify(data)
+        response.set_etag(etag)
+        # 每次都向服务器确认，未变化时只返回 304
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
 
     except Exception as e:
         logger.error(f"获取文档列表失败: {e}")
@@ -75,49 +91,41 @@ def list_documents():
 
 @documents_bp.route("/api/documents/list", methods=["GET"])
 def list_documents_in_dir():
-    """列出指定目录下的文件和文件夹（资源管理器风格）"""
+    """
+    列出指定目录下的文件和文件夹（资源管理器风格）
+
+    查询参数:
+        path / keyword: 子目录、文件名关键词
+        sort: title（默认）、date；order: asc 或 desc
+        limit / cursor: 分页大小和上一页返回的 nextCursor，不传 limit 时返回全部文件
+    """
+    from backend.services.file_index import FileIndex
+
     keyword = request.args.get("keyword", "").strip()
     rel_path = request.args.get("path", "").strip()
+    empty = {"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": "",
+             "total": 0, "nextCursor": None}
 
     try:
-        policy_dir = get_policy_dir()
-        if not os.path.exists(policy_dir):
-            return jsonify({"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": ""})
-
-        current_dir = os.path.join(policy_dir, rel_path) if rel_path else policy_dir
-        if not os.path.exists(current_dir):
-            return jsonify({"success": True, "files": [], "folders": [], "currentPath": "", "parentPath": ""})
+        options = FileIndex.parse_args(request.args, sort_fields=('title', 'date'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
-        # 列出目录内容
-        items = os.listdir(current_dir)
-
-        parent_path = os.path.dirname(rel_path) if rel_path else None
-        current_path = rel_path
-
-        items = os.listdir(current_dir)
-        folders = []
-        files = []
-
-        for item in items:
-            item_path = os.path.join(current_dir, item)
-            if os.path.isdir(item_path):
-                folders.append(item)
-            elif item.endswith('.md') or item.endswith('.docx'):
-                if not keyword or keyword.lower() in item.lower():
-                    files.append(item)
-
-        folders.sort()
-        files.sort()
+    try:
+        listing = FileIndex.list_directory('policy_document', get_policy_dir(), rel_path, keyword, **options)
+        if listing is None:
+            return jsonify(empty)
 
         return jsonify({
             "success": True,
-            "files": files,
-            "folders": folders,
-            "currentPath": current_path,
-            "parentPath": parent_path if parent_path is not None else "",
+            **listing,
+            "currentPath": rel_path,
+            "parentPath": os.path.dirname(rel_path) if rel_path else "",
             "keyword": keyword
         })
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         logger.error(f"获取目录内容失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -166,6 +174,7 @@ def delete_documents():
 
     policy_dir = get_policy_dir()
     result = get_file_service().delete_files(policy_dir, files)
+    notify_documents_changed()
     return jsonify(result)
 
 
@@ -184,6 +193,7 @@ def delete_folder():
         return jsonify({"success": False, "message": "请提供文件夹路径"}), 400
 
     result = get_file_service().delete_folder(folder_path)
+    notify_documents_changed()
     return jsonify(result)
 
 
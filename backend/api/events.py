@@ -0,0 +1,59 @@
+"""进度事件推送API端点（Server-Sent Events）"""
+from flask import Blueprint, request, Response, stream_with_context
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 无事件时发送心跳的间隔（秒），防止代理断开空闲连接
+HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', 15))
+
+# 创建蓝图
+events_bp = Blueprint('events', __name__)
+
+
+@events_bp.route("/api/events/stream", methods=["GET"])
+def event_stream():
+    """
+    订阅分析、爬取任务的进度事件
+
+    查询参数:
+        types: 逗号分隔的事件类型（job、progress、file、crawl），默认全部
+        jobId: 只接收指定任务（或爬取 crawlId）的事件
+    断线重连时浏览器自动携带 Last-Event-ID 请求头，期间错过的事件会补发。
+    """
+    from core.events import get_event_bus, format_sse
+
+    types = [t.strip() for t in request.args.get("types", "").split(",") if t.strip()] or None
+    job_id = request.args.get("jobId", "").strip() or None
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscription = get_event_bus().subscribe(types, job_id, last_event_id)
+    logger.info(f"SSE 客户端连接: types={types}, jobId={job_id}")
+
+    def generate():
+        with subscription:
+            # 告诉浏览器断线后的重连间隔
+            yield "retry: 3000\n\n"
+            yield f"event: ready\ndata: {json.dumps({'jobId': job_id}, ensure_ascii=False)}\n\n"
+            while True:
+                event = subscription.get(timeout=HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
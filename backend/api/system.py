@@ -32,6 +32,29 @@ def sync_data():
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@system_bp.route("/api/analysis-cache/clear", methods=["POST"])
+def clear_analysis_cache():
+    """清空分析结果缓存（仅管理员，skill prompt 修改后使用）"""
+    from backend.auth import is_admin
+    from core.analyzer import ANALYSIS_PROMPT
+    from core.result_cache import AnalysisCache, compute_skill_version
+
+    data = request.json or {}
+    username = data.get("username", "")
+    if not is_admin(username):
+        return jsonify({"success": False, "message": "只有管理员才能清空分析缓存"}), 403
+
+    try:
+        cache = AnalysisCache(compute_skill_version(ANALYSIS_PROMPT))
+        # staleOnly=true 时只清理旧 skill 版本的缓存
+        removed = cache.invalidate(keep_current=bool(data.get("staleOnly", False)))
+        logger.info(f"清空分析缓存: {removed} 条")
+        return jsonify({"success": True, "removed": removed})
+    except Exception as e:
+        logger.error(f"清空分析缓存失败: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 @system_bp.route("/api/statistics", methods=["GET"])
 def get_statistics():
     """获取统计信息"""
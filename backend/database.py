@@ -4,19 +4,86 @@
 import sqlite3
 import os
 import re
+import hashlib
+import threading
 from datetime import datetime
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'policy_docs.db')
 DATA_DIR = os.path.dirname(DB_PATH)
 
 
-def get_connection():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# 连接参数：WAL 模式下读写互不阻塞，后台同步时仪表盘查询不必等待
+BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 10))
+CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 16384))
+MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+# 每个连接缓存的预编译语句数
+CACHED_STATEMENTS = 256
+# 按路径批量查询分析清单时每批的路径数
+MANIFEST_QUERY_BATCH = 500
+
+_local = threading.local()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    线程复用的连接
+
+    调用方沿用「取连接 - 操作 - close()」的写法，close() 只回滚未提交的事务，
+    连接保留给同一线程下次使用，预编译语句缓存随之复用。
+
+    同一线程拿到的是同一个连接：持有连接期间调用的其他函数如果也要访问数据库，
+    必须把连接传进去，不能再 get_connection()/close()，否则内层的 close()
+    （以及 get_connection() 对残留事务的回滚）会回滚外层尚未提交的写入。
+
+    复用只发生在长驻线程（后台任务、后处理、定时任务等）中。Werkzeug 开发服务器
+    （threaded=True）每个请求新开一个线程，请求之间不复用连接，连接随线程结束回收。
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        """真正关闭连接"""
+        super().close()
+
+
+def _open_connection(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, factory=PooledConnection,
+                           cached_statements=CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+def get_connection():
+    """获取当前线程的数据库连接（每个线程一个，首次使用时创建）"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.db_path != DB_PATH:
+        if conn is not None:
+            conn.dispose()
+        conn = _open_connection(DB_PATH)
+        _local.conn = conn
+        _local.db_path = DB_PATH
+    elif conn.in_transaction:
+        # 上次使用时出现异常、未提交也未 close，丢弃残留的事务
+        conn.rollback()
     return conn
 
 
+def close_connection():
+    """关闭当前线程的数据库连接（线程结束前可调用，未调用时随线程回收）"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.dispose()
+        _local.conn = None
+
+
 def init_db():
     conn = get_connection()
     cursor = conn.cursor()
@@ -33,21 +100,135 @@ def init_db():
         )
     ''')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_score ON analysis_results(score)')
+    # 分析结果文件水位：记录已导入文件的 mtime、大小和内容哈希，用于增量扫描
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS result_files (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            title TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_files_title ON result_files(title)')
+    # 分析清单：记录每篇源文档的内容指纹和分析结论，用于增量分析
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_manifest (
+            doc_path TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            score REAL,
+            outcome TEXT NOT NULL,
+            result_path TEXT,
+            analyzed_at TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_manifest_outcome ON analysis_manifest(outcome)')
+    # 分析结果缓存：按文档内容哈希 + skill 版本复用 AI 返回的分析文本
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            content_hash TEXT NOT NULL,
+            skill_version TEXT NOT NULL,
+            analysis_text TEXT NOT NULL,
+            source_path TEXT,
+            created_at TEXT,
+            last_used_at TEXT,
+            PRIMARY KEY (content_hash, skill_version)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_last_used ON analysis_cache(last_used_at)')
+    # 后台任务（分析、爬取）的状态和进度
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT,
+            total INTEGER DEFAULT 0,
+            current INTEGER DEFAULT 0,
+            success INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            current_file TEXT,
+            message TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_kind_created ON jobs(kind, created_at)')
+    # 目录列表索引：按目录记录文件名、分数和修改时间，列出时与各文件的 stat 比对，有变化才重建
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_index (
+            root TEXT NOT NULL,
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            is_dir INTEGER NOT NULL,
+            score REAL,
+            mtime REAL,
+            PRIMARY KEY (root, dir, name)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_index_score ON file_index(root, dir, is_dir, score)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_index_mtime ON file_index(root, dir, is_dir, mtime)')
+    # 旧版按目录 mtime 判断是否重新扫描，文件原地改写时目录 mtime 不变，已改为逐项比对
+    cursor.execute('DROP TABLE IF EXISTS dir_index')
+    # 全文检索：search_docs 保存原文（用于生成摘要片段）和文件水位，
+    # search_fts 是无内容表（content=''），只保存二元字组（title、body）和单字（title_uni、body_uni）
+    # 切分后的倒排索引，不再存一份切分后的文本；删除时按 search_docs 中的原文重新切分后提交 delete 命令
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_docs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            path TEXT NOT NULL,
+            title TEXT NOT NULL,
+            body TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            UNIQUE (kind, path)
+        )
+    ''')
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'")
+    row = cursor.fetchone()
+    if row:
+        columns = [r[1] for r in cursor.execute('PRAGMA table_info(search_fts)').fetchall()]
+        sql = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'search_fts'").fetchone()[0]
+        if 'title_uni' not in columns or "content=''" not in sql.replace(' ', ''):
+            # 旧版索引（没有单字列或保存了内容），FTS5 表不支持修改：删除后由 sync_search_index 全量重建
+            cursor.execute('DROP TABLE search_fts')
+            cursor.execute('DELETE FROM search_docs')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            title, body, title_uni, body_uni, tokenize = 'unicode61', content = ''
+        )
+    ''')
     conn.commit()
     conn.close()
 
 
 def scan_analyze_results():
-    """扫描 analyze_result/ 目录，导入分析结果"""
+    """
+    扫描 analyze_result/ 目录，增量导入分析结果
+
+    已导入文件的 mtime、大小和内容哈希记录在 result_files 表中，未变化的文件直接跳过；
+    变化的文件重新解析后批量写入，文件已删除的结果从数据库中移除，全部在一个事务内完成。
+    文件未变化但 analysis_results 中缺少对应结果（例如被单独删除）时重新导入。
+    """
+    from core.result_parser import parse_result_text
+
     base_dir = os.path.dirname(os.path.dirname(__file__))
     result_dir = os.path.join(base_dir, 'analyze_result')
 
-    if not os.path.exists(result_dir):
-        return []
-
     conn = get_connection()
     cursor = conn.cursor()
+    cursor.execute('SELECT * FROM result_files')
+    watermarks = {row['path']: row for row in cursor.fetchall()}
+    cursor.execute('SELECT title FROM analysis_results')
+    known_titles = {row['title'] for row in cursor.fetchall()}
     imported = []
+    seen = set()
+    file_rows = []
+    result_rows = []
 
     for root, dirs, files in os.walk(result_dir):
         for filename in files:
@@ -55,6 +236,26 @@ def scan_analyze_results():
                 continue
 
             filepath = os.path.join(root, filename)
+            rel_path = os.path.relpath(filepath, result_dir)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            seen.add(rel_path)
+            watermark = watermarks.get(rel_path)
+            if watermark and watermark['title'] not in known_titles:
+                # 结果记录已丢失，按新文件重新导入
+                watermark = None
+            if watermark and watermark['mtime'] == stat.st_mtime and watermark['size'] == stat.st_size:
+                continue
+
+            # 读取文件
+            try:
+                with open(filepath, 'rb') as f:
+                    data = f.read()
+                content = data.decode('utf-8')
+            except Exception:
+                continue
 
             # 解析文件名
             name = filename.replace('.md', '')
@@ -62,51 +263,284 @@ def scan_analyze_results():
             score = float(score_match.group(1)) if score_match else 0.0
             title = re.sub(r'_分析结果_\d+\.?\d*$', '', name).replace('_', ' ')
 
-            # 读取文件
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except Exception:
+            content_hash = hashlib.sha256(data).hexdigest()
+            file_rows.append((rel_path, stat.st_mtime, stat.st_size, content_hash, title))
+            if watermark and watermark['content_hash'] == content_hash:
+                # 文件被 touch 过但内容没变，只刷新 mtime
                 continue
 
-            # 提取内容
-            summary_match = re.search(r'### 全文概要\s*\n(.+?)(?=\n> \*\*总分\*\*|\n###|\Z)', content, re.DOTALL)
-            summary = summary_match.group(1).strip() if summary_match else ''
-
-            url_match = re.search(r'原文链接[：:]\s*(https?://\S+)', content)
-            source_url = url_match.group(1) if url_match else ''
-
-            org_match = re.search(r'发布机构[：:]\s*(.+)', content)
-            publish_org = org_match.group(1).strip() if org_match else ''
-
-            date_match = re.search(r'发布日期[：:]\s*(.+)', content)
-            publish_date = date_match.group(1).strip() if date_match else ''
-
-            # 存在则替换，不存在则新增
-            cursor.execute('SELECT id FROM analysis_results WHERE title = ?', (title,))
-            if cursor.fetchone():
-                cursor.execute('''
-                    UPDATE analysis_results SET
-                        score = ?, summary = ?, source_url = ?,
-                        publish_org = ?, publish_date = ?, created_at = ?
-                    WHERE title = ?
-                ''', (score, summary, source_url, publish_org, publish_date,
-                      datetime.now().isoformat(), title))
-                imported.append({'file': filename, 'action': 'updated'})
-            else:
-                cursor.execute('''
-                    INSERT INTO analysis_results
-                    (title, score, summary, source_url, publish_org, publish_date, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (title, score, summary, source_url, publish_org, publish_date,
-                      datetime.now().isoformat()))
-                imported.append({'file': filename, 'action': 'imported'})
+            result = parse_result_text(content)
+            result_rows.append((title, score, result.summary, result.source_url,
+                                result.publish_org, result.publish_date, datetime.now().isoformat()))
+            imported.append({'file': filename, 'action': 'updated' if watermark else 'imported'})
+
+    removed = [(path,) for path in watermarks if path not in seen]
+    removed_titles = [(title,) for title in {watermarks[path]['title'] for path, in removed}]
+
+    # 存在则替换，不存在则新增
+    cursor.executemany('''
+        INSERT INTO analysis_results
+        (title, score, summary, source_url, publish_org, publish_date, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(title) DO UPDATE SET
+            score = excluded.score,
+            summary = excluded.summary,
+            source_url = excluded.source_url,
+            publish_org = excluded.publish_org,
+            publish_date = excluded.publish_date,
+            created_at = excluded.created_at
+    ''', result_rows)
+    cursor.executemany('''
+        INSERT INTO result_files (path, mtime, size, content_hash, title)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            mtime = excluded.mtime,
+            size = excluded.size,
+            content_hash = excluded.content_hash,
+            title = excluded.title
+    ''', file_rows)
+    cursor.executemany('DELETE FROM result_files WHERE path = ?', removed)
+    # 本次扫描中结果文件已全部删除的文档（不影响没有结果文件记录的其他结果）
+    cursor.executemany('''
+        DELETE FROM analysis_results
+        WHERE title = ?1 AND NOT EXISTS (SELECT 1 FROM result_files WHERE title = ?1)
+    ''', removed_titles)
+    if cursor.rowcount > 0:
+        imported.append({'file': None, 'action': 'deleted', 'count': cursor.rowcount})
 
     conn.commit()
     conn.close()
     return imported
 
 
+def get_manifest_entries(doc_paths=None):
+    """获取分析清单，返回 {源文档相对路径: 记录}"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if doc_paths is None:
+        cursor.execute('SELECT * FROM analysis_manifest')
+        rows = cursor.fetchall()
+    else:
+        # 分批 IN 查询，每批参数数不超过 SQLite 的变量上限
+        doc_paths = list(doc_paths)
+        rows = []
+        for start in range(0, len(doc_paths), MANIFEST_QUERY_BATCH):
+            batch = doc_paths[start:start + MANIFEST_QUERY_BATCH]
+            cursor.execute(f"SELECT * FROM analysis_manifest WHERE doc_path IN ({','.join('?' * len(batch))})", batch)
+            rows.extend(cursor.fetchall())
+    conn.close()
+    return {row['doc_path']: dict(row) for row in rows}
+
+
+def get_manifest_result(doc_path):
+    """按源文档相对路径查询已保存的分析结果，返回 {'result_path', 'score'}，没有记录返回 None"""
+    conn = get_connection()
+    row = conn.execute(
+        'SELECT result_path, score FROM analysis_manifest WHERE doc_path = ? AND result_path IS NOT NULL',
+        (doc_path,)
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def update_manifest_results(results):
+    """
+    批量更新清单中的分析结果路径和总分（只更新已有记录）
+
+    Args:
+        results: [{'doc_path', 'result_path', 'score'}]
+    Returns:
+        更新的记录数
+    """
+    if not results:
+        return 0
+    conn = get_connection()
+    cursor = conn.executemany('''
+        UPDATE analysis_manifest SET result_path = :result_path, score = :score
+        WHERE doc_path = :doc_path
+    ''', results)
+    updated = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return updated
+
+
+def upsert_manifest_entries(entries):
+    """批量写入分析清单（存在则更新）"""
+    if not entries:
+        return
+    conn = get_connection()
+    conn.executemany('''
+        INSERT INTO analysis_manifest
+        (doc_path, content_hash, mtime, size, score, outcome, result_path, analyzed_at)
+        VALUES (:doc_path, :content_hash, :mtime, :size, :score, :outcome, :result_path, :analyzed_at)
+        ON CONFLICT(doc_path) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            mtime = excluded.mtime,
+            size = excluded.size,
+            score = excluded.score,
+            outcome = excluded.outcome,
+            result_path = excluded.result_path,
+            analyzed_at = excluded.analyzed_at
+    ''', entries)
+    conn.commit()
+    conn.close()
+
+
+def get_dir_index_entries(root, dir_path):
+    """
+    一个目录当前的列表索引
+
+    Returns:
+        [{'name', 'is_dir', 'score', 'mtime'}]，按名称排序
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        'SELECT name, is_dir, score, mtime FROM file_index WHERE root = ? AND dir = ? ORDER BY name',
+        (root, dir_path)
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def replace_dir_index(root, dir_path, entries):
+    """
+    重建一个目录的列表索引
+
+    Args:
+        entries: [{'name', 'is_dir', 'score', 'mtime'}]
+    """
+    conn = get_connection()
+    conn.execute('DELETE FROM file_index WHERE root = ? AND dir = ?', (root, dir_path))
+    conn.executemany('''
+        INSERT INTO file_index (root, dir, name, is_dir, score, mtime)
+        VALUES (:root, :dir, :name, :is_dir, :score, :mtime)
+    ''', [dict(entry, root=root, dir=dir_path) for entry in entries])
+    conn.commit()
+    conn.close()
+
+
+# 列表排序字段 -> 排序表达式（无分数的文件按 -1 处理）
+DIR_SORT_KEYS = {
+    'title': 'name',
+    'score': 'COALESCE(score, -1)',
+    'date': 'mtime',
+}
+
+
+def _dir_index_filter(root, dir_path, is_dir, keyword, min_score):
+    clause = 'root = ? AND dir = ? AND is_dir = ?'
+    params = [root, dir_path, 1 if is_dir else 0]
+    if keyword:
+        clause += " AND name LIKE ? ESCAPE '\\'"
+        params.append('%' + re.sub(r'([\\%_])', r'\\\1', keyword) + '%')
+    if min_score is not None:
+        # 文件名中没有分数的文件不参与分数筛选
+        clause += ' AND (score IS NULL OR score >= ?)'
+        params.append(min_score)
+    return clause, params
+
+
+def query_dir_index(root, dir_path, is_dir=False, keyword=None, min_score=None,
+                    sort='title', descending=False, limit=None, after=None):
+    """
+    按条件查询目录列表索引（键集分页）
+
+    Args:
+        sort: title、score 或 date
+        after: 上一页最后一条的 (排序值, 名称)，从它之后开始
+    Returns:
+        [{'name', 'score', 'mtime', 'sort_key'}]
+    """
+    key = DIR_SORT_KEYS.get(sort, 'name')
+    direction = 'DESC' if descending else 'ASC'
+    clause, params = _dir_index_filter(root, dir_path, is_dir, keyword, min_score)
+    if after is not None:
+        clause += f" AND ({key}, name) {'<' if descending else '>'} (?, ?)"
+        params.extend(after)
+    query = f'''
+        SELECT name, score, mtime, {key} AS sort_key FROM file_index
+        WHERE {clause} ORDER BY sort_key {direction}, name {direction}
+    '''
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    conn = get_connection()
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+    conn.close()
+    return rows
+
+
+def count_dir_index(root, dir_path, is_dir=False, keyword=None, min_score=None):
+    """符合条件的条目总数"""
+    clause, params = _dir_index_filter(root, dir_path, is_dir, keyword, min_score)
+    conn = get_connection()
+    count = conn.execute(f'SELECT COUNT(*) AS c FROM file_index WHERE {clause}', params).fetchone()['c']
+    conn.close()
+    return count
+
+
+def save_job(job):
+    """保存后台任务状态（存在则更新）"""
+    conn = get_connection()
+    conn.execute('''
+        INSERT INTO jobs
+        (id, kind, status, params, total, current, success, failed,
+         current_file, message, created_at, started_at, finished_at)
+        VALUES (:id, :kind, :status, :params, :total, :current, :success, :failed,
+                :current_file, :message, :created_at, :started_at, :finished_at)
+        ON CONFLICT(id) DO UPDATE SET
+            status = excluded.status,
+            total = excluded.total,
+            current = excluded.current,
+            success = excluded.success,
+            failed = excluded.failed,
+            current_file = excluded.current_file,
+            message = excluded.message,
+            started_at = excluded.started_at,
+            finished_at = excluded.finished_at
+    ''', job)
+    conn.commit()
+    conn.close()
+
+
+def get_job(job_id):
+    """获取后台任务"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def list_jobs(kind=None, limit=20):
+    """按提交时间倒序列出后台任务"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if kind:
+        cursor.execute('SELECT * FROM jobs WHERE kind = ? ORDER BY created_at DESC LIMIT ?', (kind, limit))
+    else:
+        cursor.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return results
+
+
+def mark_unfinished_jobs_interrupted():
+    """服务启动时将上次未完成的任务标记为中断，返回受影响的任务数"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE jobs SET status = 'interrupted', finished_at = ?
+        WHERE status IN ('queued', 'running')
+    ''', (datetime.now().isoformat(),))
+    count = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return count
+
+
 def get_all_results():
     """获取所有结果"""
     conn = get_connection()
@@ -126,8 +560,15 @@ def search_results(keyword=None, min_score=None):
     params = []
 
     if keyword:
-        query += ' AND (title LIKE ? OR summary LIKE ?)'
-        params.extend([f'%{keyword}%', f'%{keyword}%'])
+        # 走全文索引（覆盖标题、概要和相关段落），分析结果表中的标题以空格代替下划线
+        from core.search_index import title_subquery, KIND_ANALYSIS
+        subquery = title_subquery(keyword, KIND_ANALYSIS)
+        if subquery is None:
+            conn.close()
+            return []
+        match_sql, match_params = subquery
+        query += f" AND title IN (SELECT REPLACE(title, '_', ' ') FROM ({match_sql}))"
+        params.extend(match_params)
     if min_score is not None:
         query += ' AND score >= ?'
         params.append(min_score)
@@ -149,9 +590,16 @@ def get_statistics():
     return {'total': row['c'], 'avg_score': round(row['avg'] or 0, 1)}
 
 
+def migrate_existing_files():
+    """同步现有文件：导入分析结果，并增量更新全文索引"""
+    imported = scan_analyze_results()
+    from core.search_index import sync_search_index
+    sync_search_index()
+    return imported
+
+
 if __name__ == '__main__':
     init_db()
     results = scan_analyze_results()
     stats = get_statistics()
     print(f"扫描完成: 共 {stats['total']} 条, 平均分 {stats['avg_score']}")
-migrate_existing_files = scan_analyze_results
@@ -0,0 +1,143 @@
+"""文档树缓存 - /api/documents 的递归目录树"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 两次检查目录 mtime 的最小间隔（秒），间隔内的请求直接使用缓存
+CHECK_INTERVAL = float(os.getenv('DOCUMENT_TREE_CHECK_INTERVAL', 2))
+# 遍历时跳过的目录（爬虫导出的 CSV）
+SKIP_DIRS = {'csv'}
+DOCUMENT_EXTENSIONS = ('.md', '.docx')
+
+
+class DocumentTree:
+    """
+    政策文档目录树缓存
+
+    构建时记录每个目录的 mtime；之后只需 stat 这些目录（不列出文件）即可判断是否有文件增删，
+    爬取、删除文档后也会主动调用 invalidate()。
+    """
+
+    def __init__(self, root_dir: str, check_interval: float = CHECK_INTERVAL):
+        self.root_dir = root_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._folders: Optional[List[Tuple[str, List[str]]]] = None
+        self._dir_mtimes: Dict[str, int] = {}
+        self._hash = ''
+        self._checked_at = 0.0
+        self._dirty = True
+
+    def invalidate(self):
+        """标记目录树已变化，下次访问时重建"""
+        self._dirty = True
+
+    def _is_stale(self) -> bool:
+        for dir_path, mtime_ns in self._dir_mtimes.items():
+            try:
+                if os.stat(dir_path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _build(self):
+        folders = []
+        dir_mtimes = {}
+
+        def collect(current_dir, folder_name):
+            try:
+                dir_mtimes[current_dir] = os.stat(current_dir).st_mtime_ns
+                files = []
+                sub_dirs = []
+                with os.scandir(current_dir) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            if entry.name not in SKIP_DIRS:
+                                sub_dirs.append(entry.name)
+                        elif entry.name.endswith(DOCUMENT_EXTENSIONS):
+                            files.append(entry.name)
+            except OSError:
+                return
+            if files:
+                folders.append((folder_name, sorted(files)))
+            for name in sorted(sub_dirs):
+                collect(os.path.join(current_dir, name), f"{folder_name}/{name}")
+
+        if os.path.isdir(self.root_dir):
+            collect(self.root_dir, "根目录")
+        else:
+            # 根目录不存在时记录其父目录，目录创建后可以感知
+            parent = os.path.dirname(self.root_dir)
+            if os.path.isdir(parent):
+                dir_mtimes[parent] = os.stat(parent).st_mtime_ns
+
+        self._folders = folders
+        self._dir_mtimes = dir_mtimes
+        self._hash = hashlib.sha1(json.dumps(folders, ensure_ascii=False).encode('utf-8')).hexdigest()
+        logger.debug(f"文档树已重建: {len(folders)} 个文件夹")
+
+    def snapshot(self) -> Tuple[List[Tuple[str, List[str]]], str]:
+        """
+        获取目录树
+
+        Returns:
+            ([(文件夹名, [文件名])], 目录树内容哈希)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._folders is None or self._dirty:
+                self._dirty = False
+                self._build()
+                self._checked_at = now
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                if self._is_stale():
+                    self._build()
+            return self._folders, self._hash
+
+    def listing(self, keyword: str = '') -> Tuple[dict, str]:
+        """
+        按关键词筛选后的文档列表（/api/documents 的返回格式）
+
+        Returns:
+            (返回数据, ETag)
+        """
+        folders, tree_hash = self.snapshot()
+        keyword_lower = keyword.lower()
+        documents = []
+        total = 0
+        for name, files in folders:
+            matched = [f for f in files if keyword_lower in f.lower()] if keyword else files
+            if matched:
+                documents.append({"name": name, "files": matched})
+                total += len(matched)
+        etag = hashlib.sha1(f"{tree_hash}:{keyword}".encode('utf-8')).hexdigest()[:20]
+        return {"documents": documents, "count": len(documents), "total": total, "keyword": keyword}, etag
+
+
+_trees: Dict[str, DocumentTree] = {}
+_trees_lock = threading.Lock()
+
+
+def get_document_tree(root_dir: str) -> DocumentTree:
+    """获取指定根目录的目录树缓存（进程内唯一）"""
+    root_dir = os.path.abspath(root_dir)
+    with _trees_lock:
+        if root_dir not in _trees:
+            _trees[root_dir] = DocumentTree(root_dir)
+        return _trees[root_dir]
+
+
+def invalidate_document_trees():
+    """文档增删后调用，所有目录树在下次访问时重建"""
+    with _trees_lock:
+        trees = list(_trees.values())
+    for tree in trees:
+        tree.invalidate()
@@ -0,0 +1,159 @@
+"""目录列表索引服务 - 资源管理器风格列表的分页、筛选和排序"""
+import os
+import re
+import json
+import base64
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 各根目录列出的文件类型
+ROOT_EXTENSIONS = {
+    'analyze_result': ('.md',),
+    'policy_document_word': ('.docx',),
+    'policy_document': ('.md', '.docx'),
+}
+# 分析生成的文件（分析结果及其 Word、高亮文档）才从文件名末尾提取分数，
+# 如 xxx_分析结果_58.0.md、xxx_高亮文档_58.0.docx；爬取的原始文档不解析分数
+SCORED_ROOTS = ('analyze_result', 'policy_document_word')
+SCORE_PATTERN = re.compile(r'.*_(?:分析结果|高亮文档)_(\d+(?:\.\d+)?)\.(?:md|docx)$')
+SORT_FIELDS = ('title', 'score', 'date')
+
+
+class FileIndex:
+    """目录列表索引 - 目录内容缓存在数据库中，与各文件的 stat 比对有变化时才重建"""
+
+    @staticmethod
+    def resolve_dir(root_path: str, rel_path: str) -> Optional[str]:
+        """解析相对路径，超出根目录或不存在时返回 None"""
+        root_real = os.path.realpath(root_path)
+        current = os.path.realpath(os.path.join(root_real, rel_path)) if rel_path else root_real
+        if current != root_real and not current.startswith(root_real + os.sep):
+            return None
+        return current if os.path.isdir(current) else None
+
+    @staticmethod
+    def refresh(root_name: str, current_dir: str, dir_key: str) -> bool:
+        """
+        目录有变化时重建其索引
+
+        逐项比对文件名和修改时间，而不是只看目录 mtime：文件原地改写时目录 mtime 不变，
+        只看目录会让索引中的修改时间过期，按日期排序出错。
+
+        Returns:
+            是否重建了索引
+        """
+        from backend.database import get_dir_index_entries, replace_dir_index
+
+        extensions = ROOT_EXTENSIONS[root_name]
+        scored = root_name in SCORED_ROOTS
+        entries = []
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        entries.append({'name': entry.name, 'is_dir': 1, 'score': None, 'mtime': None})
+                    elif entry.name.endswith(extensions):
+                        match = SCORE_PATTERN.match(entry.name) if scored else None
+                        entries.append({
+                            'name': entry.name,
+                            'is_dir': 0,
+                            'score': float(match.group(1)) if match else None,
+                            'mtime': entry.stat().st_mtime
+                        })
+                except OSError:
+                    continue
+        entries.sort(key=lambda e: e['name'])
+        if get_dir_index_entries(root_name, dir_key) == entries:
+            return False
+
+        replace_dir_index(root_name, dir_key, entries)
+        logger.debug(f"目录索引已更新: {root_name}/{dir_key} ({len(entries)} 项)")
+        return True
+
+    @staticmethod
+    def encode_cursor(row: Dict[str, Any]) -> str:
+        payload = json.dumps([row['sort_key'], row['name']], ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[Any, str]:
+        """解析分页游标，格式错误时抛出 ValueError"""
+        try:
+            sort_key, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except Exception:
+            raise ValueError("无效的分页游标")
+        return sort_key, name
+
+    @staticmethod
+    def parse_args(args, sort_fields: Tuple[str, ...] = SORT_FIELDS) -> Dict[str, Any]:
+        """
+        解析列表接口的分页和排序参数（sort、order、limit、cursor），参数错误时抛出 ValueError
+
+        Args:
+            sort_fields: 允许的排序字段，原始文档没有分数，不接受按分数排序
+        """
+        sort = args.get('sort', 'title').strip() or 'title'
+        if sort not in sort_fields:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        order = args.get('order', '').strip().lower()
+        if order not in ('', 'asc', 'desc'):
+            raise ValueError(f"不支持的排序方向: {order}")
+        limit = args.get('limit')
+        limit = int(limit) if limit else None
+        if limit is not None and limit <= 0:
+            raise ValueError("limit 必须大于 0")
+        return {
+            'sort': sort,
+            # 分数和日期默认从高到低，标题默认升序
+            'descending': order == 'desc' or (not order and sort != 'title'),
+            'limit': limit,
+            'cursor': args.get('cursor') or None,
+        }
+
+    @staticmethod
+    def list_directory(root_name: str, root_path: str, rel_path: str = '', keyword: str = '',
+                       min_score: Optional[float] = None, sort: str = 'title', descending: bool = False,
+                       limit: Optional[int] = None, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        列出目录内容
+
+        Args:
+            root_name: 根目录名（analyze_result、policy_document_word、policy_document）
+            root_path: 根目录完整路径
+            rel_path: 相对根目录的子目录
+            sort: title、score 或 date
+            limit: 每页文件数，不传时返回全部文件
+            cursor: 上一页返回的 nextCursor
+
+        Returns:
+            folders、files、total、nextCursor；目录不存在时返回 None
+        """
+        from backend.database import query_dir_index, count_dir_index
+
+        current_dir = FileIndex.resolve_dir(root_path, rel_path)
+        if current_dir is None:
+            return None
+        dir_key = os.path.relpath(current_dir, os.path.realpath(root_path)).replace(os.sep, '/')
+        dir_key = '' if dir_key == '.' else dir_key
+        FileIndex.refresh(root_name, current_dir, dir_key)
+
+        after = FileIndex.decode_cursor(cursor) if cursor else None
+        # 只取 limit + 1 条判断是否还有下一页
+        rows = query_dir_index(root_name, dir_key, False, keyword, min_score, sort, descending,
+                               limit + 1 if limit else None, after)
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = FileIndex.encode_cursor(rows[-1])
+
+        result = {
+            'files': [row['name'] for row in rows],
+            'nextCursor': next_cursor,
+        }
+        # 文件夹和总数只在第一页返回
+        if after is None:
+            result['folders'] = [row['name'] for row in query_dir_index(root_name, dir_key, True)]
+            result['total'] = count_dir_index(root_name, dir_key, False, keyword, min_score) if limit else len(rows)
+        return result
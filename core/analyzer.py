@@ -2,24 +2,61 @@
 import os
 import json
 import re
+import hashlib
 import logging
 import threading
 import concurrent.futures
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from core.opencode_client import OpenCodeClient
+from core.result_cache import AnalysisCache, compute_skill_version
+from core.job_queue import AnalysisJobQueue, QueueItem
+from core.jobs import JobProgress
+from core.session_pool import SessionLease, SessionPool
+from core.postprocess import PostProcessPipeline
+from core.result_parser import extract_total_score
 
 logger = logging.getLogger(__name__)
 
+# 分析结论（记录在分析清单中）
+OUTCOME_SAVED = 'saved'
+OUTCOME_BELOW_THRESHOLD = 'below_threshold'
+OUTCOME_FAILED = 'failed'
+
+# 发送给 OpenCode 的分析 prompt（修改后分析缓存会自动失效）
+ANALYSIS_PROMPT = "请使用 policy-document-analyzer skill 分析 {file_path} 这篇政策文档，只返回分析结果文本，不要保存文件。"
+
+
+@dataclass
+class DocumentInfo:
+    """一次读取源文档得到的信息：清单指纹、缓存键和长度"""
+    content_hash: str
+    mtime: float
+    size: int
+    # 规范化内容哈希（分析缓存的键），未启用缓存时为 None
+    cache_key: Optional[str]
+    chars: int
+
 
 @dataclass
 class AnalyzerConfig:
     """分析器配置"""
     STATUS_FILE: str = '../data/analyze_status.json'
     ANALYZE_DIR: str = 'analyze_result'
+    MIN_SAVE_SCORE: float = 30
+    ENABLE_RESULT_CACHE: bool = True
+    # 并行分析的最大并发数和失败重试策略（可通过环境变量覆盖）
+    MAX_WORKERS: int = field(default_factory=lambda: int(os.getenv('ANALYSIS_MAX_WORKERS', 5)))
+    MAX_RETRIES: int = field(default_factory=lambda: int(os.getenv('ANALYSIS_MAX_RETRIES', 2)))
+    RETRY_BACKOFF: float = field(default_factory=lambda: float(os.getenv('ANALYSIS_RETRY_BACKOFF', 5)))
+    RETRY_BACKOFF_MAX: float = 60.0
+    # 单篇文档因 session 失效重新入队（不计入重试次数）的上限，超过后按普通失败重试
+    MAX_SESSION_SWAPS: int = field(default_factory=lambda: int(os.getenv('ANALYSIS_MAX_SESSION_SWAPS', 2)))
+    # 后台分析任务使用的引擎：thread（线程池）或 async（asyncio + httpx）
+    ENGINE: str = field(default_factory=lambda: os.getenv('ANALYSIS_ENGINE', 'thread').lower())
 
     @property
     def status_file_path(self) -> str:
@@ -37,65 +74,26 @@ class AnalyzerConfig:
 class PolicyAnalyzer:
     """政策文档分析器"""
 
-    # 类级别的进度追踪
-    _progress = {
-        'running': False,
-        'total': 0,
-        'current': 0,
-        'success': 0,
-        'failed': 0,
-        'current_file': '',
-        'start_time': None
-    }
-    _progress_lock = threading.Lock()
-
-    def __init__(self, opencode_client: OpenCodeClient, config: AnalyzerConfig = None):
+    def __init__(self, opencode_client: OpenCodeClient, config: AnalyzerConfig = None,
+                 cache: Optional[AnalysisCache] = None, session_pool: Optional[SessionPool] = None):
         self.client = opencode_client
         self.config = config or AnalyzerConfig()
+        self._cache = cache
+        self.session_pool = session_pool or SessionPool(opencode_client)
+        # 本次分析中已读取的文档信息 {(政策目录, 相对路径): DocumentInfo}，
+        # 筛选、查缓存、估算用量和写清单共用，每篇文档只读一次；分析任务结束时清理
+        self._documents: Dict[Tuple[str, str], DocumentInfo] = {}
 
-    def update_progress(self, current: int = None, success: int = None, failed: int = None, current_file: str = None):
-        """更新分析进度"""
-        with self._progress_lock:
-            if current is not None:
-                self._progress['current'] = current
-            if success is not None:
-                self._progress['success'] = success
-            if failed is not None:
-                self._progress['failed'] = failed
-            if current_file is not None:
-                self._progress['current_file'] = current_file
-
-    def start_progress(self, total: int):
-        """开始新的分析任务"""
-        with self._progress_lock:
-            self._progress = {
-                'running': True,
-                'total': total,
-                'current': 0,
-                'success': 0,
-                'failed': 0,
-                'current_file': '',
-                'start_time': datetime.now().isoformat()
-            }
-
-    def stop_progress(self):
-        """停止分析任务"""
-        with self._progress_lock:
-            self._progress['running'] = False
-
-    def get_progress(self) -> dict:
-        """获取当前分析进度"""
-        with self._progress_lock:
-            return {
-                'running': self._progress['running'],
-                'total': self._progress['total'],
-                'current': self._progress['current'],
-                'success': self._progress['success'],
-                'failed': self._progress['failed'],
-                'current_file': self._progress['current_file'],
-                'progress_percent': round(self._progress['current'] / self._progress['total'] * 100, 1) if self._progress['total'] > 0 else 0,
-                'start_time': self._progress['start_time']
-            }
+    @property
+    def cache(self) -> Optional[AnalysisCache]:
+        """分析结果缓存（首次使用时创建）"""
+        if self._cache is None and self.config.ENABLE_RESULT_CACHE:
+            try:
+                self._cache = AnalysisCache(compute_skill_version(ANALYSIS_PROMPT))
+            except Exception as e:
+                logger.error(f"初始化分析缓存失败，本次不使用缓存: {e}")
+                self.config.ENABLE_RESULT_CACHE = False
+        return self._cache
 
     def get_status_file_path(self) -> str:
         """获取状态文件路径"""
@@ -126,22 +124,8 @@ class PolicyAnalyzer:
             logger.error(f"读取分析状态失败: {e}")
             return None
 
-    def save_analysis_result(self, file_path: str, analysis_text: str) -> Optional[str]:
-        """
-        保存分析结果到 analyze_result 目录
-
-        Args:
-            file_path: 源文件相对路径
-            analysis_text: AI 返回的分析结果文本
-
-        Returns:
-            保存的文件路径，失败返回 None
-        """
-        # 获取分析结果目录
-        analyze_dir = self.config.analyze_dir_path
-        os.makedirs(analyze_dir, exist_ok=True)
-
-        # 过滤 AI 思考内容，只保留以 ## 文档 开头的分析结果
+    def extract_analysis_content(self, analysis_text: str) -> str:
+        """过滤 AI 思考内容，只保留以 ## 文档 开头的分析结果"""
         lines = analysis_text.split('\n')
         start_idx = 0
         for i, line in enumerate(lines):
@@ -156,21 +140,43 @@ class PolicyAnalyzer:
                     start_idx = i
                     break
 
-        # 截取有效内容
-        content = '\n'.join(lines[start_idx:]).strip()
+        return '\n'.join(lines[start_idx:]).strip()
+
+    def extract_total_score(self, content: str) -> Optional[float]:
+        """提取总分，未找到返回 None"""
+        return extract_total_score(content)
+
+    def save_analysis_result(self, file_path: str, analysis_text: str) -> Optional[str]:
+        """
+        保存分析结果到 analyze_result 目录
+
+        Args:
+            file_path: 源文件相对路径
+            analysis_text: AI 返回的分析结果文本
+
+        Returns:
+            保存的文件路径，失败返回 None
+        """
+        content = self.extract_analysis_content(analysis_text)
         if not content:
             logger.warning(f"未找到有效的分析结果内容: {file_path}")
             return None
 
-        # 提取评分
-        score_match = re.search(r'> \*\*总分\*\*[：:]\s*([\d.]+)', content)
-        score = float(score_match.group(1)) if score_match else 0.0
+        score = self.extract_total_score(content) or 0.0
 
-        # 如果总分低于30分，不保存分析结果
-        if score < 30:
-            logger.info(f"总分 {score} < 30，不保存分析结果: {file_path}")
+        # 如果总分低于阈值，不保存分析结果
+        if score < self.config.MIN_SAVE_SCORE:
+            logger.info(f"总分 {score} < {self.config.MIN_SAVE_SCORE}，不保存分析结果: {file_path}")
             return None
 
+        return self._write_analysis_result(file_path, content, score)
+
+    def _write_analysis_result(self, file_path: str, content: str, score: float) -> Optional[str]:
+        """将分析结果写入 analyze_result 下与源文件对应的子目录"""
+        # 获取分析结果目录
+        analyze_dir = self.config.analyze_dir_path
+        os.makedirs(analyze_dir, exist_ok=True)
+
         score_str = str(score)
         # 从源文件路径提取文档名（完整标题）
         doc_name = os.path.basename(file_path)
@@ -199,6 +205,148 @@ class PolicyAnalyzer:
             logger.error(f"保存分析结果失败: {e}")
             return None
 
+    def lookup_cached_analysis(self, policy_dir: str, file_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查询分析缓存
+
+        Returns:
+            (内容哈希, 缓存的分析文本)；未启用缓存时哈希为 None，未命中时文本为 None
+        """
+        cache = self.cache
+        if not cache:
+            return None, None
+        try:
+            content_hash = self.document_info(policy_dir, file_path).cache_key
+            cached = cache.get(content_hash)
+        except Exception as e:
+            logger.error(f"读取分析缓存失败: {file_path}, {e}")
+            return None, None
+        if not cached:
+            return content_hash, None
+        logger.info(f"命中分析缓存: {file_path}")
+        # 缓存可能来自其他文件夹的同一篇文档，标题行换成当前文件名
+        return content_hash, re.sub(r'^(#{1,2} 文档\s*[：:]).*$', lambda m: f"{m.group(1)}{os.path.basename(file_path)}",
+                                    cached, count=1, flags=re.MULTILINE)
+
+    def store_cached_analysis(self, content_hash: Optional[str], file_path: str, result: Optional[str]):
+        """只缓存带总分的有效分析结果，失败信息不缓存"""
+        cache = self.cache
+        if not (cache and content_hash and result):
+            return
+        content = self.extract_analysis_content(result)
+        if content and self.extract_total_score(content) is not None:
+            try:
+                cache.put(content_hash, result, file_path)
+            except Exception as e:
+                logger.error(f"写入分析缓存失败: {file_path}, {e}")
+
+    def estimate_usage(self, policy_dir: str, file_path: str, prompt: str, result: Optional[str]) -> int:
+        """估算一次分析占用的上下文（字符数）：AI 会把整篇文档读入上下文，文档长度也计入"""
+        try:
+            doc_chars = self.document_info(policy_dir, file_path).chars
+        except OSError:
+            doc_chars = 0
+        return len(prompt) + len(result or '') + doc_chars
+
+    def request_analysis(self, session_id: Optional[str], policy_dir: str, file_path: str) -> Optional[str]:
+        """
+        获取单篇文档的分析文本：内容相同的文档优先复用缓存，否则发送 prompt 给 OpenCode
+
+        Args:
+            session_id: OpenCode 会话 ID（命中缓存时不会使用）
+            policy_dir: 政策文档根目录
+            file_path: 源文件相对路径
+        """
+        content_hash, cached = self.lookup_cached_analysis(policy_dir, file_path)
+        if cached:
+            return cached
+
+        if not session_id:
+            return None
+        prompt = ANALYSIS_PROMPT.format(file_path=file_path)
+        result = self.client.send_message(session_id, prompt)
+        self.session_pool.record_usage(session_id, self.estimate_usage(policy_dir, file_path, prompt, result))
+
+        self.store_cached_analysis(content_hash, file_path, result)
+        return result
+
+    def process_analysis_result(self, policy_dir: str, file_path: str, analysis_text: Optional[str]) -> Tuple[str, Optional[float], Optional[str]]:
+        """
+        处理 AI 返回的分析文本：判定结论、保存结果并写入分析清单
+
+        Returns:
+            (结论, 总分, 保存路径)
+        """
+        content = self.extract_analysis_content(analysis_text) if analysis_text else ''
+        score = self.extract_total_score(content) if content else None
+        saved_path = None
+
+        if score is None:
+            # 没有总分说明 AI 没有给出有效结果（如 "分析失败: ..."），下次需要重试
+            outcome = OUTCOME_FAILED
+        elif score < self.config.MIN_SAVE_SCORE:
+            logger.info(f"总分 {score} < {self.config.MIN_SAVE_SCORE}，不保存分析结果: {file_path}")
+            outcome = OUTCOME_BELOW_THRESHOLD
+        else:
+            saved_path = self._write_analysis_result(file_path, content, score)
+            outcome = OUTCOME_SAVED if saved_path else OUTCOME_FAILED
+
+        self.record_outcome(policy_dir, file_path, outcome, score, saved_path)
+        return outcome, score, saved_path
+
+    def read_document(self, policy_dir: str, file_path: str) -> DocumentInfo:
+        """读取一次源文档，计算清单指纹（原始字节哈希、mtime、大小）、缓存键和长度"""
+        full_path = os.path.join(policy_dir, file_path)
+        stat = os.stat(full_path)
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        text = data.decode('utf-8', errors='replace')
+        cache = self.cache
+        return DocumentInfo(
+            content_hash=hashlib.sha256(data).hexdigest(),
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            cache_key=cache.hash_text(text) if cache else None,
+            chars=len(text),
+        )
+
+    def document_info(self, policy_dir: str, file_path: str) -> DocumentInfo:
+        """本次分析中已读取的文档信息，文件有变化（或尚未读取）时重新读取"""
+        key = (policy_dir, file_path)
+        info = self._documents.get(key)
+        if info is not None:
+            stat = os.stat(os.path.join(policy_dir, file_path))
+            if info.mtime == stat.st_mtime and info.size == stat.st_size:
+                return info
+        info = self.read_document(policy_dir, file_path)
+        self._documents[key] = info
+        return info
+
+    def forget_documents(self, policy_dir: str):
+        """分析任务结束（包括取消、异常）时清理该目录下记下的文档信息"""
+        for key in [key for key in self._documents if key[0] == policy_dir]:
+            self._documents.pop(key, None)
+
+    def record_outcome(self, policy_dir: str, file_path: str, outcome: str,
+                       score: Optional[float] = None, result_path: Optional[str] = None):
+        """将单篇文档的分析结论写入分析清单"""
+        try:
+            from backend.database import upsert_manifest_entries
+            info = self.document_info(policy_dir, file_path)
+            self._documents.pop((policy_dir, file_path), None)
+            upsert_manifest_entries([{
+                'doc_path': file_path,
+                'content_hash': info.content_hash,
+                'mtime': info.mtime,
+                'size': info.size,
+                'score': score,
+                'outcome': outcome,
+                'result_path': result_path,
+                'analyzed_at': datetime.now().isoformat()
+            }])
+        except Exception as e:
+            logger.error(f"写入分析清单失败: {file_path}, {e}")
+
     def get_policy_documents(self, policy_dir: str) -> List[str]:
         """获取政策文档列表"""
         doc_files = []
@@ -239,8 +387,86 @@ class PolicyAnalyzer:
 
         return analyzed_files
 
-    def run_analysis(self, policy_dir: str) -> Tuple[int, int]:
+    def select_files_to_analyze(self, policy_dir: str, doc_files: List[str]) -> List[str]:
+        """
+        根据分析清单筛选需要分析的文档
+
+        mtime 和大小未变的文档直接按清单结论判断；变化的文档再比较内容哈希。
+        已保存或低于阈值的文档不再重复分析，只有失败、新增或内容变化的文档才需要分析。
+        清单中没有记录但 analyze_result 已有结果的旧文档会补记到清单中。
+        筛选时读取过的文档信息会记下来，查缓存、估算用量和写清单时不再重复读取。
+        """
+        try:
+            from backend.database import init_db, get_manifest_entries, upsert_manifest_entries
+            init_db()
+            manifest = get_manifest_entries(doc_files)
+        except Exception as e:
+            logger.error(f"读取分析清单失败，退回按文件名判断: {e}")
+            analyzed_files = self.get_analyzed_files(self.config.analyze_dir_path)
+            return [f for f in doc_files if f not in analyzed_files]
+
+        legacy_analyzed = None
+        refreshed = []
+        files_to_analyze = []
+
+        for file_path in doc_files:
+            entry = manifest.get(file_path)
+            try:
+                stat = os.stat(os.path.join(policy_dir, file_path))
+            except OSError:
+                continue
+
+            if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                if entry['outcome'] == OUTCOME_FAILED:
+                    files_to_analyze.append(file_path)
+                continue
+
+            info = self.document_info(policy_dir, file_path)
+            content_hash, mtime, size = info.content_hash, info.mtime, info.size
+            if entry and entry['content_hash'] == content_hash:
+                # 文件被 touch 过但内容没变，只刷新 mtime
+                refreshed.append({**entry, 'mtime': mtime, 'size': size})
+                if entry['outcome'] == OUTCOME_FAILED:
+                    files_to_analyze.append(file_path)
+                else:
+                    self._documents.pop((policy_dir, file_path), None)
+                continue
+
+            if entry is None:
+                if legacy_analyzed is None:
+                    legacy_analyzed = self.get_analyzed_files(self.config.analyze_dir_path)
+                if file_path in legacy_analyzed:
+                    refreshed.append({
+                        'doc_path': file_path,
+                        'content_hash': content_hash,
+                        'mtime': mtime,
+                        'size': size,
+                        'score': None,
+                        'outcome': OUTCOME_SAVED,
+                        'result_path': None,
+                        'analyzed_at': None
+                    })
+                    self._documents.pop((policy_dir, file_path), None)
+                    continue
+
+            files_to_analyze.append(file_path)
+
+        if refreshed:
+            try:
+                upsert_manifest_entries(refreshed)
+            except Exception as e:
+                logger.error(f"更新分析清单失败: {e}")
+
+        return files_to_analyze
+
+    def run_analysis(self, policy_dir: str, progress: Optional[JobProgress] = None) -> Tuple[int, int]:
         """执行完整分析任务（增量分析模式）"""
+        try:
+            return self._run_analysis(policy_dir, progress or JobProgress())
+        finally:
+            self.forget_documents(policy_dir)
+
+    def _run_analysis(self, policy_dir: str, progress: JobProgress) -> Tuple[int, int]:
         logger.info("=" * 50)
         logger.info("开始执行定时分析任务")
         logger.info("=" * 50)
@@ -258,12 +484,9 @@ class PolicyAnalyzer:
 
         logger.info(f"找到 {len(doc_files)} 个政策文档")
 
-        # 获取已分析的文件列表（基于文件名判断）
-        analyzed_files = self.get_analyzed_files(analyze_dir)
-        logger.info(f"已有 {len(analyzed_files)} 个文档已分析过")
-
-        # 过滤出未分析的文档
-        files_to_analyze = [f for f in doc_files if f not in analyzed_files]
+        # 根据分析清单筛选需要分析的文档
+        files_to_analyze = self.select_files_to_analyze(policy_dir, doc_files)
+        logger.info(f"已有 {len(doc_files) - len(files_to_analyze)} 个文档已分析过")
 
         if not files_to_analyze:
             logger.info("所有文档都已分析完成，无需新分析")
@@ -271,48 +494,77 @@ class PolicyAnalyzer:
             return 0, 0
 
         logger.info(f"需要分析的新文档: {len(files_to_analyze)} 个")
+        progress.start(len(files_to_analyze))
 
         success_count = 0
         failed_count = 0
 
-        # 复用单个 session 分析所有文档
-        session_id = self.client.create_session()
-        if not session_id:
+        # 从 session 池租用单个 session 分析所有文档
+        lease = self.session_pool.acquire()
+        if not lease:
             logger.error(f"无法创建 session，无法分析任何文档")
+            progress.stop()
             return 0, len(files_to_analyze)
 
-        logger.info(f"创建分析 session: {session_id}")
+        logger.info(f"使用分析 session: {lease.session_id}")
 
         # 逐个发送 prompt，让 AI 按 skill 自己处理
-        for i, file_path in enumerate(files_to_analyze):
-            logger.info(f"分析文档 ({i+1}/{len(files_to_analyze)}): {file_path}")
-
-            # 检查 session 是否仍有效，失效则重建
-            if not self.client.validate_session(session_id):
-                session_id = self.client.create_session()
-                if not session_id:
-                    logger.error(f"无法创建 session，跳过: {file_path}")
+        postprocess = PostProcessPipeline(
+            self.generate_word_documents,
+            on_done=lambda file_path, ok: progress.file_event('rendered', file_path, ok=ok)
+        )
+        with postprocess:
+            for i, file_path in enumerate(files_to_analyze):
+                if progress.cancel_requested:
+                    logger.info("分析任务已取消")
+                    break
+                logger.info(f"分析文档 ({i+1}/{len(files_to_analyze)}): {file_path}")
+                progress.update(current_file=file_path)
+
+                # 上下文过长时换用新 session，保持每篇文档的耗时稳定
+                if lease is not None:
+                    lease = self.session_pool.rotate_if_needed(lease)
+                if lease is None:
+                    lease = self.session_pool.acquire()
+                    if lease is None:
+                        logger.error(f"无法创建 session，跳过: {file_path}")
+                        failed_count += 1
+                        progress.update(failed=failed_count, current=success_count + failed_count)
+                        progress.file_event('error', file_path, outcome=OUTCOME_FAILED, error='无法创建 session')
+                        continue
+                    logger.info(f"重建 session: {lease.session_id}")
+
+                # 只发送 prompt，AI 返回分析结果，Python 保存文件（内容相同的文档复用缓存）
+                progress.file_event('start', file_path)
+                result = self.request_analysis(lease.session_id, policy_dir, file_path)
+                # Python 保存分析结果并记录到分析清单
+                outcome, score, _ = self.process_analysis_result(policy_dir, file_path, result)
+                if outcome == OUTCOME_FAILED:
+                    # 失败后才检查 session：已失效则换新 session 重发一次
+                    recovered = self.session_pool.recover(lease)
+                    if recovered is not lease:
+                        lease = recovered
+                        if lease:
+                            logger.info(f"重建 session: {lease.session_id}，重新分析: {file_path}")
+                            result = self.request_analysis(lease.session_id, policy_dir, file_path)
+                            outcome, score, _ = self.process_analysis_result(policy_dir, file_path, result)
+                if lease and outcome != OUTCOME_FAILED:
+                    self.session_pool.mark_success(lease)
+                if outcome == OUTCOME_SAVED:
+                    # 只为本次新保存结果的文档生成高亮和分析结果 Word，交给后处理线程
+                    postprocess.submit(policy_dir, file_path, 'single')
+                if outcome == OUTCOME_FAILED:
                     failed_count += 1
-                    continue
-                logger.info(f"重建 session: {session_id}")
-
-            # 只发送 prompt，AI 返回分析结果，Python 保存文件
-            prompt = f"""请使用 policy-document-analyzer skill 分析 {file_path} 这篇政策文档，只返回分析结果文本，不要保存文件。"""
-
-            # 发送并等待响应（不设置超时）
-            result = self.client.send_message(session_id, prompt)
-            if result:
-                # Python 保存分析结果
-                saved_path = self.save_analysis_result(file_path, result)
-                if saved_path:
+                    progress.file_event('error', file_path, outcome=outcome, error=(result or '分析结果为空')[:200])
+                    logger.error(f"文档分析失败: {file_path}")
+                else:
                     success_count += 1
+                    progress.file_event('finish', file_path, outcome=outcome, score=score)
                     logger.info(f"文档分析完成: {file_path}")
-                else:
-                    failed_count += 1
-                    logger.error(f"保存分析结果失败: {file_path}")
-            else:
-                failed_count += 1
-                logger.error(f"文档分析失败: {file_path}")
+                progress.update(success=success_count, failed=failed_count, current=success_count + failed_count)
+
+        self.session_pool.release(lease)
+        progress.stop(complete=not progress.cancel_requested)
 
         # 记录完成状态
         logger.info(f"增量分析完成: 新增成功 {success_count}, 失败 {failed_count}")
@@ -328,22 +580,89 @@ class PolicyAnalyzer:
             except Exception as e:
                 logger.error(f"数据库同步失败: {e}")
 
-            # 高亮政策文档
-            try:
-                from core.highlight import highlight_all_documents
-                highlight_count = highlight_all_documents(policy_dir)
-                logger.info(f"高亮处理完成: {highlight_count} 个文件")
-            except Exception as e:
-                logger.error(f"高亮处理失败: {e}")
-
         logger.info("=" * 50)
         logger.info("定时分析任务执行完毕")
         logger.info("=" * 50)
 
         return success_count, failed_count
 
-    def run_parallel_analysis(self, policy_dir: str, max_workers: int = 5) -> Tuple[int, int]:
-        """并行分析政策文档（多session并发）"""
+    def generate_word_documents(self, policy_dir: str, file_path: str, tag: str = '') -> bool:
+        """
+        为已保存分析结果的文档生成高亮文档和分析结果Word文档
+
+        Returns:
+            两个文档是否都生成成功（文档不存在或任一生成失败时返回 False）
+        """
+        try:
+            from core.highlight import highlight_doc, convert_analysis_to_word
+            doc_path = os.path.join(policy_dir, file_path)
+            if not os.path.exists(doc_path):
+                logger.error(f"[{tag}] Word生成失败，文档不存在: {file_path}")
+                return False
+            # 生成高亮文档
+            success_hl, _, _ = highlight_doc(doc_path, verbose=False)
+            if success_hl:
+                logger.info(f"[{tag}] 高亮文档完成: {file_path}")
+            else:
+                logger.error(f"[{tag}] 高亮文档生成失败: {file_path}")
+            # 生成分析结果Word文档（高亮失败时仍尝试生成）
+            success_wd, _, _ = convert_analysis_to_word(doc_path, verbose=False)
+            if success_wd:
+                logger.info(f"[{tag}] 分析结果Word完成: {file_path}")
+            else:
+                logger.error(f"[{tag}] 分析结果Word生成失败: {file_path}")
+            return bool(success_hl and success_wd)
+        except Exception as e:
+            logger.error(f"[{tag}] Word生成失败: {file_path}, {e}")
+            return False
+
+    def submit_parallel_analysis(self, policy_dir: str, max_workers: Optional[int] = None) -> Tuple[dict, bool]:
+        """
+        提交后台并行分析任务，立即返回
+
+        Returns:
+            (任务记录, 是否为新提交的任务)；同一目录已有分析任务在排队或执行时返回该任务
+        """
+        from core.jobs import get_job_manager
+
+        def target(progress: JobProgress) -> str:
+            success_count, failed_count = self._run_engine(policy_dir, max_workers, progress)
+            if progress.cancel_requested:
+                return f"任务已取消！成功: {success_count}, 失败: {failed_count}"
+            if success_count > 0 or failed_count > 0:
+                return f"分析完成！成功: {success_count}, 失败: {failed_count}"
+            if not self.get_policy_documents(policy_dir):
+                return "没有找到政策文档"
+            return "所有政策文档已分析完成，无需新分析"
+
+        return get_job_manager().submit('analysis', target, params={'policy_dir': policy_dir})
+
+    def _run_engine(self, policy_dir: str, max_workers: Optional[int], progress: JobProgress) -> Tuple[int, int]:
+        """按配置选择分析引擎，异步引擎不可用时退回线程池"""
+        if self.config.ENGINE == 'async':
+            from core.async_analyzer import HTTPX_AVAILABLE, run_async_analysis
+            if HTTPX_AVAILABLE:
+                return run_async_analysis(self, policy_dir, max_workers, progress=progress)
+            logger.warning("httpx 未安装，改用线程池分析引擎")
+        return self.run_parallel_analysis(policy_dir, max_workers, progress=progress)
+
+    def run_parallel_analysis(self, policy_dir: str, max_workers: Optional[int] = None,
+                              progress: Optional[JobProgress] = None) -> Tuple[int, int]:
+        """
+        并行分析政策文档（多session并发）
+
+        Args:
+            policy_dir: 政策文档根目录
+            max_workers: 最大并发数，未指定时使用配置
+            progress: 任务进度，后台任务通过它汇报进度和接收取消请求
+        """
+        try:
+            return self._run_parallel_analysis(policy_dir, max_workers or self.config.MAX_WORKERS,
+                                               progress or JobProgress())
+        finally:
+            self.forget_documents(policy_dir)
+
+    def _run_parallel_analysis(self, policy_dir: str, max_workers: int, progress: JobProgress) -> Tuple[int, int]:
         logger.info("=" * 50)
         logger.info("开始执行并行分析任务")
         logger.info("=" * 50)
@@ -357,129 +676,169 @@ class PolicyAnalyzer:
         if not doc_files:
             logger.warning(f"没有找到政策文档: {policy_dir}")
             self.save_status(datetime.now().isoformat(), 0, 'no_docs')
-            self.stop_progress()
+            progress.stop()
             return 0, 0
 
         logger.info(f"找到 {len(doc_files)} 个政策文档")
 
-        # 获取已分析的文件列表
-        analyzed_files = self.get_analyzed_files(analyze_dir)
-        logger.info(f"已有 {len(analyzed_files)} 个文档已分析过")
-
-        # 过滤出未分析的文档
-        files_to_analyze = [f for f in doc_files if f not in analyzed_files]
+        # 根据分析清单筛选需要分析的文档
+        files_to_analyze = self.select_files_to_analyze(policy_dir, doc_files)
+        logger.info(f"已有 {len(doc_files) - len(files_to_analyze)} 个文档已分析过")
 
         if not files_to_analyze:
             logger.info("所有文档都已分析完成，无需新分析")
             self.save_status(datetime.now().isoformat(), 0, 'no_new_docs')
-            self.stop_progress()
+            progress.stop()
             return 0, 0
 
-        logger.info(f"需要分析的新文档: {len(files_to_analyze)} 个，使用 {max_workers} 个并行任务")
+        worker_count = min(max_workers, len(files_to_analyze))
+        logger.info(f"需要分析的新文档: {len(files_to_analyze)} 个，使用 {worker_count} 个并行任务")
 
         # 启动进度追踪
-        self.start_progress(len(files_to_analyze))
+        progress.start(len(files_to_analyze))
 
         # 线程安全的计数器
         lock = threading.Lock()
         success_count = 0
         failed_count = 0
 
-        def analyze_file(file_path: str, session_id: str, policy_dir: str) -> bool:
-            """用指定session分析单个文件，返回是否成功"""
+        # 所有 worker 共享一个队列，空闲即领取下一篇
+        job_queue = AnalysisJobQueue(
+            files_to_analyze,
+            max_retries=self.config.MAX_RETRIES,
+            backoff_base=self.config.RETRY_BACKOFF,
+            backoff_max=self.config.RETRY_BACKOFF_MAX,
+            max_session_swaps=self.config.MAX_SESSION_SWAPS
+        )
+        # 取消时直接取消队列，阻塞在 get()（包括等待重试退避）的 worker 立即退出
+        progress.on_cancel(job_queue.cancel)
+
+        def finish_file(item: QueueItem, lease: Optional[SessionLease], outcome: str,
+                        score: Optional[float] = None, error: str = ''):
+            """记录单篇文档的最终结论（无论记录过程是否出错，都会标记队列任务完成）"""
             nonlocal success_count, failed_count
-            # 更新当前处理的文件
-            self.update_progress(current_file=file_path)
-            prompt = f"""请使用 policy-document-analyzer skill 分析 {file_path} 这篇政策文档，只返回分析结果文本，不要保存文件。"""
-            result = self.client.send_message(session_id, prompt)
-            with lock:
-                if result:
-                    # Python 保存分析结果
-                    saved_path = self.save_analysis_result(file_path, result)
-                    if saved_path:
-                        success_count += 1
-                        self.update_progress(success=success_count, current=success_count + failed_count)
-                        logger.info(f"[Session-{session_id[:8]}] 分析完成: {file_path}")
-
-                        # 立即执行高亮处理和分析结果Word转换
-                        try:
-                            from core.highlight import highlight_doc, convert_analysis_to_word
-                            doc_path = os.path.join(policy_dir, file_path)
-                            if os.path.exists(doc_path):
-                                # 生成高亮文档
-                                success_hl, _, _ = highlight_doc(doc_path, verbose=False)
-                                if success_hl:
-                                    logger.info(f"[Session-{session_id[:8]}] 高亮文档完成: {file_path}")
-                                # 生成分析结果Word文档
-                                success_wd, _, _ = convert_analysis_to_word(doc_path, verbose=False)
-                                if success_wd:
-                                    logger.info(f"[Session-{session_id[:8]}] 分析结果Word完成: {file_path}")
-                        except Exception as e:
-                            logger.error(f"[Session-{session_id[:8]}] Word生成失败: {file_path}, {e}")
-
-                        return True
-                    else:
+            file_path = item.file_path
+            tag = f"Session-{lease.session_id[:8]}" if lease else "Session-none"
+            try:
+                with lock:
+                    if outcome == OUTCOME_FAILED:
                         failed_count += 1
-                        logger.error(f"[Session-{session_id[:8]}] 保存分析结果失败: {file_path}")
-                        return False
-                else:
-                    failed_count += 1
-                    self.update_progress(failed=failed_count, current=success_count + failed_count)
-                    logger.error(f"[Session-{session_id[:8]}] 分析失败: {file_path}")
-                    return False
-
-        # 将文件分成 max_workers 组
-        groups = [[] for _ in range(max_workers)]
-        for i, file_path in enumerate(files_to_analyze):
-            groups[i % max_workers].append(file_path)
-
-        # 创建 max_workers 个 session
-        sessions = []
-        for i in range(max_workers):
-            session_id = self.client.create_session()
-            if session_id:
-                sessions.append(session_id)
-                logger.info(f"创建 Session-{i+1}: {session_id}")
-
-        if not sessions:
+                        progress.update(failed=failed_count, current=success_count + failed_count)
+                        progress.file_event('error', file_path, outcome=outcome, error=error, attempts=item.attempts)
+                        logger.error(f"[{tag}] 分析失败: {file_path}")
+                    else:
+                        success_count += 1
+                        progress.update(success=success_count, current=success_count + failed_count)
+                        progress.file_event('finish', file_path, outcome=outcome, score=score)
+                        if outcome == OUTCOME_BELOW_THRESHOLD:
+                            logger.info(f"[{tag}] 分析完成（低于保存阈值）: {file_path}")
+                        else:
+                            logger.info(f"[{tag}] 分析完成: {file_path}")
+                if outcome == OUTCOME_SAVED:
+                    # 高亮处理和分析结果Word转换交给后处理线程，不占用分析 worker 和锁
+                    postprocess.submit(policy_dir, file_path, tag)
+            finally:
+                job_queue.task_done(item)
+
+        # 从 session 池租用 session，每个 worker 独占一个
+        leases = []
+        for i in range(worker_count):
+            lease = self.session_pool.acquire()
+            if lease:
+                leases.append(lease)
+                logger.info(f"租用 Session-{i+1}: {lease.session_id}")
+
+        if not leases:
             logger.error("无法创建任何 session")
-            self.stop_progress()
+            progress.stop()
             return 0, len(files_to_analyze)
 
         # 并行执行分析任务
-        def analyze_group(group_files: list, session_id: str, worker_id: int):
-            """分析一组文件"""
-            logger.info(f"Worker-{worker_id} 开始分析，使用 session {session_id[:8]}")
-            for file_path in group_files:
-                if not self.client.validate_session(session_id):
-                    # session 失效，尝试重建
-                    new_session = self.client.create_session()
-                    if new_session:
-                        session_id = new_session
-                        logger.info(f"Worker-{worker_id} 重建 session: {session_id[:8]}")
-                    else:
+        def worker(lease: Optional[SessionLease], worker_id: int):
+            """从共享队列领取文档并分析，直到队列清空"""
+            logger.info(f"Worker-{worker_id} 开始分析，使用 session {lease.session_id[:8]}")
+            try:
+                while True:
+                    item = job_queue.get()
+                    if item is None:
+                        break
+                    file_path = item.file_path
+                    # 文档已重新入队或已记录结论；为 False 时出现意外异常需要按失败处理，
+                    # 否则队列的未完成计数永远不会归零，其他 worker 会一直阻塞在 get()
+                    handled = False
+                    try:
+                        # 上下文过长时换用新 session，保持每篇文档的耗时稳定
+                        if lease is not None:
+                            lease = self.session_pool.rotate_if_needed(lease)
+                        if lease is None:
+                            lease = self.session_pool.acquire()
+                            if lease is None:
+                                logger.error(f"Worker-{worker_id} 无法创建 session: {file_path}")
+                                handled = True
+                                if not job_queue.retry(item):
+                                    finish_file(item, None, OUTCOME_FAILED, error='无法创建 session')
+                                continue
+                            logger.info(f"Worker-{worker_id} 重建 session: {lease.session_id[:8]}")
+
+                        # 更新当前处理的文件
+                        progress.update(current_file=file_path)
+                        progress.file_event('start', file_path, attempts=item.attempts)
+                        result = self.request_analysis(lease.session_id, policy_dir, file_path)
                         with lock:
-                            failed_count += 1
-                        self.update_progress(failed=failed_count, current=success_count + failed_count)
-                        continue
-                analyze_file(file_path, session_id, policy_dir)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+                            # Python 保存分析结果并记录到分析清单
+                            outcome, score, _ = self.process_analysis_result(policy_dir, file_path, result)
+                        error = (result or '分析结果为空')[:200] if outcome == OUTCOME_FAILED else ''
+
+                        if outcome == OUTCOME_FAILED:
+                            # 失败后才检查 session：已失效则换新 session 并把文档放回队列，不计入重试次数；
+                            # 换 session 次数达到上限后按普通失败计入重试
+                            recovered = self.session_pool.recover(lease)
+                            session_lost = recovered is not lease
+                            if session_lost:
+                                logger.warning(f"Worker-{worker_id} session {lease.session_id[:8]} 已失效: {file_path}")
+                                lease = recovered
+                            if session_lost and lease and job_queue.requeue(item):
+                                logger.warning(f"Worker-{worker_id} 已换用新 session，文档重新入队"
+                                               f"（第 {item.session_swaps} 次）: {file_path}")
+                                handled = True
+                                continue
+                            if job_queue.retry(item):
+                                logger.warning(f"Worker-{worker_id} 分析失败，稍后第 {item.attempts} 次重试: {file_path}")
+                                handled = True
+                                progress.file_event('retry', file_path, attempts=item.attempts, error=error)
+                                continue
+                        else:
+                            self.session_pool.mark_success(lease)
+
+                        handled = True
+                        finish_file(item, lease, outcome, score, error)
+                    except Exception as e:
+                        logger.error(f"Worker-{worker_id} 处理文档异常: {file_path}, {e}")
+                        if not handled:
+                            handled = True
+                            finish_file(item, lease, OUTCOME_FAILED, error=str(e)[:200])
+            finally:
+                self.session_pool.release(lease)
+
+        postprocess = PostProcessPipeline(
+            self.generate_word_documents,
+            on_done=lambda file_path, ok: progress.file_event('rendered', file_path, ok=ok)
+        )
+        with postprocess, concurrent.futures.ThreadPoolExecutor(max_workers=len(leases)) as executor:
             futures = [
-                executor.submit(analyze_group, groups[i], sessions[i], i + 1)
-                for i in range(len(sessions))
+                executor.submit(worker, leases[i], i + 1)
+                for i in range(len(leases))
             ]
             for future in concurrent.futures.as_completed(futures):
                 try:
                     future.result()
                 except Exception as e:
                     logger.error(f"并行分析任务异常: {e}")
+            # 分析全部结束后，等待后处理队列清空（离开 with 时）
 
-        # 确保最终进度更新为完成
-        with self._progress_lock:
-            self._progress['current'] = self._progress['total']
-            self._progress['running'] = False
-            logger.info(f"进度追踪完成: current={self._progress['current']}, total={self._progress['total']}, running=False")
+        # 确保最终进度更新为完成（取消时保留实际进度）
+        progress.stop(complete=not progress.cancel_requested)
+        logger.info(f"进度追踪完成: {progress.snapshot()}")
 
         # 记录完成状态
         logger.info(f"并行分析完成: 成功 {success_count}, 失败 {failed_count}")
@@ -0,0 +1,339 @@
+"""asyncio 政策文档分析引擎
+
+与线程池版本（PolicyAnalyzer.run_parallel_analysis）并存，通过 ANALYSIS_ENGINE=async 启用。
+所有在途请求共用一个事件循环和一个 httpx 连接池，并发数由信号量控制，
+不再为每个请求占用两个系统线程，单进程即可同时驱动几十篇文档的分析。
+异步化的只有与 OpenCode 的 HTTP 通信：文件读写、缓存和分析清单仍是同步的阻塞 I/O，
+只是通过 asyncio.to_thread 放到默认线程池执行，避免阻塞事件循环；进度和状态写入
+（任务进度入库、事件发布、状态文件）交给单个写入线程按提交顺序执行。
+"""
+import os
+import random
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logging.warning("httpx 未安装，异步分析引擎不可用。请运行: pip install httpx")
+
+from core.analyzer import ANALYSIS_PROMPT, OUTCOME_FAILED, OUTCOME_SAVED, PolicyAnalyzer
+from core.jobs import JobProgress
+from core.postprocess import PostProcessPipeline
+from core.opencode_client import (
+    CONNECT_BACKOFF, CONNECT_RETRIES, CONNECT_TIMEOUT, MESSAGE_TIMEOUT, READ_TIMEOUT,
+    parse_message_response
+)
+from core.session_pool import SessionLease
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOpenCodeClient:
+    """OpenCode API 异步客户端（httpx 连接池）"""
+
+    def __init__(self, server_url: str, max_connections: int = 20):
+        self.server_url = server_url
+        self.http = httpx.AsyncClient(
+            base_url=server_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        )
+
+    async def _request(self, method: str, path: str, read_timeout: Optional[float] = READ_TIMEOUT,
+                       **kwargs) -> 'httpx.Response':
+        """发送请求，连接失败（请求未发出）时按带抖动的指数退避重试"""
+        kwargs.setdefault('timeout', httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT))
+        for attempt in range(CONNECT_RETRIES + 1):
+            try:
+                return await self.http.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= CONNECT_RETRIES:
+                    raise
+                delay = CONNECT_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"连接 OpenCode 失败，{delay:.1f} 秒后第 {attempt + 1} 次重试: {method} {path}")
+                await asyncio.sleep(delay)
+
+    async def create_session(self) -> Optional[str]:
+        """创建新的会话"""
+        try:
+            resp = await self._request('POST', '/session', json={})
+            if resp.status_code == 200:
+                session_id = resp.json().get('id')
+                if session_id:
+                    logger.info(f"创建新 OpenCode session: {session_id}")
+                    return session_id
+            return None
+        except Exception as e:
+            logger.error(f"创建 OpenCode session 失败: {e}")
+            return None
+
+    async def validate_session(self, session_id: str) -> bool:
+        """验证会话是否有效"""
+        try:
+            resp = await self._request('GET', f'/session/{session_id}')
+            return resp.status_code == 200
+        except Exception:
+            return False
+
+    async def delete_session(self, session_id: str) -> bool:
+        """删除会话"""
+        try:
+            await self._request('DELETE', f'/session/{session_id}')
+            return True
+        except Exception:
+            return False
+
+    async def send_message(self, session_id: str, message: str) -> str:
+        """发送消息并等待完整回复（失败时为「分析失败: ...」）"""
+        try:
+            resp = await self._request('POST', f'/session/{session_id}/message', read_timeout=MESSAGE_TIMEOUT,
+                                       json={"agent": "general", "parts": [{"type": "text", "text": message}]})
+            return parse_message_response(resp.status_code, resp.text)
+        except httpx.TimeoutException as e:
+            logger.error(f"OpenCode 请求超时: {e}")
+            return "分析失败: 请求超时"
+        except httpx.TransportError as e:
+            logger.error(f"连接 OpenCode 失败: {e}")
+            return "分析失败: 连接失败"
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+class AsyncSessionPool:
+    """协程版 session 池：空闲复用、失败后验证、上下文过长时轮换（阈值沿用同步 session 池的配置）"""
+
+    def __init__(self, client: AsyncOpenCodeClient, max_messages: int, max_tokens: int):
+        self.client = client
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self._idle: List[SessionLease] = []
+
+    async def acquire(self) -> Optional[SessionLease]:
+        while self._idle:
+            lease = self._idle.pop()
+            if not self.needs_rotation(lease):
+                return lease
+            await self.client.delete_session(lease.session_id)
+        session_id = await self.client.create_session()
+        return SessionLease(session_id) if session_id else None
+
+    def release(self, lease: Optional[SessionLease]):
+        if lease is not None:
+            self._idle.append(lease)
+
+    def needs_rotation(self, lease: SessionLease) -> bool:
+        return (0 < self.max_messages <= lease.messages) or (0 < self.max_tokens <= lease.approx_tokens)
+
+    async def rotate_if_needed(self, lease: SessionLease) -> Optional[SessionLease]:
+        if not self.needs_rotation(lease):
+            return lease
+        logger.info(f"session {lease.session_id[:8]} 已发送 {lease.messages} 条消息，轮换新 session")
+        await self.client.delete_session(lease.session_id)
+        return await self.acquire()
+
+    async def recover(self, lease: SessionLease) -> Optional[SessionLease]:
+        """发送失败后检查 session，有效返回原 lease，失效则在服务器上删除并换新"""
+        if await self.client.validate_session(lease.session_id):
+            return lease
+        logger.warning(f"session {lease.session_id[:8]} 已失效，重新创建")
+        await self.client.delete_session(lease.session_id)
+        return await self.acquire()
+
+    async def close(self):
+        for lease in self._idle:
+            await self.client.delete_session(lease.session_id)
+        self._idle = []
+
+
+class AsyncAnalysisEngine:
+    """基于 asyncio 的并行分析引擎，复用 PolicyAnalyzer 的文档筛选、缓存、结果保存和分析清单逻辑"""
+
+    def __init__(self, analyzer: PolicyAnalyzer, max_concurrency: int = None, client: AsyncOpenCodeClient = None):
+        if not HTTPX_AVAILABLE and client is None:
+            raise RuntimeError("httpx 未安装，无法使用异步分析引擎")
+        self.analyzer = analyzer
+        self.config = analyzer.config
+        self.max_concurrency = max_concurrency or \
+            int(os.getenv('ANALYSIS_ASYNC_CONCURRENCY', 0)) or self.config.MAX_WORKERS
+        self.client = client
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    async def _report(self, func: Callable, *args, **kwargs):
+        """
+        在写入线程中执行进度、事件、状态文件等同步写入，不阻塞事件循环
+
+        只有一个写入线程，按提交顺序执行，进度计数不会被较早的更新覆盖。
+        """
+        await asyncio.get_running_loop().run_in_executor(self._writer, partial(func, *args, **kwargs))
+
+    async def run(self, policy_dir: str, progress: Optional[JobProgress] = None) -> Tuple[int, int]:
+        """分析 policy_dir 下需要分析的文档，返回 (成功数, 失败数)"""
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-analysis-writer")
+        try:
+            return await self._run(policy_dir, progress or JobProgress())
+        finally:
+            self._writer.shutdown(wait=True)
+            self.analyzer.forget_documents(policy_dir)
+
+    async def _run(self, policy_dir: str, progress: JobProgress) -> Tuple[int, int]:
+        analyzer = self.analyzer
+        report = self._report
+        logger.info("=" * 50)
+        logger.info(f"开始执行异步分析任务，并发上限 {self.max_concurrency}")
+        logger.info("=" * 50)
+
+        os.makedirs(self.config.analyze_dir_path, exist_ok=True)
+
+        doc_files = await asyncio.to_thread(analyzer.get_policy_documents, policy_dir)
+        if not doc_files:
+            logger.warning(f"没有找到政策文档: {policy_dir}")
+            await report(analyzer.save_status, datetime.now().isoformat(), 0, 'no_docs')
+            await report(progress.stop)
+            return 0, 0
+
+        files_to_analyze = await asyncio.to_thread(analyzer.select_files_to_analyze, policy_dir, doc_files)
+        logger.info(f"找到 {len(doc_files)} 个政策文档，需要分析 {len(files_to_analyze)} 个")
+        if not files_to_analyze:
+            await report(analyzer.save_status, datetime.now().isoformat(), 0, 'no_new_docs')
+            await report(progress.stop)
+            return 0, 0
+
+        await report(progress.start, len(files_to_analyze))
+        own_client = self.client is None
+        client = self.client or AsyncOpenCodeClient(analyzer.client.server_url, self.max_concurrency * 2)
+        pool = AsyncSessionPool(client, analyzer.session_pool.max_messages, analyzer.session_pool.max_tokens)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 保存结果和写分析清单串行执行，与线程池版本一致
+        save_lock = asyncio.Lock()
+        counts = {'success': 0, 'failed': 0}
+        postprocess = PostProcessPipeline(
+            analyzer.generate_word_documents,
+            on_done=lambda file_path, ok: progress.file_event('rendered', file_path, ok=ok)
+        )
+
+        async def analyze(file_path: str):
+            async with semaphore:
+                if progress.cancel_requested:
+                    return
+                await report(progress.update, current_file=file_path)
+                try:
+                    outcome, score, error, attempts = await self._analyze_file(
+                        pool, save_lock, policy_dir, file_path, progress)
+                except Exception as e:
+                    # 意外异常也计入失败，进度和失败数保持一致
+                    logger.error(f"异步分析任务异常: {file_path}, {e}")
+                    outcome, score, error, attempts = OUTCOME_FAILED, None, str(e)[:200], 0
+
+                if outcome == OUTCOME_FAILED:
+                    counts['failed'] += 1
+                    await report(progress.file_event, 'error', file_path, outcome=outcome, error=error, attempts=attempts)
+                    logger.error(f"分析失败: {file_path}")
+                else:
+                    counts['success'] += 1
+                    await report(progress.file_event, 'finish', file_path, outcome=outcome, score=score)
+                    logger.info(f"分析完成: {file_path}")
+                await report(progress.update, success=counts['success'], failed=counts['failed'],
+                             current=counts['success'] + counts['failed'])
+
+                if outcome == OUTCOME_SAVED:
+                    # 交给后处理线程渲染，不占用并发名额
+                    postprocess.submit(policy_dir, file_path, 'async')
+
+        try:
+            results = await asyncio.gather(*(analyze(f) for f in files_to_analyze), return_exceptions=True)
+            for file_path, result in zip(files_to_analyze, results):
+                if isinstance(result, Exception):
+                    logger.error(f"异步分析任务异常: {file_path}, {result}")
+        finally:
+            await pool.close()
+            if own_client:
+                await client.aclose()
+            # 等待后处理队列清空
+            await asyncio.to_thread(postprocess.close)
+
+        success_count, failed_count = counts['success'], counts['failed']
+        await report(progress.stop, complete=not progress.cancel_requested)
+        logger.info(f"异步分析完成: 成功 {success_count}, 失败 {failed_count}")
+        await report(analyzer.save_status, datetime.now().isoformat(), success_count, 'success')
+
+        if success_count > 0 or failed_count > 0:
+            try:
+                from backend.database import init_db, migrate_existing_files
+                await asyncio.to_thread(init_db)
+                await asyncio.to_thread(migrate_existing_files)
+                logger.info("数据库同步完成")
+            except Exception as e:
+                logger.error(f"数据库同步失败: {e}")
+
+        return success_count, failed_count
+
+    async def _analyze_file(self, pool: AsyncSessionPool, save_lock: asyncio.Lock, policy_dir: str,
+                            file_path: str, progress: JobProgress) -> Tuple[str, Optional[float], str, int]:
+        """
+        分析单篇文档（含缓存、失败重试和 session 替换）
+
+        Returns:
+            (结论, 总分, 错误信息, 重试次数)
+        """
+        analyzer = self.analyzer
+        report = self._report
+        attempts = 0
+        session_swaps = 0
+        lease = None
+        try:
+            while True:
+                await report(progress.file_event, 'start', file_path, attempts=attempts)
+                content_hash, result = await asyncio.to_thread(analyzer.lookup_cached_analysis, policy_dir, file_path)
+                if result is None:
+                    lease = await pool.rotate_if_needed(lease) if lease else await pool.acquire()
+                    if lease is None:
+                        result = "分析失败: 无法创建 session"
+                    else:
+                        prompt = ANALYSIS_PROMPT.format(file_path=file_path)
+                        result = await pool.client.send_message(lease.session_id, prompt)
+                        usage = await asyncio.to_thread(analyzer.estimate_usage, policy_dir, file_path, prompt, result)
+                        lease.messages += 1
+                        lease.approx_tokens += usage
+                        await asyncio.to_thread(analyzer.store_cached_analysis, content_hash, file_path, result)
+
+                async with save_lock:
+                    outcome, score, _ = await asyncio.to_thread(
+                        analyzer.process_analysis_result, policy_dir, file_path, result
+                    )
+                if outcome != OUTCOME_FAILED:
+                    return outcome, score, '', attempts
+
+                error = (result or '分析结果为空')[:200]
+                if lease is not None:
+                    recovered = await pool.recover(lease)
+                    if recovered is not lease:
+                        # session 失效导致的失败不计入重试次数；同一篇文档换 session 次数有上限，
+                        # 反复超时或反复导致 session 失效时改按普通失败计入重试
+                        lease = recovered
+                        if lease is not None and session_swaps < self.config.MAX_SESSION_SWAPS:
+                            session_swaps += 1
+                            logger.warning(f"已换用新 session，重新分析（第 {session_swaps} 次）: {file_path}")
+                            continue
+                attempts += 1
+                if attempts > self.config.MAX_RETRIES or progress.cancel_requested:
+                    return OUTCOME_FAILED, None, error, attempts
+                delay = min(self.config.RETRY_BACKOFF_MAX, self.config.RETRY_BACKOFF * (2 ** (attempts - 1)))
+                logger.warning(f"分析失败，稍后第 {attempts} 次重试: {file_path}")
+                await report(progress.file_event, 'retry', file_path, attempts=attempts, error=error)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        finally:
+            pool.release(lease)
+
+
+def run_async_analysis(analyzer: PolicyAnalyzer, policy_dir: str, max_concurrency: int = None,
+                       progress: Optional[JobProgress] = None) -> Tuple[int, int]:
+    """在新的事件循环中运行异步分析（供后台任务线程调用）"""
+    return asyncio.run(AsyncAnalysisEngine(analyzer, max_concurrency).run(policy_dir, progress))
@@ -0,0 +1,146 @@
+"""进度事件总线
+
+分析、爬取任务在执行过程中发布事件，SSE 接口订阅后实时推送给前端，
+多个页面同时查看进度时每个页面只占用一条长连接，不再轮询。
+"""
+import json
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+EVENT_JOB = 'job'            # 任务状态变化（排队、开始、结束）
+EVENT_PROGRESS = 'progress'  # 任务整体进度
+EVENT_FILE = 'file'          # 单篇文档开始、完成、重试、失败
+EVENT_CRAWL = 'crawl'        # 爬取阶段变化和文件保存
+
+# 保留最近的事件，断线重连时按 Last-Event-ID 补发
+HISTORY_SIZE = 500
+# 单个订阅者的缓冲上限，消费过慢时丢弃最旧的事件
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """一个事件订阅（对应一条 SSE 连接）"""
+
+    def __init__(self, bus: 'EventBus', types: Optional[Iterable[str]] = None, job_id: str = None):
+        self._bus = bus
+        self.types = set(types) if types else None
+        self.job_id = job_id
+        self._queue: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, event: dict) -> bool:
+        if self.types and event['type'] not in self.types:
+            return False
+        if self.job_id and event['data'].get('jobId') != self.job_id:
+            return False
+        return True
+
+    def put(self, event: dict):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = None) -> Optional[dict]:
+        """等待下一个事件，超时返回 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class EventBus:
+    """进程内发布/订阅（线程安全）"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self._history: deque = deque(maxlen=history_size)
+        self._next_id = 1
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        """发布事件，返回带 id 的事件记录"""
+        with self._lock:
+            event = {
+                'id': self._next_id,
+                'type': event_type,
+                'time': datetime.now().isoformat(),
+                'data': data
+            }
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def subscribe(self, types: Optional[Iterable[str]] = None, job_id: str = None,
+                  last_event_id: int = None) -> Subscription:
+        """
+        订阅事件
+
+        Args:
+            types: 只接收这些类型的事件，None 表示全部
+            job_id: 只接收该任务的事件
+            last_event_id: 断线重连时客户端已收到的最后一个事件 id，之后的历史事件会先补发
+        """
+        subscription = Subscription(self, types, job_id)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id and subscription.matches(event):
+                        subscription.put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: dict) -> str:
+    """把事件格式化为 SSE 文本帧"""
+    payload = json.dumps(dict(event['data'], time=event['time']), ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+_event_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """获取进程内唯一的事件总线"""
+    return _event_bus
+
+
+def publish_event(event_type: str, data: dict):
+    """发布事件（发布失败只记录日志，不影响任务本身）"""
+    try:
+        _event_bus.publish(event_type, data)
+    except Exception as e:
+        logger.error(f"发布事件失败: {event_type}, {e}")
@@ -4,6 +4,10 @@
 """
 import os
 import re
+import bisect
+from collections import deque
+
+from core.result_parser import parse_result_file, parse_result_text
 
 try:
     from docx import Document
@@ -18,72 +22,113 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, 'policy_document_word')
 
 
+RESULT_DIR = os.path.join(BASE_DIR, 'analyze_result')
+POLICY_DIR = os.path.join(BASE_DIR, 'policy_document')
+RESULT_NAME_PATTERN = re.compile(r'^(.+)_分析结果_(\d+(?:\.\d+)?)\.md$')
+
+
+def policy_relative_path(doc_path, policy_dir=POLICY_DIR):
+    """源文档相对于政策文档根目录的路径（即分析清单中的 doc_path），不在根目录下时只取文件名"""
+    rel_path = os.path.relpath(os.path.abspath(doc_path), os.path.abspath(policy_dir))
+    if rel_path.startswith(os.pardir):
+        return os.path.basename(doc_path)
+    return rel_path
+
+
+def _result_in_dir(target_dir, doc_title):
+    """在结果目录中按文件名精确查找 {标题}_分析结果_{评分}.md，有多个时取最新的"""
+    try:
+        names = os.listdir(target_dir)
+    except OSError:
+        return None
+    candidates = []
+    for name in names:
+        match = RESULT_NAME_PATTERN.match(name)
+        if match and match.group(1) == doc_title:
+            candidates.append(os.path.join(target_dir, name))
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
 def find_analysis_result(doc_path):
-    """查找对应的分析结果文件"""
-    result_dir = os.path.join(BASE_DIR, 'analyze_result')
-    doc_name = os.path.basename(doc_path)
-    doc_title = os.path.splitext(doc_name)[0]
+    """
+    查找对应的分析结果文件
 
-    # 获取原始文档的相对路径
-    doc_rel_dir = os.path.dirname(doc_path)
-    if doc_rel_dir and doc_rel_dir != '.':
-        # 先在对应的子目录查找
-        target_dir = os.path.join(result_dir, doc_rel_dir)
-        if os.path.exists(target_dir):
-            for root, dirs, files in os.walk(target_dir):
-                for f in files:
-                    if f.endswith('.md') and '_分析结果_' in f:
-                        for kw in [doc_title] + re.findall(r'《([^》]+)》', doc_title):
-                            if kw and len(kw) >= 4 and kw in f:
-                                return os.path.join(root, f)
-
-    # 在根目录查找
-    for root, dirs, files in os.walk(result_dir):
-        for f in files:
-            if f.endswith('.md') and '_分析结果_' in f:
-                for kw in [doc_title] + re.findall(r'《([^》]+)》', doc_title):
-                    if kw and len(kw) >= 4 and kw in f:
-                        return os.path.join(root, f)
-    return None
+    优先按分析清单中保存时记录的结果路径查找；清单中没有记录（旧数据）时，
+    在与源文档对应的结果子目录中按文件名精确匹配。
+    """
+    rel_path = policy_relative_path(doc_path)
+    try:
+        from backend.database import get_manifest_result
+        entry = get_manifest_result(rel_path)
+    except Exception:
+        entry = None
+    if entry and os.path.exists(entry['result_path']):
+        return entry['result_path']
+
+    doc_title = os.path.splitext(os.path.basename(rel_path))[0]
+    return _result_in_dir(os.path.join(RESULT_DIR, os.path.dirname(rel_path)), doc_title)
+
+
+def rebuild_result_index(policy_dir=POLICY_DIR):
+    """
+    扫描一遍 analyze_result，重建分析清单中的源文档 -> 分析结果映射
+
+    用于清单缺失或结果文件被手动移动、替换后。源文档不存在的结果会被跳过，
+    清单中没有记录的源文档按已保存补记。
+
+    Returns:
+        (更新的记录数, 补记的记录数)
+    """
+    import hashlib
+    from backend.database import init_db, get_manifest_entries, update_manifest_results, upsert_manifest_entries
+
+    results = {}
+    for root, dirs, files in os.walk(RESULT_DIR):
+        for name in files:
+            match = RESULT_NAME_PATTERN.match(name)
+            if not match:
+                continue
+            rel_dir = os.path.relpath(root, RESULT_DIR)
+            doc_path = os.path.normpath(os.path.join(rel_dir, match.group(1) + '.md'))
+            result_path = os.path.join(root, name)
+            # 同一文档有多个结果时保留最新的
+            if doc_path in results and os.path.getmtime(results[doc_path]['result_path']) >= os.path.getmtime(result_path):
+                continue
+            results[doc_path] = {'doc_path': doc_path, 'result_path': result_path, 'score': float(match.group(2))}
+
+    init_db()
+    manifest = get_manifest_entries()
+    updates = [r for doc_path, r in results.items() if doc_path in manifest]
+    inserts = []
+    for doc_path, r in results.items():
+        full_path = os.path.join(policy_dir, doc_path)
+        if doc_path in manifest or not os.path.exists(full_path):
+            continue
+        digest = hashlib.sha256()
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        stat = os.stat(full_path)
+        inserts.append({
+            'doc_path': doc_path,
+            'content_hash': digest.hexdigest(),
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'score': r['score'],
+            'outcome': 'saved',
+            'result_path': r['result_path'],
+            'analyzed_at': None
+        })
+    update_manifest_results(updates)
+    upsert_manifest_entries(inserts)
+    return len(updates), len(inserts)
 
 
 def parse_analysis(content):
     """解析分析结果，返回待高亮的段落列表"""
-    paragraphs = []
-    current_text = None
-    current_score = None
-    keywords = []
-    current_business = None
-
-    for line in content.split('\n'):
-        line = line.strip()
-        # 段落内容行
-        if line.startswith('> ') and not line.startswith('> -'):
-            current_text = line[2:].strip()
-            keywords = []
-        # 评分和关键词行
-        elif line.startswith('> -') and current_text:
-            match = re.search(r'评分：(\d+)/100', line)
-            if match:
-                current_score = int(match.group(1))
-                match_kw = re.search(r'关键词：(.+)', line)
-                if match_kw:
-                    keywords = [k.strip() for k in match_kw.group(1).split('、')]
-                match_biz = re.search(r'语义关联：(.+)', line)
-                if match_biz:
-                    current_business = match_biz.group(1).strip()
-                if current_text and current_score is not None:
-                    paragraphs.append({
-                        'text': current_text,
-                        'score': current_score,
-                        'keywords': keywords,
-                        'business': current_business
-                    })
-            current_text = None
-            current_score = None
-            keywords = []
-            current_business = None
-    return paragraphs
+    return [p.as_dict() for p in parse_result_text(content).paragraphs]
 
 
 def load_original_doc(doc_path):
@@ -153,7 +198,7 @@ def parse_original_doc(content):
 
 
 def find_matching_paragraph(text, highlight_list):
-    """在原始段落中找到与分析结果匹配的段落"""
+    """在原始段落中找到与分析结果匹配的段落（返回第一个匹配；批量匹配请使用 ParagraphMatcher）"""
     text_clean = re.sub(r'\s+', ' ', text.strip())
 
     for idx, hl in enumerate(highlight_list):
@@ -172,6 +217,155 @@ def find_matching_paragraph(text, highlight_list):
     return -1
 
 
+def _normalize_text(text):
+    return re.sub(r'\s+', ' ', text.strip())
+
+
+class LiteralAutomaton:
+    """
+    Aho-Corasick 自动机：一次扫描找出文本中出现的全部字面量
+
+    构建耗时与字面量总长度成正比，扫描耗时与文本长度加命中数成正比，与字面量个数无关。
+    互为子串的字面量都会被找到（通过输出链），不需要额外计算包含关系。
+    """
+
+    def __init__(self, words):
+        # 每个状态：转移表、失败指针、以该状态结尾的字面量、输出链（最近的带字面量的后缀状态）
+        self._goto = [{}]
+        self._fail = [0]
+        self._word = [None]
+        self._output = [0]
+        for word in set(words):
+            if word:
+                self._add(word)
+        self._build()
+
+    def _add(self, word):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._word.append(None)
+                self._output.append(0)
+            state = nxt
+        self._word[state] = word
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fail = self._fail[nxt]
+                self._output[nxt] = fail if self._word[fail] is not None else self._output[fail]
+
+    def find_all(self, text):
+        """文本中出现的全部字面量"""
+        found = set()
+        goto, fail, words, output = self._goto, self._fail, self._word, self._output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            node = state if words[state] is not None else output[state]
+            # 某个字面量已找到时，它的输出链上的字面量也已找到
+            while node and words[node] not in found:
+                found.add(words[node])
+                node = output[node]
+        return found
+
+
+class ParagraphMatcher:
+    """
+    段落匹配器：一篇文档的高亮段落只规范化、编译一次，逐段为原文找出最匹配的高亮段落
+
+    匹配优先级：精确匹配 > 包含匹配（长度越接近越优先）> 关键词匹配（至少 2 个，命中越多越优先），
+    同级取评分高的。不足 2 个字符的段落只做精确匹配，避免单字被误判为包含。
+    """
+
+    def __init__(self, highlight_list):
+        self.highlight_list = highlight_list
+        texts = [_normalize_text(hl['text']) for hl in highlight_list]
+
+        # 规范化文本 -> 使用该文本的高亮段落
+        self._by_text = {}
+        for idx, hl_text in enumerate(texts):
+            self._by_text.setdefault(hl_text, []).append(idx)
+
+        # 原文段落包含高亮段落：自动机一次扫描
+        self._text_automaton = LiteralAutomaton(self._by_text)
+        # 高亮段落包含原文段落：在拼接后的高亮文本中查找，按偏移定位到所属段落
+        self._joined_texts = list(self._by_text)
+        self._offsets = []
+        offset = 0
+        for hl_text in self._joined_texts:
+            self._offsets.append(offset)
+            offset += len(hl_text) + 1
+        self._joined = '\n'.join(self._joined_texts)
+
+        # 关键词 -> 使用该关键词的高亮段落（忽略空关键词）
+        self._keyword_owners = {}
+        for idx, hl in enumerate(highlight_list):
+            for kw in set(hl.get('keywords') or []):
+                if kw:
+                    self._keyword_owners.setdefault(kw, []).append(idx)
+        self._keyword_automaton = LiteralAutomaton(self._keyword_owners)
+
+    def _containing(self, text):
+        """包含该段落的高亮文本"""
+        found = set()
+        pos = self._joined.find(text)
+        while pos >= 0:
+            i = bisect.bisect_right(self._offsets, pos) - 1
+            found.add(self._joined_texts[i])
+            # 跳到下一个高亮文本继续查找
+            next_start = self._offsets[i + 1] if i + 1 < len(self._offsets) else len(self._joined)
+            pos = self._joined.find(text, next_start)
+        return found
+
+    def _best(self, indices):
+        return max(indices, key=lambda idx: self.highlight_list[idx]['score'])
+
+    def match(self, text):
+        """返回与原文段落最匹配的高亮段落索引，未匹配返回 -1"""
+        text_clean = _normalize_text(text)
+
+        # 精确匹配
+        exact = self._by_text.get(text_clean)
+        if exact:
+            return self._best(exact)
+        if len(text_clean) < 2:
+            return -1
+
+        # 包含匹配
+        contained = self._text_automaton.find_all(text_clean) | self._containing(text_clean)
+        if contained:
+            def closeness(hl_text):
+                return min(len(hl_text), len(text_clean)) / max(len(hl_text), len(text_clean))
+            best_text = max(contained, key=lambda t: (closeness(t), self.highlight_list[self._best(self._by_text[t])]['score']))
+            return self._best(self._by_text[best_text])
+
+        # 关键词匹配 (至少匹配2个关键词)
+        counts = {}
+        for kw in self._keyword_automaton.find_all(text_clean):
+            for idx in self._keyword_owners[kw]:
+                counts[idx] = counts.get(idx, 0) + 1
+        candidates = [idx for idx, count in counts.items() if count >= 2]
+        if not candidates:
+            return -1
+        return max(candidates, key=lambda idx: (counts[idx], self.highlight_list[idx]['score']))
+
+
 def highlight_color(score):
     """根据评分返回颜色"""
     if score >= 80:
@@ -205,10 +399,11 @@ def create_highlighted_doc(doc_title, original_paragraphs, highlight_list, outpu
     doc.add_paragraph()
 
     # 匹配并高亮段落
+    matcher = ParagraphMatcher(highlight_list)
     matched_indices = set()
     for idx, (text, ptype) in enumerate(original_paragraphs):
-        # 检查是否匹配任何高亮段落
-        match_idx = find_matching_paragraph(text, highlight_list)
+        # 检查是否匹配任何高亮段落（取最佳匹配）
+        match_idx = matcher.match(text)
         if match_idx >= 0:
             matched_indices.add(match_idx)
             score = highlight_list[match_idx]['score']
@@ -281,10 +476,8 @@ def highlight_doc(doc_path, verbose=True):
         return False, None, "未找到分析结果"
 
     # 读取分析结果并提取分数
-    with open(result_path, 'r', encoding='utf-8') as f:
-        analysis_content = f.read()
-    score_match = re.search(r'> \*\*总分\*\*[：:]\s*([\d.]+)', analysis_content)
-    score_str = score_match.group(1) if score_match else "0.0"
+    analysis = parse_result_file(result_path)
+    score_str = analysis.total_score_text or "0.0"
 
     doc_name = os.path.basename(doc_path)
     doc_title = os.path.splitext(doc_name)[0]
@@ -322,14 +515,11 @@ def highlight_doc(doc_path, verbose=True):
         # 解析原始文档
         original_paragraphs = parse_original_doc(original_content)
 
-        # 加载并解析分析结果
-        with open(result_path, 'r', encoding='utf-8') as f:
-            analysis_content = f.read()
-        highlight_list = parse_analysis(analysis_content)
+        highlight_list = [p.as_dict() for p in analysis.paragraphs]
 
         if not highlight_list:
             # 没有高亮段落，直接保存原始文档
-            success = save_analysis_result_word(analysis_content, doc_title, output_path)
+            success = save_analysis_result_word(analysis.content, doc_title, output_path)
             return success, output_path, "无高亮段落"
 
         # 创建高亮文档
@@ -353,10 +543,8 @@ def convert_analysis_to_word(doc_path, verbose=True):
         return False, None, "未找到分析结果"
 
     # 读取分析结果并提取分数
-    with open(result_path, 'r', encoding='utf-8') as f:
-        analysis_content = f.read()
-    score_match = re.search(r'> \*\*总分\*\*[：:]\s*([\d.]+)', analysis_content)
-    score_str = score_match.group(1) if score_match else "0.0"
+    analysis = parse_result_file(result_path)
+    score_str = analysis.total_score_text or "0.0"
 
     doc_name = os.path.basename(doc_path)
     doc_title = os.path.splitext(doc_name)[0]
@@ -386,12 +574,97 @@ def convert_analysis_to_word(doc_path, verbose=True):
     output_path = os.path.join(target_dir, f"{doc_title}_分析结果_{score_str}.docx")
 
     try:
-        with open(result_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        success = save_analysis_result_word(content, doc_title, output_path)
+        success = save_analysis_result_word(analysis.content, doc_title, output_path)
         if success:
             return True, output_path, "成功"
         return False, None, "保存失败"
     except Exception as e:
         return False, None, str(e)
+
+
+def _render_document(doc_path):
+    """渲染单篇文档的高亮文档和分析结果Word（在子进程中执行）"""
+    try:
+        success_hl, _, hl_msg = highlight_doc(doc_path, verbose=False)
+        success_wd, _, wd_msg = convert_analysis_to_word(doc_path, verbose=False)
+    except Exception as e:
+        return doc_path, False, False, str(e)
+    return doc_path, success_hl, success_wd, hl_msg if not success_hl else wd_msg
+
+
+def list_policy_documents(policy_dir):
+    """列出政策文档目录下的所有 Markdown 文档（跳过 csv 目录）"""
+    doc_paths = []
+    for root, dirs, files in os.walk(policy_dir):
+        dirs[:] = [d for d in dirs if d != 'csv']
+        for f in sorted(files):
+            if f.endswith('.md'):
+                doc_paths.append(os.path.join(root, f))
+    return doc_paths
+
+
+def highlight_all_documents(policy_dir, jobs=None, verbose=False):
+    """
+    批量生成高亮文档和分析结果Word
+
+    python-docx 渲染是 CPU 密集型，受 GIL 限制，因此分发到多个进程并行执行。
+
+    Args:
+        policy_dir: 政策文档根目录
+        jobs: 进程数，默认读取 HIGHLIGHT_JOBS，未设置时为 CPU 核数；为 1 时在当前进程执行
+        verbose: 是否逐篇打印结果
+
+    Returns:
+        成功生成高亮文档的数量
+    """
+    if not WORD_AVAILABLE:
+        print("python-docx 未安装，无法生成 Word 文档")
+        return 0
+
+    doc_paths = list_policy_documents(policy_dir)
+    if not doc_paths:
+        return 0
+
+    jobs = jobs or int(os.getenv('HIGHLIGHT_JOBS', 0)) or os.cpu_count() or 1
+    jobs = min(jobs, len(doc_paths))
+
+    if jobs == 1:
+        results = map(_render_document, doc_paths)
+        return _collect_render_results(results, verbose)
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # 按块分发，减少进程间通信次数
+        chunksize = max(1, len(doc_paths) // (jobs * 4))
+        return _collect_render_results(executor.map(_render_document, doc_paths, chunksize=chunksize), verbose)
+
+
+def _collect_render_results(results, verbose):
+    highlight_count = 0
+    word_count = 0
+    for doc_path, success_hl, success_wd, msg in results:
+        highlight_count += 1 if success_hl else 0
+        word_count += 1 if success_wd else 0
+        if verbose:
+            status = "成功" if success_hl or success_wd else "跳过"
+            print(f"[{status}] {os.path.basename(doc_path)}: {msg}")
+    if verbose:
+        print(f"高亮文档 {highlight_count} 个，分析结果Word {word_count} 个")
+    return highlight_count
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量重新生成 policy_document_word 下的高亮文档和分析结果Word")
+    parser.add_argument('--policy-dir', default=POLICY_DIR, help="政策文档根目录")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="并行进程数（默认 CPU 核数）")
+    parser.add_argument('--quiet', '-q', action='store_true', help="不逐篇打印结果")
+    parser.add_argument('--rebuild-index', action='store_true',
+                        help="先扫描 analyze_result 重建源文档到分析结果的映射")
+    args = parser.parse_args()
+
+    if args.rebuild_index:
+        updated, added = rebuild_result_index(args.policy_dir)
+        print(f"结果映射已重建: 更新 {updated} 条，补记 {added} 条")
+    highlight_all_documents(args.policy_dir, jobs=args.jobs, verbose=not args.quiet)
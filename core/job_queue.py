@@ -0,0 +1,122 @@
+"""分析任务队列
+
+并行分析时所有 worker 共享一个队列，空闲的 worker 主动领取下一篇文档，
+整体耗时取决于最慢的单篇文档，而不是分到长文档最多的那一组。
+"""
+import heapq
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+
+@dataclass
+class QueueItem:
+    """队列中的一篇待分析文档"""
+    file_path: str
+    attempts: int = 0
+    # 因 session 失效而重新入队的次数（不计入 attempts）
+    session_swaps: int = 0
+
+
+@dataclass(order=True)
+class _Entry:
+    ready_at: float
+    seq: int
+    item: QueueItem = field(compare=False)
+
+
+class AnalysisJobQueue:
+    """支持失败重试（指数退避）和重新入队的共享任务队列"""
+
+    def __init__(self, file_paths: Iterable[str], max_retries: int = 2,
+                 backoff_base: float = 5.0, backoff_max: float = 60.0, max_session_swaps: int = 2):
+        self.max_retries = max_retries
+        self.max_session_swaps = max_session_swaps
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._cond = threading.Condition()
+        self._heap: List[_Entry] = []
+        self._seq = 0
+        self._unfinished = 0
+        self._cancelled = False
+
+        for file_path in file_paths:
+            self._push(QueueItem(file_path), 0.0)
+            self._unfinished += 1
+
+    def _push(self, item: QueueItem, delay: float):
+        self._seq += 1
+        heapq.heappush(self._heap, _Entry(time.monotonic() + delay, self._seq, item))
+
+    def get(self) -> Optional[QueueItem]:
+        """
+        领取下一篇文档
+
+        队列暂时为空但仍有文档在处理中（可能失败重试）时会阻塞等待；
+        全部完成或队列被取消时返回 None。
+        """
+        with self._cond:
+            while True:
+                if self._cancelled or self._unfinished == 0:
+                    return None
+                if self._heap:
+                    wait = self._heap[0].ready_at - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap).item
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def task_done(self, item: QueueItem):
+        """标记文档处理完毕（无论成功还是最终失败）"""
+        with self._cond:
+            self._unfinished -= 1
+            self._cond.notify_all()
+
+    def retry(self, item: QueueItem) -> bool:
+        """
+        文档分析失败后按指数退避重新入队
+
+        Returns:
+            是否已重新入队；超过最大重试次数时返回 False，调用方应按失败处理并调用 task_done
+        """
+        with self._cond:
+            item.attempts += 1
+            if item.attempts > self.max_retries:
+                return False
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (item.attempts - 1)))
+            # 加入随机抖动，避免多个 worker 同时重试
+            self._push(item, delay * random.uniform(0.5, 1.0))
+            self._cond.notify_all()
+            return True
+
+    def requeue(self, item: QueueItem) -> bool:
+        """
+        session 失效后立即重新入队，不计入重试次数
+
+        同一篇文档反复超时或反复导致 session 失效时，失效可能就是文档本身引起的，
+        因此换 session 的次数有上限，超过后返回 False，调用方应改用 retry()。
+
+        Returns:
+            是否已重新入队
+        """
+        with self._cond:
+            item.session_swaps += 1
+            if item.session_swaps > self.max_session_swaps:
+                return False
+            self._push(item, 0.0)
+            self._cond.notify_all()
+            return True
+
+    def cancel(self):
+        """取消队列，所有等待中的 worker 立即退出"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
@@ -0,0 +1,395 @@
+"""后台任务管理
+
+分析（以及爬取）任务提交后立即返回任务 ID，在后台线程中执行。
+每个任务有独立的进度对象，状态持久化到 SQLite，服务重启后仍可查询。
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.events import EVENT_FILE, EVENT_JOB, EVENT_PROGRESS, publish_event
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_INTERRUPTED = 'interrupted'
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# 已结束任务在内存中保留的时长（秒）和数量，超出后只能从数据库查询
+DEFAULT_JOB_RETENTION = 600
+DEFAULT_JOB_MAX_FINISHED = 20
+# 进度变化写入数据库的最小间隔（秒），状态变化总是立即写入
+DEFAULT_JOB_PERSIST_INTERVAL = 2.0
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class JobProgress:
+    """单个任务的进度（线程安全），每次变化都会通知任务管理器持久化并发布进度事件"""
+
+    def __init__(self, job_id: str = None, on_change: Callable[['JobProgress'], None] = None,
+                 kind: str = 'analysis'):
+        self.job_id = job_id
+        self.kind = kind
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._state = {
+            'running': False,
+            'total': 0,
+            'current': 0,
+            'success': 0,
+            'failed': 0,
+            'current_file': '',
+            'start_time': None
+        }
+
+    def _changed(self):
+        if self._on_change:
+            try:
+                self._on_change(self)
+            except Exception as e:
+                logger.error(f"保存任务进度失败: {self.job_id}, {e}")
+        publish_event(EVENT_PROGRESS, dict(self.snapshot(), jobId=self.job_id, kind=self.kind))
+
+    def file_event(self, phase: str, file_path: str, **data):
+        """
+        发布单篇文档事件
+
+        Args:
+            phase: start（开始分析）、finish（最终完成）、retry（失败后重新入队）、error（最终失败）、
+                rendered（高亮和 Word 文档生成完毕）
+            file_path: 文档相对路径
+            data: 附加字段，如 score、outcome、error、attempts
+        """
+        publish_event(EVENT_FILE, dict(data, jobId=self.job_id, kind=self.kind, phase=phase, file=file_path))
+
+    def start(self, total: int):
+        """开始新的分析任务"""
+        with self._lock:
+            self._state.update({
+                'running': True,
+                'total': total,
+                'current': 0,
+                'success': 0,
+                'failed': 0,
+                'current_file': '',
+                'start_time': datetime.now().isoformat()
+            })
+        self._changed()
+
+    def update(self, current: int = None, success: int = None, failed: int = None, current_file: str = None):
+        """更新分析进度"""
+        with self._lock:
+            if current is not None:
+                self._state['current'] = current
+            if success is not None:
+                self._state['success'] = success
+            if failed is not None:
+                self._state['failed'] = failed
+            if current_file is not None:
+                self._state['current_file'] = current_file
+        self._changed()
+
+    def stop(self, complete: bool = False):
+        """停止分析任务，complete 为 True 时把进度补齐到 100%"""
+        with self._lock:
+            if complete:
+                self._state['current'] = self._state['total']
+            self._state['running'] = False
+        self._changed()
+
+    def cancel(self):
+        """请求取消任务（正在分析的文档会分析完，不再领取新文档）"""
+        with self._lock:
+            self._cancel_event.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"取消回调失败: {self.job_id}, {e}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """
+        注册取消回调，请求取消时立即调用（已请求取消时注册即调用）
+
+        用于唤醒阻塞等待中的 worker，例如让任务队列的 get() 立即返回。
+        """
+        with self._lock:
+            if not self._cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def snapshot(self) -> dict:
+        """获取当前进度"""
+        with self._lock:
+            state = dict(self._state)
+        total = state['total']
+        state['progress_percent'] = round(state['current'] / total * 100, 1) if total > 0 else 0
+        return state
+
+
+class JobManager:
+    """后台任务管理器：同类任务按提交顺序串行执行，不同类任务互不阻塞"""
+
+    def __init__(self):
+        from backend.database import init_db, mark_unfinished_jobs_interrupted
+        init_db()
+        interrupted = mark_unfinished_jobs_interrupted()
+        if interrupted:
+            logger.warning(f"服务重启，{interrupted} 个未完成的后台任务已标记为中断")
+
+        self._lock = threading.Lock()
+        self._executors: Dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+        self._jobs: Dict[str, dict] = {}
+        self._progress: Dict[str, JobProgress] = {}
+        # 已结束任务的结束时间（time.monotonic），按结束顺序排列
+        self._finished: Dict[str, float] = {}
+        # 各任务进度最近一次写入数据库的时间（time.monotonic）
+        self._persisted_at: Dict[str, float] = {}
+
+        self.retention = float(os.getenv('JOB_RETENTION', DEFAULT_JOB_RETENTION))
+        self.max_finished = int(os.getenv('JOB_MAX_FINISHED', DEFAULT_JOB_MAX_FINISHED))
+        self.persist_interval = float(os.getenv('JOB_PERSIST_INTERVAL', DEFAULT_JOB_PERSIST_INTERVAL))
+
+    def _executor(self, kind: str) -> concurrent.futures.ThreadPoolExecutor:
+        if kind not in self._executors:
+            self._executors[kind] = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"job-{kind}"
+            )
+        return self._executors[kind]
+
+    def _save(self, job: dict):
+        from backend.database import save_job
+        save_job(job)
+
+    @staticmethod
+    def _publish_status(job: dict):
+        publish_event(EVENT_JOB, {
+            'jobId': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'message': job.get('message') or ''
+        })
+
+    def _sync_progress(self, progress: JobProgress):
+        """
+        进度变化时刷新任务记录
+
+        内存中的记录每次都更新；数据库只在计数变化时写入，且同一任务两次写入至少间隔
+        persist_interval 秒（只有 current_file 变化时不写入）。最终进度由 _finish 写入。
+        """
+        with self._lock:
+            job = self._jobs.get(progress.job_id)
+            if not job:
+                return
+            state = progress.snapshot()
+            counts_changed = any(job[key] != state[key] for key in ('total', 'current', 'success', 'failed'))
+            job.update({
+                'total': state['total'],
+                'current': state['current'],
+                'success': state['success'],
+                'failed': state['failed'],
+                'current_file': state['current_file']
+            })
+            now = time.monotonic()
+            if not counts_changed or now - self._persisted_at.get(job['id'], float('-inf')) < self.persist_interval:
+                return
+            self._persisted_at[job['id']] = now
+            record = dict(job)
+        self._save(record)
+
+    def _evict(self):
+        """从内存中移除超过保留时长或数量上限的已结束任务（调用方持有 _lock）"""
+        now = time.monotonic()
+        excess = len(self._finished) - self.max_finished
+        for job_id, finished_at in list(self._finished.items()):
+            if excess <= 0 and now - finished_at < self.retention:
+                break
+            excess -= 1
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+            self._progress.pop(job_id, None)
+            self._persisted_at.pop(job_id, None)
+
+    def submit(self, kind: str, target: Callable[[JobProgress], str], params: dict = None,
+               dedupe: bool = True) -> Tuple[dict, bool]:
+        """
+        提交后台任务
+
+        Args:
+            kind: 任务类型（如 analysis、crawl）
+            target: 任务函数，接收 JobProgress，返回结果说明文本
+            params: 任务参数（仅用于记录和去重）
+            dedupe: 为 True 时，相同类型和参数的任务已在排队或执行中则直接返回该任务
+
+        Returns:
+            (任务记录, 是否为新提交的任务)
+        """
+        params_json = json.dumps(params or {}, ensure_ascii=False, sort_keys=True)
+        with self._lock:
+            if dedupe:
+                for job in self._jobs.values():
+                    if job['kind'] == kind and job['params'] == params_json and job['status'] in ACTIVE_STATUSES:
+                        return dict(job), False
+
+            self._evict()
+            job_id = uuid.uuid4().hex
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'status': JOB_QUEUED,
+                'params': params_json,
+                'total': 0,
+                'current': 0,
+                'success': 0,
+                'failed': 0,
+                'current_file': '',
+                'message': '',
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None
+            }
+            progress = JobProgress(job_id, on_change=self._sync_progress, kind=kind)
+            self._jobs[job_id] = job
+            self._progress[job_id] = progress
+            record = dict(job)
+
+        self._save(record)
+        self._publish_status(record)
+        self._executor(kind).submit(self._run, job_id, target)
+        logger.info(f"提交后台任务: {kind} {job_id}")
+        return record, True
+
+    def _finish(self, job_id: str, status: str, message: str = ''):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update({'status': status, 'message': message, 'finished_at': datetime.now().isoformat()})
+            record = dict(job)
+            self._finished[job_id] = time.monotonic()
+            self._evict()
+        self._save(record)
+        self._publish_status(record)
+
+    def _run(self, job_id: str, target: Callable[[JobProgress], str]):
+        progress = self._progress[job_id]
+        if progress.cancel_requested:
+            self._finish(job_id, JOB_CANCELLED, '任务在开始前被取消')
+            return
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update({'status': JOB_RUNNING, 'started_at': datetime.now().isoformat()})
+            record = dict(job)
+        self._save(record)
+        self._publish_status(record)
+
+        try:
+            message = target(progress)
+            if progress.cancel_requested:
+                self._finish(job_id, JOB_CANCELLED, message or '任务已取消')
+            else:
+                self._finish(job_id, JOB_SUCCEEDED, message or '')
+        except JobCancelled:
+            self._finish(job_id, JOB_CANCELLED, '任务已取消')
+        except Exception as e:
+            logger.error(f"后台任务执行失败: {job_id}, {e}")
+            self._finish(job_id, JOB_FAILED, str(e))
+        finally:
+            if progress.snapshot()['running']:
+                progress.stop()
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务，任务不存在或已结束时返回 False"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['status'] not in ACTIVE_STATUSES:
+                return False
+            progress = self._progress[job_id]
+        progress.cancel()
+        logger.info(f"请求取消后台任务: {job_id}")
+        return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """获取任务状态（内存中没有时从数据库读取，例如重启前的任务）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return self._to_dict(dict(job), self._progress[job_id])
+        from backend.database import get_job
+        job = get_job(job_id)
+        return self._to_dict(job) if job else None
+
+    def list(self, kind: str = None, limit: int = 20) -> List[dict]:
+        """列出最近的任务"""
+        from backend.database import list_jobs
+        jobs = []
+        for job in list_jobs(kind, limit):
+            jobs.append(self.get(job['id']) or self._to_dict(job))
+        return jobs
+
+    def latest(self, kind: str) -> Optional[dict]:
+        """获取某类任务中最近提交的一个"""
+        jobs = self.list(kind, limit=1)
+        return jobs[0] if jobs else None
+
+    @staticmethod
+    def _to_dict(job: dict, progress: JobProgress = None) -> dict:
+        total = job.get('total') or 0
+        current = job.get('current') or 0
+        result = {
+            'id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'params': json.loads(job['params']) if job.get('params') else {},
+            'running': job['status'] == JOB_RUNNING,
+            'total': total,
+            'current': current,
+            'success': job.get('success') or 0,
+            'failed': job.get('failed') or 0,
+            'current_file': job.get('current_file') or '',
+            'progress_percent': round(current / total * 100, 1) if total > 0 else 0,
+            'message': job.get('message') or '',
+            'created_at': job.get('created_at'),
+            'started_at': job.get('started_at'),
+            'finished_at': job.get('finished_at')
+        }
+        if progress:
+            state = progress.snapshot()
+            result['start_time'] = state['start_time']
+            result['cancel_requested'] = progress.cancel_requested
+        return result
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """获取进程内唯一的任务管理器"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -2,22 +2,303 @@
 import requests
 import json
 import logging
+import os
+import random
+import queue
 import threading
-from typing import Optional, Callable
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 logger = logging.getLogger(__name__)
 
+# 流式回复时事件流的最长静默时间（秒），超过视为超时
+STREAM_IDLE_TIMEOUT = float(os.getenv('OPENCODE_STREAM_IDLE_TIMEOUT', 300))
+
+# 建立连接超时、普通接口（创建/验证 session 等）读取超时（秒）
+CONNECT_TIMEOUT = float(os.getenv('OPENCODE_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('OPENCODE_READ_TIMEOUT', 30))
+# 发送消息等待 AI 回复的读取超时（秒），0 表示不限制
+MESSAGE_TIMEOUT = float(os.getenv('OPENCODE_MESSAGE_TIMEOUT', 0)) or None
+
+# 连接失败（请求未发出）时的重试次数和退避基数（秒）
+CONNECT_RETRIES = int(os.getenv('OPENCODE_CONNECT_RETRIES', 2))
+CONNECT_BACKOFF = float(os.getenv('OPENCODE_CONNECT_BACKOFF', 0.5))
+
+
+def _connect_failed(exc: requests.exceptions.RequestException) -> bool:
+    """判断是否为建立连接阶段的失败（请求尚未到达服务器，重试不会重复提交）"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError) and exc.args:
+        return isinstance(getattr(exc.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+def parse_message_response(status_code: int, resp_text: str) -> str:
+    """解析 /session/{id}/message 的响应，返回回复文本（失败时为「分析失败: ...」）"""
+    if status_code != 200:
+        logger.error(f"请求错误: 响应状态码异常: {status_code}")
+        return f"分析失败: 响应状态码异常: {status_code}"
+
+    logger.info(f"响应内容 (前200字符): {resp_text[:200]}")
+
+    if not resp_text or resp_text.strip() == '':
+        return "分析未返回结果"
+
+    try:
+        resp_data = json.loads(resp_text)
+
+        # 检查是否有错误信息
+        error_info = resp_data.get("info", {}).get("error", {})
+        if error_info:
+            error_name = error_info.get("name", "UnknownError")
+            error_msg = error_info.get("message", str(error_info))
+            logger.error(f"OpenCode API 错误: {error_name} - {error_msg}")
+            return f"分析失败: {error_name}"
+
+        response_parts = resp_data.get("parts", [])
+        full_response = "".join([
+            part.get("text", "")
+            for part in response_parts
+            if part.get("type") == "text"
+        ])
+        response = full_response if full_response else "分析未返回结果"
+    except json.JSONDecodeError as e:
+        logger.warning(f"JSON 解析失败: {e}, 响应内容: {resp_text[:100]}")
+        response = resp_text if resp_text else "分析未返回结果"
+
+    logger.info(f"请求完成，响应长度: {len(response)}")
+    return response
+
+
+def _event_session_id(event: dict) -> Optional[str]:
+    """事件所属的 session（message.updated 在 info 中，message.part.updated 在 part 中）"""
+    props = event.get('properties', {}) or {}
+    for holder in (props.get('info'), props.get('part'), props):
+        if isinstance(holder, dict) and holder.get('sessionID'):
+            return holder['sessionID']
+    return None
+
+
+class _ReplyAssembler:
+    """
+    拼接一个 session 的助手回复
+
+    message.updated 标记消息角色，message.part.updated 携带文本增量（delta）或当前全文，
+    session.idle 表示回复结束，session.error 表示出错。
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.finished = False
+        self.error: Optional[str] = None
+        self.roles = {}      # messageID -> role
+        self.pending = {}    # 角色未知消息的文本片段 messageID -> [(part_id, text)]
+        self.texts = {}      # part_id -> 已收到的全文
+        self.order = []      # 助手文本片段出现顺序
+        self.seen = {}       # part_id -> 已处理的全文长度（无 delta 时按全文求增量）
+
+    def _emit(self, part_id: str, text: str) -> str:
+        if part_id not in self.texts:
+            self.texts[part_id] = ''
+            self.order.append(part_id)
+        self.texts[part_id] += text
+        return text
+
+    def feed(self, event: dict) -> List[str]:
+        """处理一个事件，返回新增的助手文本片段"""
+        chunks = []
+        event_type = event.get('type', '')
+        props = event.get('properties', {}) or {}
+
+        if event_type == 'message.updated':
+            info = props.get('info', {}) or {}
+            if info.get('sessionID') != self.session_id:
+                return chunks
+            self.roles[info.get('id')] = info.get('role')
+            for part_id, text in self.pending.pop(info.get('id'), []):
+                if info.get('role') == 'assistant':
+                    chunks.append(self._emit(part_id, text))
+
+        elif event_type == 'message.part.updated':
+            part = props.get('part', {}) or {}
+            if part.get('sessionID') != self.session_id or part.get('type') != 'text':
+                return chunks
+            part_id = part.get('id')
+            delta = props.get('delta')
+            if delta is None:
+                full = part.get('text', '')
+                delta = full[self.seen.get(part_id, 0):]
+                self.seen[part_id] = len(full)
+            else:
+                self.seen[part_id] = self.seen.get(part_id, 0) + len(delta)
+            if delta:
+                message_id = part.get('messageID')
+                role = self.roles.get(message_id)
+                if role == 'assistant':
+                    chunks.append(self._emit(part_id, delta))
+                elif role is None:
+                    self.pending.setdefault(message_id, []).append((part_id, delta))
+
+        elif event_type == 'session.error':
+            if props.get('sessionID') not in (None, self.session_id):
+                return chunks
+            error = props.get('error', {}) or {}
+            error_name = error.get('name', 'UnknownError')
+            logger.error(f"OpenCode API 错误: {error_name} - {error.get('data', {})}")
+            self.error = f"分析失败: {error_name}"
+            self.finished = True
+
+        elif event_type == 'session.idle' and props.get('sessionID') == self.session_id:
+            self.finished = True
+
+        return chunks
+
+    def result(self) -> str:
+        if self.error:
+            return self.error
+        full_response = "".join(self.texts[part_id] for part_id in self.order)
+        logger.info(f"流式请求完成，响应长度: {len(full_response)}")
+        return full_response if full_response else "分析未返回结果"
+
+
+class OpenCodeEventStream:
+    """
+    共享的 OpenCode 事件流（/event）
+
+    所有流式请求共用一个订阅，由一个读取线程按 sessionID 分发给各 session 的订阅者；
+    没有 sessionID 的事件（如全局错误）分发给全部订阅者。事件流断开时通知所有订阅者（放入 None），
+    读取线程退出，下次订阅时重新连接。
+    """
+
+    def __init__(self, client: 'OpenCodeClient'):
+        self.client = client
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._ready: Optional[threading.Event] = None
+        self._connected = False
+
+    def subscribe(self, session_id: str) -> Optional[queue.Queue]:
+        """订阅一个 session 的事件，事件流不可用时返回 None"""
+        events = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(session_id, []).append(events)
+            if self._thread is None:
+                self._ready = threading.Event()
+                self._connected = False
+                self._thread = threading.Thread(target=self._run, args=(self._ready,),
+                                                name="opencode-events", daemon=True)
+                self._thread.start()
+            ready = self._ready
+        if not ready.wait(CONNECT_TIMEOUT * (CONNECT_RETRIES + 1) + READ_TIMEOUT) or not self._connected:
+            self.unsubscribe(session_id, events)
+            return None
+        return events
+
+    def unsubscribe(self, session_id: str, events: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(session_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(session_id, None)
+
+    def _connect(self) -> Optional[requests.Response]:
+        try:
+            response = self.client._request('GET', '/event', read_timeout=STREAM_IDLE_TIMEOUT, stream=True)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"订阅 OpenCode 事件流失败，改用同步请求: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"OpenCode 事件流不可用 ({response.status_code})，改用同步请求")
+            response.close()
+            return None
+        return response
+
+    def _dispatch(self, event: dict):
+        session_id = _event_session_id(event)
+        with self._lock:
+            if session_id is None:
+                targets = [q for subscribers in self._subscribers.values() for q in subscribers]
+            else:
+                targets = list(self._subscribers.get(session_id, []))
+        for events in targets:
+            events.put(event)
+
+    def _run(self, ready: threading.Event):
+        response = self._connect()
+        self._connected = response is not None
+        ready.set()
+        if response is not None:
+            try:
+                with response:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith('data:'):
+                            continue
+                        try:
+                            event = json.loads(line[5:].strip())
+                        except json.JSONDecodeError:
+                            continue
+                        self._dispatch(event)
+            except requests.exceptions.RequestException as e:
+                with self._lock:
+                    active = bool(self._subscribers)
+                if active:
+                    logger.error(f"读取 OpenCode 事件流失败: {e}")
+        with self._lock:
+            self._thread = None
+            targets = [q for subscribers in self._subscribers.values() for q in subscribers]
+        for events in targets:
+            events.put(None)
+
 
 class OpenCodeClient:
-    """OpenCode API 客户端"""
+    """OpenCode API 客户端（共享连接池，keep-alive 复用 TCP 连接）"""
 
-    def __init__(self, server_url: str):
+    def __init__(self, server_url: str, pool_size: int = None):
         self.server_url = server_url
+        # 每个分析 worker 同时最多占用一个消息请求和一个验证请求，另留出流式事件连接
+        if pool_size is None:
+            pool_size = int(os.getenv('OPENCODE_POOL_SIZE', 0)) or \
+                int(os.getenv('ANALYSIS_MAX_WORKERS', 5)) * 2 + 4
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        self.events = OpenCodeEventStream(self)
+
+    def _request(self, method: str, path: str, read_timeout: Optional[float] = READ_TIMEOUT,
+                 **kwargs) -> requests.Response:
+        """
+        通过连接池发送请求
+
+        连接失败时按带抖动的指数退避重试；请求已发出后的错误（读取超时、连接中断）直接抛出，
+        避免重复提交消息。
+        """
+        url = f"{self.server_url}{path}"
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, read_timeout))
+        for attempt in range(CONNECT_RETRIES + 1):
+            try:
+                return self.http.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if attempt >= CONNECT_RETRIES or not _connect_failed(e):
+                    raise
+                delay = CONNECT_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"连接 OpenCode 失败，{delay:.1f} 秒后第 {attempt + 1} 次重试: {method} {path}")
+                time.sleep(delay)
+
+    def close(self):
+        """关闭连接池"""
+        self.http.close()
 
     def create_session(self) -> Optional[str]:
         """创建新的会话"""
         try:
-            resp = requests.post(f"{self.server_url}/session", json={}, timeout=30)
+            resp = self._request('POST', '/session', json={})
             if resp.status_code == 200:
                 session_id = resp.json().get('id')
                 if session_id:
@@ -28,133 +309,165 @@ class OpenCodeClient:
             logger.error(f"创建 OpenCode session 失败: {e}")
             return None
 
+    def fork_session(self, session_id: str) -> Optional[str]:
+        """
+        从已有会话复制出新会话（保留原会话的全部上下文）
+
+        Returns:
+            新会话 ID；OpenCode 版本不支持或失败时返回 None
+        """
+        try:
+            resp = self._request('POST', f'/session/{session_id}/fork', json={})
+            if resp.status_code == 200:
+                new_id = resp.json().get('id')
+                if new_id:
+                    logger.info(f"复制 OpenCode session: {session_id} -> {new_id}")
+                    return new_id
+            logger.warning(f"复制 OpenCode session 失败，状态码: {resp.status_code}")
+            return None
+        except Exception as e:
+            logger.error(f"复制 OpenCode session 失败: {e}")
+            return None
+
     def delete_session(self, session_id: str) -> bool:
         """删除会话"""
         try:
-            requests.delete(f"{self.server_url}/session/{session_id}", timeout=10)
+            self._request('DELETE', f'/session/{session_id}')
             return True
         except Exception:
             return False
 
+    def _build_payload(self, message: str) -> dict:
+        return {
+            "agent": "general",
+            "parts": [{"type": "text", "text": message}],
+        }
+
     def send_message(self, session_id: str, message: str, on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
-        """发送消息并获取回复，使用后台线程避免阻塞"""
-        result = {"response": None, "error": None, "completed": False}
+        """
+        发送消息并获取回复
 
-        def do_request():
-            try:
-                # 不再单独验证 session，因为 Flask 的 get_session_id 已经验证过
-                # 直接发送消息，如果 session 无效，OpenCode 会返回错误
+        传入 on_chunk 时走流式接口，每收到一段新文本就回调一次；
+        返回值始终是完整回复（失败时为「分析失败: ...」）。
+        """
+        if on_chunk is not None:
+            return self.stream_message(session_id, message, on_chunk)
 
-                payload = {
-                    "agent": "general",
-                    "parts": [{"type": "text", "text": message}],
-                }
+        # 不再单独验证 session，因为 Flask 的 get_session_id 已经验证过
+        # 直接发送消息，如果 session 无效，OpenCode 会返回错误
+        try:
+            url = f"{self.server_url}/session/{session_id}/message"
+            logger.info(f"发送请求到: {url}")
+            logger.info(f"消息内容 (前100字符): {message[:100]}")
 
-                url = f"{self.server_url}/session/{session_id}/message"
-                logger.info(f"发送请求到: {url}")
-                logger.info(f"消息内容 (前100字符): {message[:100]}")
+            # 等待 AI 回复，读取超时由 OPENCODE_MESSAGE_TIMEOUT 控制（默认不限制）
+            resp = self._request('POST', f'/session/{session_id}/message',
+                                 read_timeout=MESSAGE_TIMEOUT, json=self._build_payload(message))
+            logger.info(f"收到响应，状态码: {resp.status_code}")
 
-                # 发送请求，不设置超时或使用较长的超时
-                resp = requests.post(url, json=payload, timeout=None)
-                logger.info(f"收到响应，状态码: {resp.status_code}")
+            return parse_message_response(resp.status_code, resp.text)
 
-                if resp.status_code != 200:
-                    result["error"] = f"响应状态码异常: {resp.status_code}"
-                    result["completed"] = True
-                    return
+        except requests.exceptions.Timeout as e:
+            logger.error(f"OpenCode 请求超时: {e}")
+            return "分析失败: 请求超时"
+        except requests.exceptions.ConnectionError as e:
+            logger.error(f"连接 OpenCode 失败: {e}")
+            return "分析失败: 连接失败"
+        except Exception as e:
+            logger.error(f"发送消息失败: {type(e).__name__}: {e}")
+            import traceback
+            logger.error(f"详细错误: {traceback.format_exc()}")
+            return f"分析失败: {e}"
 
-                resp_text = resp.text
-                logger.info(f"响应内容 (前200字符): {resp_text[:200]}")
+    def stream_message(self, session_id: str, message: str, on_chunk: Callable[[str], None]) -> Optional[str]:
+        """流式发送消息，逐段回调助手回复的增量文本，返回完整回复"""
+        result = None
+        for kind, text in self.iter_message(session_id, message):
+            if kind == 'chunk':
+                on_chunk(text)
+            elif kind == 'done':
+                result = text
+        return result
 
-                if not resp_text or resp_text.strip() == '':
-                    result["response"] = "分析未返回结果"
-                    result["completed"] = True
-                    return
+    def iter_message(self, session_id: str, message: str,
+                     heartbeat: Optional[float] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        流式发送消息的生成器，在调用方线程中逐个产出：
+        ('chunk', 增量文本)、('heartbeat', None)（heartbeat 秒内没有新事件时）、
+        最后是 ('done', 完整回复，失败时为「分析失败: ...」)
 
-                try:
-                    resp_data = resp.json()
-
-                    # 检查是否有错误信息
-                    error_info = resp_data.get("info", {}).get("error", {})
-                    if error_info:
-                        error_name = error_info.get("name", "UnknownError")
-                        error_msg = error_info.get("message", str(error_info))
-                        logger.error(f"OpenCode API 错误: {error_name} - {error_msg}")
-                        result["response"] = f"分析失败: {error_name}"
-                        result["completed"] = True
-                        return
-
-                    response_parts = resp_data.get("parts", [])
-                    full_response = "".join([
-                        part.get("text", "")
-                        for part in response_parts
-                        if part.get("type") == "text"
-                    ])
-                    result["response"] = full_response if full_response else "分析未返回结果"
-                except json.JSONDecodeError as e:
-                    logger.warning(f"JSON 解析失败: {e}, 响应内容: {resp_text[:100]}")
-                    result["response"] = resp_text if resp_text else "分析未返回结果"
-
-                result["completed"] = True
-                logger.info(f"请求完成，响应长度: {len(result.get('response', ''))}")
-
-            except requests.exceptions.Timeout as e:
-                logger.error(f"OpenCode 请求超时: {e}")
-                result["error"] = "请求超时"
-                result["completed"] = True
-            except requests.exceptions.ConnectionError as e:
-                logger.error(f"连接 OpenCode 失败: {e}")
-                result["error"] = "连接失败"
-                result["completed"] = True
-            except Exception as e:
-                logger.error(f"发送消息失败: {type(e).__name__}: {e}")
-                import traceback
-                logger.error(f"详细错误: {traceback.format_exc()}")
-                result["error"] = str(e)
-                result["completed"] = True
+        先在共享事件流上订阅本 session，再通过 prompt_async 提交消息，直到 session 空闲。
+        OpenCode 版本不支持事件流或 prompt_async 时退回同步请求，整段产出一次。
+        """
+        events = self.events.subscribe(session_id)
+        if events is None:
+            yield from self._send_whole(session_id, message)
+            return
 
-        # 在后台线程中执行请求
-        thread = threading.Thread(target=do_request, daemon=True)
-        thread.start()
-
-        # 不设置超时限制，等待请求完成
-        thread.join()
-
-        if not result["completed"]:
-            logger.warning("请求未完成")
-            return "分析未完成，请稍后重试"
+        try:
+            try:
+                resp = self._request('POST', f'/session/{session_id}/prompt_async',
+                                     json=self._build_payload(message))
+            except requests.exceptions.RequestException as e:
+                logger.error(f"提交流式消息失败: {e}")
+                yield 'done', "分析失败: 连接失败"
+                return
+            if resp.status_code == 404:
+                logger.warning("OpenCode 不支持 prompt_async，改用同步请求")
+                yield from self._send_whole(session_id, message)
+                return
+            if resp.status_code not in (200, 204):
+                logger.error(f"提交流式消息失败，状态码: {resp.status_code}")
+                yield 'done', f"分析失败: 响应状态码异常: {resp.status_code}"
+                return
 
-        if result["error"]:
-            logger.error(f"请求错误: {result['error']}")
-            return f"分析失败: {result['error']}"
+            reply = _ReplyAssembler(session_id)
+            deadline = time.monotonic() + STREAM_IDLE_TIMEOUT
+            while True:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    logger.error("读取 OpenCode 事件流超时")
+                    yield 'done', "分析失败: 请求超时"
+                    return
+                try:
+                    event = events.get(timeout=min(wait, heartbeat) if heartbeat else wait)
+                except queue.Empty:
+                    if heartbeat:
+                        yield 'heartbeat', None
+                    continue
+                if event is None:
+                    # 共享事件流断开，期间的事件已丢失
+                    yield 'done', "分析失败: 连接失败"
+                    return
+                deadline = time.monotonic() + STREAM_IDLE_TIMEOUT
+                for text in reply.feed(event):
+                    yield 'chunk', text
+                if reply.finished:
+                    yield 'done', reply.result()
+                    return
+        finally:
+            self.events.unsubscribe(session_id, events)
 
-        return result["response"] if result["response"] else "分析未返回结果"
+    def _send_whole(self, session_id: str, message: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """同步请求，拿到完整回复后整段产出"""
+        response = self.send_message(session_id, message)
+        if response and not response.startswith("分析失败"):
+            yield 'chunk', response
+        yield 'done', response
 
     def send_message_async(self, session_id: str, message: str):
         """异步发送消息，不等待结果（在新线程中执行）"""
         def do_request():
             try:
-                payload = {
-                    "agent": "general",
-                    "parts": [
-                        {
-                            "type": "text",
-                            "text": message,
-                        }
-                    ],
-                }
-                requests.post(
-                    f"{self.server_url}/session/{session_id}/message",
-                    json=payload,
-                    timeout=None
-                )
+                self._request('POST', f'/session/{session_id}/message',
+                              read_timeout=MESSAGE_TIMEOUT, json=self._build_payload(message))
             except Exception as e:
                 logger.error(f"异步发送消息失败: {e}")
 
     def get_existing_session(self) -> Optional[str]:
         """获取现有会话"""
         try:
-            resp = requests.get(f"{self.server_url}/session", timeout=10)
+            resp = self._request('GET', '/session')
             sessions = resp.json()
             if sessions:
                 return sessions[0]["id"]
@@ -165,7 +478,7 @@ class OpenCodeClient:
     def validate_session(self, session_id: str) -> bool:
         """验证会话是否有效"""
         try:
-            resp = requests.get(f"{self.server_url}/session/{session_id}", timeout=30)
+            resp = self._request('GET', f'/session/{session_id}')
             # 只有 200 响应才表示 session 存在
             return resp.status_code == 200
         except Exception:
@@ -0,0 +1,85 @@
+"""分析结果后处理流水线
+
+分析 worker 保存结果后只把文档放入队列，高亮文档和分析结果 Word 的生成
+由独立的后处理线程完成，LLM 请求与 python-docx 渲染互相重叠，互不等待。
+"""
+import os
+import queue
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class PostProcessPipeline:
+    """后处理流水线：一个任务队列 + 固定数量的后处理线程"""
+
+    def __init__(self, handler: Callable[[str, str, str], Optional[bool]], workers: int = None,
+                 on_done: Optional[Callable[[str, bool], None]] = None):
+        """
+        Args:
+            handler: 后处理函数 handler(policy_dir, file_path, tag)，返回 False 或抛出异常视为失败
+            workers: 后处理线程数，默认读取 ANALYSIS_POSTPROCESS_WORKERS（默认 2）
+            on_done: 每篇文档处理完后的回调 on_done(file_path, 是否成功)
+        """
+        self.handler = handler
+        self.on_done = on_done
+        self.workers = workers or int(os.getenv('ANALYSIS_POSTPROCESS_WORKERS', 2))
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.done_count = 0
+        self.failed_count = 0
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._worker, name=f"postprocess-{i + 1}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            policy_dir, file_path, tag = task
+            try:
+                ok = self.handler(policy_dir, file_path, tag) is not False
+            except Exception as e:
+                ok = False
+                logger.error(f"[{tag}] 后处理失败: {file_path}, {e}")
+            with self._lock:
+                if ok:
+                    self.done_count += 1
+                else:
+                    self.failed_count += 1
+            if self.on_done:
+                try:
+                    self.on_done(file_path, ok)
+                except Exception as e:
+                    logger.error(f"后处理回调失败: {file_path}, {e}")
+
+    def submit(self, policy_dir: str, file_path: str, tag: str = ''):
+        """提交一篇已保存分析结果的文档（立即返回）"""
+        self._queue.put((policy_dir, file_path, tag))
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未开始处理的文档数"""
+        return self._queue.qsize()
+
+    def close(self):
+        """不再接收新文档，等待队列中的文档全部处理完"""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        logger.info(f"后处理完成: 成功 {self.done_count}, 失败 {self.failed_count}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,138 @@
+"""OpenCode 分析结果缓存
+
+按「规范化后的文档内容哈希 + skill 版本」缓存 AI 返回的原始分析文本。
+同一篇政策被爬取到不同关键词文件夹时，只需调用一次 LLM。
+"""
+import os
+import re
+import hashlib
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 爬虫写入的检索元数据，同一篇文档在不同批次中会不同，不参与内容哈希
+VOLATILE_LINE_PATTERN = re.compile(r'^\*\*(检索时间|检索关键词)\*\*[：:]')
+WHITESPACE_PATTERN = re.compile(r'[ \t　]+')
+
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def compute_skill_version(prompt_template: str) -> str:
+    """
+    计算当前 skill 版本标识
+
+    由 POLICY_SKILL_VERSION 环境变量、分析 prompt 模板以及（若配置了 POLICY_SKILL_PATH）
+    skill 文件内容共同决定，任一变化都会使旧缓存失效。
+    """
+    digest = hashlib.sha256(prompt_template.encode('utf-8'))
+    skill_path = os.getenv('POLICY_SKILL_PATH', '')
+    if skill_path and os.path.isfile(skill_path):
+        with open(skill_path, 'rb') as f:
+            digest.update(f.read())
+    return f"{os.getenv('POLICY_SKILL_VERSION', '1')}-{digest.hexdigest()[:12]}"
+
+
+def normalize_content(text: str) -> str:
+    """规范化文档内容：去掉检索元数据行、统一换行和空白"""
+    lines = []
+    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        line = WHITESPACE_PATTERN.sub(' ', line).strip()
+        if not line or VOLATILE_LINE_PATTERN.match(line):
+            continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+class AnalysisCache:
+    """分析结果缓存（存储在 SQLite 中，按最近使用时间淘汰）"""
+
+    def __init__(self, skill_version: str, max_entries: int = None):
+        self.skill_version = skill_version
+        self.max_entries = max_entries or int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+
+        from backend.database import init_db
+        init_db()
+        removed = self.invalidate(keep_current=True)
+        if removed:
+            logger.info(f"skill 版本变化，清理旧分析缓存 {removed} 条")
+
+    def content_hash(self, doc_path: str) -> str:
+        """计算文档规范化内容的哈希"""
+        with open(doc_path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        return self.hash_text(content)
+
+    @staticmethod
+    def hash_text(content: str) -> str:
+        """计算已读入的文档内容规范化后的哈希"""
+        return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """读取缓存的分析文本，未命中返回 None"""
+        from backend.database import get_connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT analysis_text FROM analysis_cache WHERE content_hash = ? AND skill_version = ?',
+            (content_hash, self.skill_version)
+        )
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(
+                'UPDATE analysis_cache SET last_used_at = ? WHERE content_hash = ? AND skill_version = ?',
+                (datetime.now().isoformat(), content_hash, self.skill_version)
+            )
+            conn.commit()
+        conn.close()
+        return row['analysis_text'] if row else None
+
+    def put(self, content_hash: str, analysis_text: str, source_path: str = None):
+        """写入分析文本，超出容量时淘汰最久未使用的条目"""
+        from backend.database import get_connection
+        now = datetime.now().isoformat()
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO analysis_cache
+            (content_hash, skill_version, analysis_text, source_path, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(content_hash, skill_version) DO UPDATE SET
+                analysis_text = excluded.analysis_text,
+                source_path = excluded.source_path,
+                last_used_at = excluded.last_used_at
+        ''', (content_hash, self.skill_version, analysis_text, source_path, now, now))
+        cursor.execute('''
+            DELETE FROM analysis_cache WHERE rowid IN (
+                SELECT rowid FROM analysis_cache
+                ORDER BY last_used_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+        if cursor.rowcount > 0:
+            logger.info(f"分析缓存超出容量，淘汰 {cursor.rowcount} 条")
+        conn.commit()
+        conn.close()
+
+    def invalidate(self, keep_current: bool = False) -> int:
+        """
+        清理缓存
+
+        Args:
+            keep_current: 为 True 时只清理非当前 skill 版本的条目，否则清空全部
+
+        Returns:
+            删除的条目数
+        """
+        from backend.database import get_connection
+        conn = get_connection()
+        cursor = conn.cursor()
+        if keep_current:
+            cursor.execute('DELETE FROM analysis_cache WHERE skill_version != ?', (self.skill_version,))
+        else:
+            cursor.execute('DELETE FROM analysis_cache')
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return removed
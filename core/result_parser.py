@@ -0,0 +1,186 @@
+"""分析结果解析
+
+分析结果 Markdown 的格式固定（见 ANALYSIS_PROMPT），高亮、Word 导出、数据库导入
+都需要其中的元数据、概要、总分和相关段落。这里逐行扫描一遍即可得到全部字段，
+按文件路径和 mtime 缓存解析结果，同一文件在一次批量处理中只读取、解析一次。
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+TITLE_PATTERN = re.compile(r'^#{1,2} 文档\s*[：:]\s*(.+)$')
+SECTION_PATTERN = re.compile(r'^###\s*(.+?)\s*$')
+# 元数据行：- **发布机构**：xxx（也兼容不加粗的写法）
+META_PATTERN = re.compile(r'^[-*]\s*(?:\*\*)?([^*：:]+?)(?:\*\*)?\s*[：:]\s*(.*)$')
+TOTAL_SCORE_PATTERN = re.compile(r'^> \*\*总分\*\*[：:]\s*([\d.]+)')
+PARAGRAPH_SCORE_PATTERN = re.compile(r'评分[：:]\s*(\d+)\s*/\s*100')
+FIELD_PATTERN = re.compile(r'^\s*([^：:]+?)\s*[：:]\s*(.*?)\s*$')
+URL_PATTERN = re.compile(r'https?://[^\s)\]>]+')
+
+SECTION_SUMMARY = '全文概要'
+
+# 解析结果缓存的文件数上限
+CACHE_SIZE = 512
+
+
+@dataclass
+class ResultParagraph:
+    """分析结果中的一个相关段落"""
+    text: str
+    score: int
+    business: Optional[str] = None
+    keywords: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            'text': self.text,
+            'score': self.score,
+            'keywords': self.keywords,
+            'business': self.business
+        }
+
+
+@dataclass
+class AnalysisResult:
+    """一份分析结果的结构化内容"""
+    content: str
+    title: str = ''
+    metadata: Dict[str, str] = field(default_factory=dict)
+    summary: str = ''
+    # 总分及其原始文本（生成的文件名沿用原始文本）
+    total_score: Optional[float] = None
+    total_score_text: Optional[str] = None
+    paragraphs: List[ResultParagraph] = field(default_factory=list)
+
+    @property
+    def source_url(self) -> str:
+        match = URL_PATTERN.search(self.metadata.get('原文链接', ''))
+        return match.group(0) if match else ''
+
+    @property
+    def publish_org(self) -> str:
+        return self.metadata.get('发布机构', '')
+
+    @property
+    def publish_date(self) -> str:
+        return self.metadata.get('发布日期', '')
+
+
+def _parse_fields(line: str) -> Dict[str, str]:
+    """解析 "评分：90/100 | 语义关联：xx | 关键词：a、b" 形式的段落评分行"""
+    fields = {}
+    for part in line.split('|'):
+        match = FIELD_PATTERN.match(part)
+        if match:
+            fields[match.group(1)] = match.group(2)
+    return fields
+
+
+def parse_result_text(content: str) -> AnalysisResult:
+    """逐行解析分析结果文本"""
+    result = AnalysisResult(content=content)
+    section = None
+    summary_lines = []
+    summary_open = False
+    current_text = None
+
+    for raw_line in content.split('\n'):
+        line = raw_line.strip()
+
+        if line.startswith('#'):
+            match = SECTION_PATTERN.match(line)
+            if match:
+                section = match.group(1)
+                summary_open = section == SECTION_SUMMARY
+                current_text = None
+                continue
+            match = TITLE_PATTERN.match(line)
+            if match and not result.title:
+                result.title = match.group(1).strip()
+                continue
+
+        if line.startswith('> '):
+            match = TOTAL_SCORE_PATTERN.match(line)
+            if match:
+                result.total_score_text = match.group(1)
+                result.total_score = float(match.group(1))
+                summary_open = False
+                current_text = None
+                continue
+            if line.startswith('> -'):
+                # 评分和关键词行，紧跟在段落内容行之后
+                score_match = PARAGRAPH_SCORE_PATTERN.search(line)
+                if current_text and score_match:
+                    fields = _parse_fields(line[3:])
+                    keywords = fields.get('关键词', '')
+                    result.paragraphs.append(ResultParagraph(
+                        text=current_text,
+                        score=int(score_match.group(1)),
+                        business=fields.get('语义关联') or None,
+                        keywords=[k.strip() for k in keywords.split('、') if k.strip()]
+                    ))
+                current_text = None
+                continue
+            # 段落内容行
+            current_text = line[2:].strip()
+            continue
+
+        if summary_open:
+            summary_lines.append(raw_line)
+            continue
+
+        if section is not None and line[:1] in ('-', '*'):
+            match = META_PATTERN.match(line)
+            if match and match.group(1).strip() not in result.metadata:
+                result.metadata[match.group(1).strip()] = match.group(2).strip()
+
+    result.summary = '\n'.join(summary_lines).strip()
+    return result
+
+
+def extract_total_score(content: str) -> Optional[float]:
+    """只提取总分，未找到返回 None"""
+    for line in content.split('\n'):
+        match = TOTAL_SCORE_PATTERN.match(line.strip())
+        if match:
+            return float(match.group(1))
+    return None
+
+
+_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_result_file(path: str) -> AnalysisResult:
+    """
+    读取并解析分析结果文件
+
+    按 (路径, mtime, 大小) 缓存，文件未变化时直接返回上次的解析结果（调用方不应修改返回值）。
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stamp:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    with open(key, 'r', encoding='utf-8') as f:
+        result = parse_result_text(f.read())
+
+    with _cache_lock:
+        _cache[key] = (stamp, result)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    """清空解析结果缓存"""
+    with _cache_lock:
+        _cache.clear()
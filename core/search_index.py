@@ -0,0 +1,286 @@
+"""全文检索索引
+
+基于 SQLite FTS5 对政策原文（policy_document）和分析结果（analyze_result 中的概要、
+相关段落）建立全文索引。FTS5 自带的 unicode61 分词器会把一整段中文当作一个词，
+因此入库前把连续的中文切成重叠的二元字组（"北斗导航" -> "北斗 斗导 导航"），
+查询词按同样方式切分后以短语查询，等价于子串匹配，且能用上倒排索引。
+
+单个汉字在二元字组中只能按前缀匹配，位于一段中文末尾的字（如 "导航" 中的 "航"）
+不是任何字组的首字，因此另建单字列（"北 斗 导 航"）：含单字片段的查询词在单字列上
+以短语查询，保证与子串匹配的召回一致。
+
+查询词中的标点与 unicode61 一样作为分隔符（"COVID-19" 按短语 "COVID 19" 查询）。
+
+search_fts 是无内容表（content=''）：原文只在 search_docs 中保存一份，search_fts 只有
+二元字组和单字两套倒排索引。更新、删除文档时按 search_docs 中的原文重新切分，提交 FTS5
+的 delete 命令。
+
+索引按文件 mtime 和大小增量更新：爬取、分析、删除文档后调用 sync_search_index，
+只有新增或变化的文件会被重新读取。
+"""
+import os
+import re
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_DIR = os.path.join(BASE_DIR, 'policy_document')
+RESULT_DIR = os.path.join(BASE_DIR, 'analyze_result')
+
+KIND_POLICY = 'policy'
+KIND_ANALYSIS = 'analysis'
+
+CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+QUERY_TERM_PATTERN = re.compile(r'[^\s"]+')
+
+# 标题命中的权重（bm25 列权重：title, body，单字列相同）
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+SNIPPET_RADIUS = 60
+
+_sync_lock = threading.Lock()
+
+
+def _bigrams(run: str) -> str:
+    if len(run) < 2:
+        return run
+    return ' '.join(run[i:i + 2] for i in range(len(run) - 1))
+
+
+def tokenize(text: str) -> str:
+    """把连续的中文切成二元字组，其余文本保持原样交给 unicode61 分词"""
+    return CJK_PATTERN.sub(lambda m: f' {_bigrams(m.group(0))} ', text)
+
+
+def tokenize_unigrams(text: str) -> str:
+    """把中文逐字切开（单字列），其余文本保持原样"""
+    return CJK_PATTERN.sub(lambda m: f" {' '.join(m.group(0))} ", text)
+
+
+def _phrase(text: str) -> Optional[str]:
+    # 与 unicode61 分词一致：标点和下划线都是分隔符（"COVID-19" -> "COVID 19"）
+    tokens = [t for t in re.split(r'[\W_]+', text) if t]
+    return '"' + ' '.join(tokens) + '"' if tokens else None
+
+
+def _fts_values(title: str, body: str) -> tuple:
+    return tokenize(title), tokenize(body), tokenize_unigrams(title), tokenize_unigrams(body)
+
+
+def _delete_fts(cursor, doc_id: int, title: str, body: str):
+    """无内容 FTS5 表不能直接 DELETE，需用入库时相同的文本提交 delete 命令"""
+    cursor.execute('''
+        INSERT INTO search_fts (search_fts, rowid, title, body, title_uni, body_uni)
+        VALUES ('delete', ?, ?, ?, ?, ?)
+    ''', (doc_id, *_fts_values(title, body)))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    把用户输入转换成 FTS5 MATCH 表达式
+
+    空格分隔的多个词之间为 AND；每个词切分后作为一个短语。
+    词中的中文片段都不少于两个字时在二元字组列（title、body）上查询；
+    含单个汉字的片段时（如 "航"、"2023年"）在单字列（title_uni、body_uni）上查询。
+    """
+    clauses = []
+    for term in QUERY_TERM_PATTERN.findall(query):
+        if any(len(run) == 1 for run in CJK_PATTERN.findall(term)):
+            phrase = _phrase(tokenize_unigrams(term))
+            columns = '{title_uni body_uni}'
+        else:
+            phrase = _phrase(tokenize(term))
+            columns = '{title body}'
+        if phrase:
+            clauses.append(f'{columns} : {phrase}')
+    return ' AND '.join(clauses) if clauses else None
+
+
+def make_snippet(body: str, terms: Iterable[str], radius: int = SNIPPET_RADIUS) -> str:
+    """在原文中截取第一个命中词附近的片段"""
+    lowered = body.lower()
+    positions = [(lowered.find(t.lower()), t) for t in terms if t]
+    positions = [(pos, t) for pos, t in positions if pos >= 0]
+    if not positions:
+        text = body[:radius * 2].strip()
+        return text + ('…' if len(body) > radius * 2 else '')
+    pos, term = min(positions)
+    start = max(0, pos - radius)
+    end = min(len(body), pos + len(term) + radius)
+    snippet = re.sub(r'\s+', ' ', body[start:end]).strip()
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(body) else '')
+
+
+def _read_policy(path: str) -> Dict[str, str]:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        body = f.read()
+    return {'title': os.path.splitext(os.path.basename(path))[0], 'body': body}
+
+
+def _read_analysis(path: str) -> Dict[str, str]:
+    from core.result_parser import parse_result_file
+    result = parse_result_file(path)
+    title = re.sub(r'_分析结果_[\d.]+$', '', os.path.splitext(os.path.basename(path))[0])
+    parts = [result.summary] + [p.text for p in result.paragraphs]
+    return {'title': title, 'body': '\n\n'.join(p for p in parts if p)}
+
+
+SOURCES = {
+    KIND_POLICY: (POLICY_DIR, _read_policy),
+    KIND_ANALYSIS: (RESULT_DIR, _read_analysis),
+}
+
+
+def _walk_markdown(root_dir: str):
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = [d for d in dirs if d != 'csv']
+        for name in files:
+            if name.endswith('.md'):
+                yield os.path.join(root, name)
+
+
+def sync_search_index(kinds: Iterable[str] = (KIND_POLICY, KIND_ANALYSIS)) -> Dict[str, int]:
+    """
+    增量同步全文索引
+
+    Returns:
+        {'indexed': 新增或更新的文件数, 'removed': 移除的文件数}
+    """
+    from backend.database import get_connection, init_db
+
+    stats = {'indexed': 0, 'removed': 0}
+    with _sync_lock:
+        init_db()
+        conn = get_connection()
+        cursor = conn.cursor()
+        for kind in kinds:
+            root_dir, reader = SOURCES[kind]
+            cursor.execute('SELECT id, path, mtime, size FROM search_docs WHERE kind = ?', (kind,))
+            existing = {row['path']: row for row in cursor.fetchall()}
+            seen = set()
+
+            for full_path in _walk_markdown(root_dir):
+                rel_path = os.path.relpath(full_path, root_dir)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                seen.add(rel_path)
+                row = existing.get(rel_path)
+                if row and row['mtime'] == stat.st_mtime and row['size'] == stat.st_size:
+                    continue
+                try:
+                    doc = reader(full_path)
+                except Exception as e:
+                    logger.error(f"读取待索引文件失败: {full_path}, {e}")
+                    continue
+
+                if row:
+                    doc_id = row['id']
+                    old = cursor.execute('SELECT title, body FROM search_docs WHERE id = ?', (doc_id,)).fetchone()
+                    _delete_fts(cursor, doc_id, old['title'], old['body'])
+                    cursor.execute('UPDATE search_docs SET title = ?, body = ?, mtime = ?, size = ? WHERE id = ?',
+                                   (doc['title'], doc['body'], stat.st_mtime, stat.st_size, doc_id))
+                else:
+                    cursor.execute('''
+                        INSERT INTO search_docs (kind, path, title, body, mtime, size)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (kind, rel_path, doc['title'], doc['body'], stat.st_mtime, stat.st_size))
+                    doc_id = cursor.lastrowid
+                cursor.execute('INSERT INTO search_fts (rowid, title, body, title_uni, body_uni) VALUES (?, ?, ?, ?, ?)',
+                               (doc_id, *_fts_values(doc['title'], doc['body'])))
+                stats['indexed'] += 1
+
+            removed = [(row['id'],) for path, row in existing.items() if path not in seen]
+            for doc_id, in removed:
+                old = cursor.execute('SELECT title, body FROM search_docs WHERE id = ?', (doc_id,)).fetchone()
+                _delete_fts(cursor, doc_id, old['title'], old['body'])
+            cursor.executemany('DELETE FROM search_docs WHERE id = ?', removed)
+            stats['removed'] += len(removed)
+
+        conn.commit()
+        conn.close()
+
+    if stats['indexed'] or stats['removed']:
+        logger.info(f"全文索引已更新: 新增/更新 {stats['indexed']} 个, 移除 {stats['removed']} 个")
+    return stats
+
+
+def title_subquery(query: str, kind: str) -> Optional[Tuple[str, list]]:
+    """
+    命中文档标题的子查询（只查标题，不读正文、不生成摘要、不限条数）
+
+    Returns:
+        (SQL, 参数)，可直接用于 "title IN (...)"；查询词为空时返回 None
+    """
+    match = build_match_query(query)
+    if not match:
+        return None
+    sql = '''
+        SELECT d.title FROM search_fts JOIN search_docs d ON d.id = search_fts.rowid
+        WHERE search_fts MATCH ? AND d.kind = ?
+    '''
+    return sql, [match, kind]
+
+
+def search(query: str, kind: Optional[str] = None, limit: int = 20, offset: int = 0, conn=None) -> List[dict]:
+    """
+    全文检索
+
+    Args:
+        query: 检索词，空格分隔的多个词同时命中
+        kind: 只检索 policy（政策原文）或 analysis（分析结果），None 表示全部
+        conn: 调用方已持有的数据库连接（嵌套调用时传入，不会被关闭），None 时自行获取
+    Returns:
+        按相关度排序的结果：kind、path、title、snippet、score
+    """
+    from backend.database import get_connection
+
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    sql = f'''
+        SELECT d.kind, d.path, d.title, d.body, bm25(search_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank
+        FROM search_fts JOIN search_docs d ON d.id = search_fts.rowid
+        WHERE search_fts MATCH ?
+    '''
+    params = [match]
+    if kind:
+        sql += ' AND d.kind = ?'
+        params.append(kind)
+    sql += ' ORDER BY rank LIMIT ? OFFSET ?'
+    params.extend([limit, offset])
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    if own_conn:
+        conn.close()
+
+    terms = QUERY_TERM_PATTERN.findall(query)
+    return [{
+        'kind': row['kind'],
+        'path': row['path'],
+        'title': row['title'],
+        'snippet': make_snippet(row['body'], terms),
+        # bm25 越小越相关，取反后越大越相关
+        'score': round(-row['rank'], 4)
+    } for row in rows]
+
+
+def refresh_search_index_async(kinds: Iterable[str] = (KIND_POLICY, KIND_ANALYSIS)):
+    """在后台线程中增量同步全文索引（爬取、删除文档后调用，不阻塞请求）"""
+    def run():
+        try:
+            sync_search_index(kinds)
+        except Exception as e:
+            logger.error(f"同步全文索引失败: {e}")
+
+    threading.Thread(target=run, name="search-index-sync", daemon=True).start()
@@ -0,0 +1,240 @@
+"""OpenCode session 池
+
+分析 worker 独占租用 session，问答和健康检查共用一个共享 session。
+session 的健康状态来自实际发送结果：发送成功即视为有效，只有发送失败
+或超过验证周期（TTL）后才向服务器验证，失效的 session 自动替换。
+
+分析 session 的上下文随消息累积，越往后每篇越慢、越贵，因此池会记录每个
+session 的消息数和近似 token 数，超过阈值后换用新 session（配置了预热 prompt
+时从已加载 skill 的模板 session 复制）。
+"""
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 空闲 session 超过该时长（秒）未确认有效，再次租出前重新验证
+DEFAULT_VALIDATE_TTL = 300
+# 分析 session 的轮换阈值：消息数、近似 token 数（按字符数估算）
+DEFAULT_MAX_MESSAGES = 20
+DEFAULT_MAX_TOKENS = 200000
+
+
+@dataclass
+class SessionLease:
+    """一个被租用的 OpenCode session"""
+    session_id: str
+    created_at: float = field(default_factory=time.monotonic)
+    # 最近一次确认有效的时间（创建、验证通过或发送成功）
+    confirmed_at: float = field(default_factory=time.monotonic)
+    # 已发送的消息数和累计的近似 token 数
+    messages: int = 0
+    approx_tokens: int = 0
+
+
+class SessionPool:
+    """OpenCode session 池（线程安全）"""
+
+    def __init__(self, client, validate_ttl: float = None, max_idle: int = None,
+                 max_messages: int = None, max_tokens: int = None, warmup_prompt: str = None):
+        self.client = client
+        self.validate_ttl = validate_ttl if validate_ttl is not None else \
+            float(os.getenv('OPENCODE_SESSION_TTL', DEFAULT_VALIDATE_TTL))
+        self.max_idle = max_idle or int(os.getenv('ANALYSIS_MAX_WORKERS', 5))
+        self.max_messages = max_messages if max_messages is not None else \
+            int(os.getenv('OPENCODE_SESSION_MAX_MESSAGES', DEFAULT_MAX_MESSAGES))
+        self.max_tokens = max_tokens if max_tokens is not None else \
+            int(os.getenv('OPENCODE_SESSION_MAX_TOKENS', DEFAULT_MAX_TOKENS))
+        self.warmup_prompt = warmup_prompt if warmup_prompt is not None else \
+            os.getenv('OPENCODE_SESSION_WARMUP', '')
+
+        self._lock = threading.Lock()
+        self._idle: List[SessionLease] = []
+        # 租出和空闲中的 session，按 ID 记录用量
+        self._leases: Dict[str, SessionLease] = {}
+        self._shared: Optional[SessionLease] = None
+        self._shared_lock = threading.Lock()
+
+        # 预热模板 session（已加载 skill），新 session 从它复制
+        self._template: Optional[str] = None
+        self._template_lock = threading.Lock()
+        self._fork_supported = True
+
+    def _template_session(self) -> Optional[str]:
+        """获取预热模板 session，首次使用时创建并发送预热 prompt"""
+        with self._template_lock:
+            if self._template is None:
+                session_id = self.client.create_session()
+                if not session_id:
+                    return None
+                reply = self.client.send_message(session_id, self.warmup_prompt)
+                if not reply or reply.startswith("分析失败"):
+                    logger.warning(f"预热 session 失败，改为直接新建 session: {reply}")
+                    self._fork_supported = False
+                    try:
+                        self.client.delete_session(session_id)
+                    except Exception:
+                        pass
+                    return None
+                logger.info(f"预热模板 session: {session_id}")
+                self._template = session_id
+            return self._template
+
+    def _new_session_id(self) -> Optional[str]:
+        """新建 session：配置了预热 prompt 时从模板复制，不支持复制则直接新建"""
+        if self.warmup_prompt and self._fork_supported:
+            template = self._template_session()
+            if template:
+                session_id = self.client.fork_session(template)
+                if session_id:
+                    return session_id
+                logger.warning("OpenCode 不支持复制 session，改为直接新建")
+                self._fork_supported = False
+        return self.client.create_session()
+
+    def _create(self) -> Optional[SessionLease]:
+        session_id = self._new_session_id()
+        if not session_id:
+            return None
+        lease = SessionLease(session_id)
+        with self._lock:
+            self._leases[session_id] = lease
+        return lease
+
+    def _is_fresh(self, lease: SessionLease) -> bool:
+        return time.monotonic() - lease.confirmed_at < self.validate_ttl
+
+    def _validate(self, lease: SessionLease) -> bool:
+        if self.client.validate_session(lease.session_id):
+            lease.confirmed_at = time.monotonic()
+            return True
+        return False
+
+    def _discard(self, lease: SessionLease):
+        logger.info(f"丢弃 OpenCode session: {lease.session_id}")
+        with self._lock:
+            self._leases.pop(lease.session_id, None)
+        try:
+            self.client.delete_session(lease.session_id)
+        except Exception:
+            pass
+
+    def acquire(self) -> Optional[SessionLease]:
+        """
+        租用一个 session（独占，用完调用 release）
+
+        优先复用空闲 session，超过 TTL 的先验证；没有可用的则新建，新建失败返回 None。
+        """
+        while True:
+            with self._lock:
+                lease = self._idle.pop() if self._idle else None
+            if lease is None:
+                return self._create()
+            if self.needs_rotation(lease):
+                self._discard(lease)
+                continue
+            if self._is_fresh(lease) or self._validate(lease):
+                return lease
+            logger.warning(f"空闲 session 已失效: {lease.session_id[:8]}")
+            self._discard(lease)
+
+    def release(self, lease: Optional[SessionLease]):
+        """归还 session，空闲数超过上限时删除多余的"""
+        if lease is None:
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle and not self.needs_rotation(lease):
+                self._idle.append(lease)
+                return
+        self._discard(lease)
+
+    def mark_success(self, lease: SessionLease):
+        """发送成功，session 确认有效"""
+        lease.confirmed_at = time.monotonic()
+
+    def record_usage(self, session_id: str, chars: int):
+        """
+        记录一次发送的用量
+
+        Args:
+            session_id: 发送所用的 session
+            chars: prompt、回复以及 AI 读取的文档的总字符数（中文约 1 字符 1 token，按字符数估算）
+        """
+        with self._lock:
+            lease = self._leases.get(session_id)
+            if lease:
+                lease.messages += 1
+                lease.approx_tokens += chars
+
+    def needs_rotation(self, lease: SessionLease) -> bool:
+        """上下文是否已超过轮换阈值"""
+        return (0 < self.max_messages <= lease.messages) or (0 < self.max_tokens <= lease.approx_tokens)
+
+    def rotate_if_needed(self, lease: SessionLease) -> Optional[SessionLease]:
+        """
+        上下文超过阈值时换用新 session，否则返回原 lease
+
+        Returns:
+            可用的 lease；需要轮换但新建失败时返回 None
+        """
+        if not self.needs_rotation(lease):
+            return lease
+        logger.info(f"session {lease.session_id[:8]} 已发送 {lease.messages} 条消息、"
+                    f"约 {lease.approx_tokens} token，轮换新 session")
+        self._discard(lease)
+        return self._create()
+
+    def recover(self, lease: SessionLease) -> Optional[SessionLease]:
+        """
+        发送失败后检查 session
+
+        Returns:
+            session 仍有效时返回原 lease（失败与 session 无关）；已失效时删除并返回新建的 lease，
+            新建失败返回 None
+        """
+        if self._validate(lease):
+            return lease
+        logger.warning(f"session {lease.session_id[:8]} 已失效，重新创建")
+        self._discard(lease)
+        return self._create()
+
+    def shared_session(self) -> Optional[str]:
+        """
+        获取问答、健康检查共用的 session
+
+        在 TTL 内直接返回，过期后验证一次，失效则重建。
+        """
+        with self._shared_lock:
+            lease = self._shared
+            if lease and (self._is_fresh(lease) or self._validate(lease)):
+                return lease.session_id
+            if lease:
+                logger.warning(f"共享 session 已失效: {lease.session_id[:8]}")
+            self._shared = self._create()
+            return self._shared.session_id if self._shared else None
+
+    def report_shared_result(self, session_id: str, ok: bool):
+        """汇报共享 session 的发送结果：成功则续期，失败则下次使用前重新验证"""
+        with self._shared_lock:
+            lease = self._shared
+            if not lease or lease.session_id != session_id:
+                return
+            lease.confirmed_at = time.monotonic() if ok else float('-inf')
+
+    def close(self):
+        """删除所有空闲 session 和预热模板 session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for lease in idle:
+            self._discard(lease)
+        with self._template_lock:
+            template, self._template = self._template, None
+        if template:
+            try:
+                self.client.delete_session(template)
+            except Exception:
+                pass
@@ -30,6 +30,45 @@ export const api = {
     return res.json()
   },
 
+  // 流式发送消息，每收到一段文本调用 onChunk，返回完整回复
+  async askStream(message, onChunk, signal) {
+    const res = await fetch(`${API_BASE}/ask`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, stream: true }),
+      signal
+    })
+    // 未进入流式模式（如参数错误、无法连接 OpenCode）时后端仍返回 JSON
+    if (!(res.headers.get('Content-Type') || '').includes('text/event-stream')) {
+      return res.json()
+    }
+
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let response = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const frames = buffer.split('\n\n')
+      buffer = frames.pop()
+      for (const frame of frames) {
+        const event = (frame.match(/^event: (.*)$/m) || [])[1]
+        const data = (frame.match(/^data: (.*)$/m) || [])[1]
+        if (!event || !data) continue
+        const payload = JSON.parse(data)
+        if (event === 'chunk') {
+          response += payload.text
+          onChunk(payload.text, response)
+        } else if (event === 'done') {
+          return { response: payload.response }
+        }
+      }
+    }
+    return { response }
+  },
+
   // 文档管理
   async getDocuments(keyword = '') {
     const url = keyword
@@ -192,6 +231,12 @@ export const api = {
     return res.json()
   },
 
+  // 分析任务状态和进度
+  async getAnalysisJob(jobId) {
+    const res = await fetch(`${API_BASE}/api/analysis/jobs/${encodeURIComponent(jobId)}`)
+    return res.json()
+  },
+
   // 会话管理
   async getUserSessions(username) {
     const res = await fetch(`${API_BASE}/api/sessions?username=${encodeURIComponent(username)}`)
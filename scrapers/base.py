@@ -7,6 +7,7 @@
 import re
 import time
 import sys
+import threading
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
@@ -15,14 +16,12 @@ from urllib.parse import urljoin, urlparse, quote
 import logging
 
 # Selenium相关
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+
+from .browser_pool import get_browser_pool
 
 # 禁用SSL警告
 import urllib3
@@ -50,6 +49,25 @@ class BaseScraper:
     name = "基础爬虫"
     base_url = ""
 
+    # 等待参数，子类只需覆盖与默认值不同的项
+    WAIT_CONFIG = {
+        # 搜索结果条目的 CSS 选择器，用于判断结果已加载、翻页后结果已变化
+        "results_selector": "",
+        # 分页器的 CSS 选择器（可选），翻页后同时等待分页器刷新
+        "pager_selector": "",
+        # 等待条件成立的最长时间（秒）
+        "timeout": 15,
+        # 条件轮询间隔（秒）
+        "poll_interval": 0.25,
+        # 资源请求数持续多久不变视为网络空闲（秒）
+        "network_idle": 0.5,
+        # 搜索接口翻页时相邻两次请求的间隔（秒），避免请求过快；正文抓取的限速见 scrapers.fetcher
+        "request_interval": 0.3,
+    }
+
+    # 详情页正文的 CSS 选择器（按优先级），为 None 表示该站点不提取正文
+    CONTENT_SELECTORS = None
+
     def __init__(self):
         self.session = requests.Session()
         self.headers = {
@@ -59,93 +77,39 @@ class BaseScraper:
         }
         self.session.headers.update(self.headers)
         self.driver = None
+        # 最近一次借浏览器失败的原因（scrape() 内部吞掉了异常，调用方据此区分「无结果」和「没搜成」）
+        self.browser_error = None
+        # 搜索接口失败后本实例不再尝试，直接使用 Selenium
+        self._search_api_failed = False
+
+    @property
+    def site_key(self):
+        """浏览器池按站点隔离的键"""
+        return urlparse(self.base_url).netloc or self.name
 
     def init_browser(self):
-        """初始化Chrome浏览器"""
+        """从浏览器池借出一个Chrome浏览器"""
         if self.driver:
             return self.driver
 
-        self.log("正在初始化浏览器...")
-
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # 无头模式
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument(f'--user-agent={self.headers["User-Agent"]}')
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-        # 尝试多种方式初始化浏览器
-        methods = [
-            ("本地缓存的ChromeDriver", self._init_with_cached_driver),
-            ("自动下载ChromeDriver", self._init_with_manager),
-            ("系统Chrome", self._init_with_system_chrome),
-        ]
-
-        for method_name, init_func in methods:
-            try:
-                self.log(f"尝试使用 {method_name}...")
-                driver = init_func(chrome_options)
-                if driver:
-                    self.driver = driver
-                    # 增加页面加载超时时间到120秒
-                    self.driver.set_page_load_timeout(120)
-                    # 设置隐式等待时间为10秒
-                    self.driver.implicitly_wait(10)
-                    # 设置脚本超时时间
-                    self.driver.set_script_timeout(60)
-                    self.log(f"浏览器初始化成功! (使用 {method_name})")
-                    return self.driver
-            except Exception as e:
-                self.log(f"  {method_name} 失败: {e}")
-                continue
-
-        self.log("[错误] 所有浏览器初始化方法都失败了", "error")
-        return None
-
-    def _init_with_cached_driver(self, chrome_options):
-        """使用本地缓存的ChromeDriver"""
-        import os
-        import glob
-
-        # 查找缓存的ChromeDriver
-        cache_paths = [
-            os.path.expanduser("~/.wdm/drivers/chromedriver"),
-            "C:/Users/Administrator/.wdm/drivers/chromedriver",
-        ]
+        self.log("正在获取浏览器...")
+        driver = get_browser_pool().acquire(self.site_key, self.headers["User-Agent"])
+        if not driver:
+            self.browser_error = "无法获取浏览器（浏览器池等待超时或启动失败）"
+            self.log(f"[错误] {self.browser_error}", "error")
+            return None
 
-        for cache_path in cache_paths:
-            if os.path.exists(cache_path):
-                # 查找最新版本的chromedriver.exe
-                pattern = os.path.join(cache_path, "**", "chromedriver.exe")
-                drivers = glob.glob(pattern, recursive=True)
-                if drivers:
-                    # 使用最新的驱动
-                    latest_driver = max(drivers, key=os.path.getmtime)
-                    self.log(f"  找到缓存的驱动: {latest_driver}")
-                    service = Service(latest_driver)
-                    return webdriver.Chrome(service=service, options=chrome_options)
-
-        return None
-
-    def _init_with_manager(self, chrome_options):
-        """使用webdriver-manager自动下载"""
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=chrome_options)
-
-    def _init_with_system_chrome(self, chrome_options):
-        """尝试直接使用系统Chrome（不指定驱动）"""
-        return webdriver.Chrome(options=chrome_options)
+        self.browser_error = None
+        self.driver = driver
+        return self.driver
 
     def safe_get_page(self, driver, url, max_retries=3, wait_after_load=3):
-        """安全地加载页面，带重试机制"""
+        """安全地加载页面，带重试机制；加载后最多等待 wait_after_load 秒直到网络空闲"""
         for retry in range(max_retries):
             try:
                 driver.get(url)
-                time.sleep(wait_after_load)
+                get_browser_pool().record_page_load(driver)
+                self.wait_for_network_idle(driver, timeout=wait_after_load)
                 return True
             except TimeoutException:
                 if retry < max_retries - 1:
@@ -165,13 +129,135 @@ class BaseScraper:
                     return False
         return False
 
-    def close_browser(self):
-        """关闭浏览器"""
-        if self.driver:
+    def wait_config(self, key):
+        """读取等待参数（子类 WAIT_CONFIG 覆盖基类默认值）"""
+        return self.WAIT_CONFIG.get(key, BaseScraper.WAIT_CONFIG[key])
+
+    def wait_until(self, condition, timeout=None):
+        """
+        轮询直到 condition() 为真
+
+        condition 抛出异常视为未满足。
+        Returns:
+            超时前条件是否成立
+        """
+        timeout = self.wait_config("timeout") if timeout is None else timeout
+        poll_interval = self.wait_config("poll_interval")
+        deadline = time.monotonic() + timeout
+        while True:
             try:
-                self.driver.quit()
-            except:
+                if condition():
+                    return True
+            except Exception:
                 pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+    def wait_for_network_idle(self, driver, timeout=None):
+        """
+        等待页面加载完成且网络空闲
+
+        以 document.readyState、jQuery.active 和 performance 资源条目数判断：
+        页面加载完成、没有进行中的 jQuery 请求，且资源条目数在 network_idle 秒内不再增加。
+        """
+        idle_for = self.wait_config("network_idle")
+        state = {"count": -1, "since": time.monotonic()}
+
+        def idle():
+            ready, active, count = driver.execute_script(
+                "return [document.readyState,"
+                " (window.jQuery && window.jQuery.active) || 0,"
+                " performance.getEntriesByType('resource').length];"
+            )
+            now = time.monotonic()
+            if ready != "complete" or active or count != state["count"]:
+                state["count"] = count
+                state["since"] = now
+                return False
+            return now - state["since"] >= idle_for
+
+        return self.wait_until(idle, timeout)
+
+    def count_results(self, driver, selector=None):
+        """当前页面匹配结果选择器的元素数（用脚本查询，不受隐式等待影响）"""
+        selector = selector or self.wait_config("results_selector")
+        if not selector:
+            return 0
+        return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", selector)
+
+    def page_state(self, driver):
+        """
+        当前结果列表和分页器的特征，用于判断筛选、翻页后页面是否已刷新
+
+        Returns:
+            (结果特征, 分页器特征)；结果特征为条目数和首尾条目文本，列表为空时为 '0'
+        """
+        try:
+            return tuple(driver.execute_script(
+                "var items = arguments[0] ? document.querySelectorAll(arguments[0]) : [];"
+                "var pager = arguments[1] ? document.querySelector(arguments[1]) : null;"
+                "var results = !items.length ? '0' : items.length + '|' + items[0].textContent.slice(0, 200)"
+                " + '|' + items[items.length - 1].textContent.slice(0, 200);"
+                "return [results, pager ? pager.textContent : null];",
+                self.wait_config("results_selector"), self.wait_config("pager_selector")
+            ))
+        except Exception:
+            return (None, None)
+
+    def wait_for_results(self, driver, timeout=None):
+        """
+        等待搜索结果出现，再等待网络空闲
+
+        未配置 results_selector 时只等待网络空闲。
+        Returns:
+            是否在超时前出现了结果
+        """
+        found = True
+        if self.wait_config("results_selector"):
+            found = self.wait_until(lambda: self.count_results(driver) > 0, timeout)
+        self.wait_for_network_idle(driver, timeout)
+        return found
+
+    def wait_for_results_change(self, driver, before, timeout=None):
+        """
+        点击筛选、翻页后等待页面刷新，再等待网络空闲
+
+        before 为点击前的 page_state()。结果列表特征变化且不为空（列表清空说明仍在刷新），
+        配置了 pager_selector 时分页器也需变化；未配置 results_selector 时只等待网络空闲。
+        Returns:
+            页面是否在超时前完成刷新
+        """
+        changed = True
+        if self.wait_config("results_selector"):
+            check_pager = bool(self.wait_config("pager_selector"))
+
+            def refreshed():
+                results, pager = self.page_state(driver)
+                if results in (before[0], None, '0'):
+                    return False
+                return not check_pager or pager != before[1]
+
+            changed = self.wait_until(refreshed, timeout)
+        self.wait_for_network_idle(driver, timeout)
+        return changed
+
+    def scroll_page(self, driver):
+        """滚动到页面底部触发懒加载，等待网络空闲后回到顶部"""
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        self.wait_for_network_idle(driver)
+        driver.execute_script("window.scrollTo(0, 0);")
+
+    def pause_between_requests(self):
+        """相邻两次请求之间的间隔"""
+        interval = self.wait_config("request_interval")
+        if interval > 0:
+            time.sleep(interval)
+
+    def close_browser(self):
+        """把浏览器归还给浏览器池"""
+        if self.driver:
+            get_browser_pool().release(self.driver)
             self.driver = None
 
     def log(self, message, level="info"):
@@ -300,76 +386,150 @@ class BaseScraper:
                     return {"content": result, "attachments": attachments}
                 return result
 
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'lxml')
+            return self._parse_article_page(driver.page_source, url, content_selectors, extract_attachments)
 
-            # 移除脚本和样式
-            for script in soup(["script", "style", "noscript"]):
-                script.decompose()
+        except Exception as e:
+            self.log(f"  提取正文内容失败: {e}", "error")
+            if extract_attachments:
+                return {"content": "", "attachments": []}
+            return ""
 
-            # 查找正文内容
-            content_elem = None
+    def _is_static_article(self, html, content_selectors):
+        """requests 取到的页面中正文区域已有内容（不需要浏览器渲染）"""
+        if not html or not content_selectors:
+            return False
+        soup = BeautifulSoup(html, 'lxml')
+        for selector in content_selectors:
+            try:
+                content_elem = soup.select_one(selector)
+            except Exception:
+                continue
+            if content_elem and content_elem.get_text(strip=True):
+                return True
+        return False
 
-            if content_selectors:
-                for selector in content_selectors:
-                    try:
-                        content_elem = soup.select_one(selector)
-                        if content_elem:
-                            self.log(f"  找到内容区域: {selector}")
-                            break
-                    except:
-                        continue
+    def fetch_article(self, url, content_selectors=None, extract_attachments=True):
+        """
+        抓取单篇文章：静态页面直接用 requests 解析，需要渲染时从浏览器池借一个浏览器
+
+        返回值与 extract_article_content 相同
+        """
+        html = self.fetch_page(url)
+        if self._is_static_article(html, content_selectors):
+            return self._parse_article_page(html, url, content_selectors, extract_attachments)
+
+        pool = get_browser_pool()
+        driver = pool.acquire(self.site_key, self.headers["User-Agent"])
+        if not driver:
+            # 浏览器不可用时退回 requests 取到的页面
+            return self._parse_article_page(html or "", url, content_selectors, extract_attachments)
+        try:
+            if not self.safe_get_page(driver, url, max_retries=2, wait_after_load=3):
+                return self._parse_article_page(html or "", url, content_selectors, extract_attachments)
+            return self._parse_article_page(driver.page_source, url, content_selectors, extract_attachments)
+        finally:
+            pool.release(driver)
+
+    def fetch_article_contents(self, results, content_selectors=None, extract_attachments=True):
+        """
+        并发提取多篇文章的正文和附件，写回每条结果的 full_content、attachments
+
+        按域名限制并发数和请求间隔（见 scrapers.fetcher），没有 url 的结果保持不变。
+        """
+        from .fetcher import run_concurrently
+
+        targets = [r for r in results if r.get("url")]
+        if not targets:
+            return
+        # 搜索阶段已结束，把浏览器还给浏览器池供需要渲染的页面使用
+        self.close_browser()
+
+        progress = {"done": 0}
+        progress_lock = threading.Lock()
+
+        def make_task(result):
+            def run():
+                content = self.fetch_article(result["url"], content_selectors, extract_attachments)
+                with progress_lock:
+                    progress["done"] += 1
+                    print(f"[{progress['done']}/{len(targets)}] 提取正文: {result.get('title', '')[:50]}...", flush=True)
+                return content
+            return run
+
+        contents = run_concurrently([(r["url"], make_task(r)) for r in targets])
+        for result, content in zip(targets, contents):
+            if isinstance(content, dict):
+                result["full_content"] = content.get("content", "")
+                result["attachments"] = content.get("attachments", [])
+            else:
+                result["full_content"] = content or ""
+                result["attachments"] = []
 
-            # 如果没找到，尝试通用选择器
-            if not content_elem:
-                common_selectors = [
-                    '#ivs_content',
-                    '.xxgk_content_nr',
-                    'div[class*="content"]',
-                    'div[class*="article"]',
-                    'div[class*="main"]',
-                    'article',
-                    '.content',
-                    '#content'
-                ]
-                for selector in common_selectors:
-                    try:
-                        content_elem = soup.select_one(selector)
-                        if content_elem:
-                            self.log(f"  找到内容区域: {selector}")
-                            break
-                    except:
-                        continue
+    def _parse_article_page(self, page_source, url, content_selectors=None, extract_attachments=False):
+        """从页面源码中提取正文（Markdown）和附件"""
+        soup = BeautifulSoup(page_source, 'lxml')
 
-            if not content_elem:
-                self.log(f"  未找到正文内容区域")
-                markdown_content = ""
-            else:
-                # 转换为Markdown
-                markdown_content = self._html_to_markdown(content_elem)
+        # 移除脚本和样式
+        for script in soup(["script", "style", "noscript"]):
+            script.decompose()
 
-            if markdown_content:
-                self.log(f"  [成功] 成功提取正文内容 ({len(markdown_content)} 字符)")
-            else:
-                self.log(f"  [警告] 正文内容为空")
+        # 查找正文内容
+        content_elem = None
 
-            # 提取附件信息
-            attachments = []
-            if extract_attachments:
-                attachments = self._extract_attachments_from_soup(soup, url)
-                if attachments:
-                    self.log(f"  [成功] 找到 {len(attachments)} 个附件")
+        if content_selectors:
+            for selector in content_selectors:
+                try:
+                    content_elem = soup.select_one(selector)
+                    if content_elem:
+                        self.log(f"  找到内容区域: {selector}")
+                        break
+                except:
+                    continue
 
-            if extract_attachments:
-                return {"content": markdown_content, "attachments": attachments}
-            else:
-                return markdown_content
+        # 如果没找到，尝试通用选择器
+        if not content_elem:
+            common_selectors = [
+                '#ivs_content',
+                '.xxgk_content_nr',
+                'div[class*="content"]',
+                'div[class*="article"]',
+                'div[class*="main"]',
+                'article',
+                '.content',
+                '#content'
+            ]
+            for selector in common_selectors:
+                try:
+                    content_elem = soup.select_one(selector)
+                    if content_elem:
+                        self.log(f"  找到内容区域: {selector}")
+                        break
+                except:
+                    continue
 
-        except Exception as e:
-            self.log(f"  提取正文内容失败: {e}", "error")
-            if extract_attachments:
-                return {"content": "", "attachments": []}
-            return ""
+        if not content_elem:
+            self.log(f"  未找到正文内容区域")
+            markdown_content = ""
+        else:
+            # 转换为Markdown
+            markdown_content = self._html_to_markdown(content_elem)
+
+        if markdown_content:
+            self.log(f"  [成功] 成功提取正文内容 ({len(markdown_content)} 字符)")
+        else:
+            self.log(f"  [警告] 正文内容为空")
+
+        # 提取附件信息
+        attachments = []
+        if extract_attachments:
+            attachments = self._extract_attachments_from_soup(soup, url)
+            if attachments:
+                self.log(f"  [成功] 找到 {len(attachments)} 个附件")
+
+        if extract_attachments:
+            return {"content": markdown_content, "attachments": attachments}
+        else:
+            return markdown_content
 
     def _extract_content_with_requests(self, url, content_selectors=None):
         """使用requests提取内容（备用方法）"""
@@ -622,6 +782,34 @@ class BaseScraper:
         except Exception as e:
             return html_element.get_text(separator='\n', strip=True)
 
+    def search_with_selenium(self, keyword, **filters):
+        """使用Selenium搜索 - 子类实现"""
+        raise NotImplementedError("子类必须实现 search_with_selenium 方法")
+
+    def search_keyword(self, keyword, **filters):
+        """
+        搜索关键词：站点有 JSON 搜索接口时直接请求接口，失败时回退到 Selenium
+
+        Args:
+            filters: date_filter、section_filter 等，与 search_with_selenium 的参数相同
+        Returns:
+            搜索结果列表，每项包含 title, url, date, content
+        """
+        from .search_api import get_search_api, SearchAPIError, SearchAPIEmpty
+
+        api = None if self._search_api_failed else get_search_api(self)
+        if api:
+            try:
+                results = api.search(keyword, **filters)
+                self.log(f"[接口] 搜索完成，共 {len(results)} 条结果")
+                return results
+            except SearchAPIError as e:
+                # 接口请求失败时后续关键词不再尝试；仅无结果时下个关键词仍先用接口
+                if not isinstance(e, SearchAPIEmpty):
+                    self._search_api_failed = True
+                self.log(f"[接口] {e}，改用浏览器搜索")
+        return self.search_with_selenium(keyword, **filters)
+
     def scrape(self, keywords, start_date, end_date=None, date_filter=None, **kwargs):
         """主爬取方法 - 子类必须实现"""
         raise NotImplementedError("子类必须实现 scrape 方法")
\ No newline at end of file
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+浏览器池
+进程内复用已启动的无头 Chrome，避免每个爬虫实例冷启动一次浏览器
+
+- 按站点隔离：每个浏览器使用独立的临时 user-data-dir，只借给同一站点的爬虫，
+  cookie、缓存不会在站点之间串用
+- 借出前做健康检查，失效的浏览器直接丢弃重建
+- 加载页面数达到上限或空闲过久的浏览器会被回收
+"""
+
+import os
+import glob
+import time
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+# 池中最多同时存在的浏览器数
+POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', 2))
+# 单个浏览器加载多少个页面后回收（长时间运行的 Chrome 内存会持续增长）
+MAX_PAGE_LOADS = int(os.getenv('BROWSER_MAX_PAGE_LOADS', 200))
+# 空闲超过该时长（秒）的浏览器被关闭
+IDLE_TIMEOUT = float(os.getenv('BROWSER_POOL_IDLE_TIMEOUT', 600))
+# 池满时等待空闲浏览器的最长时间（秒）
+ACQUIRE_TIMEOUT = float(os.getenv('BROWSER_POOL_ACQUIRE_TIMEOUT', 300))
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def _find_cached_driver():
+    """查找 webdriver-manager 本地缓存的 ChromeDriver"""
+    cache_paths = [
+        os.path.expanduser("~/.wdm/drivers/chromedriver"),
+        "C:/Users/Administrator/.wdm/drivers/chromedriver",
+    ]
+    for cache_path in cache_paths:
+        if os.path.exists(cache_path):
+            drivers = glob.glob(os.path.join(cache_path, "**", "chromedriver*"), recursive=True)
+            drivers = [d for d in drivers if os.path.isfile(d)]
+            if drivers:
+                return max(drivers, key=os.path.getmtime)
+    return None
+
+
+def _download_driver():
+    """使用 webdriver-manager 自动下载 ChromeDriver"""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+class PooledBrowser:
+    """池中的一个浏览器"""
+
+    def __init__(self, driver, site_key, profile_dir):
+        self.driver = driver
+        self.site_key = site_key
+        self.profile_dir = profile_dir
+        self.page_loads = 0
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        """健康检查：浏览器进程和会话仍然可用"""
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """进程内的浏览器池"""
+
+    def __init__(self, max_size=POOL_SIZE, max_page_loads=MAX_PAGE_LOADS, idle_timeout=IDLE_TIMEOUT):
+        self.max_size = max(1, max_size)
+        self.max_page_loads = max_page_loads
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._creating = 0
+        # 首次成功启动后记住 ChromeDriver 路径（None 表示交给 Selenium 查找），后续不再逐个尝试
+        self._driver_path = None
+        self._driver_resolved = False
+
+    def _build_options(self, user_agent, profile_dir):
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # 无头模式
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--ignore-certificate-errors')
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_argument(f'--user-agent={user_agent}')
+        chrome_options.add_argument(f'--user-data-dir={profile_dir}')
+        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+        return chrome_options
+
+    @staticmethod
+    def _launch(driver_path, chrome_options):
+        if driver_path:
+            return webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        # 不指定驱动，直接使用系统 Chrome
+        return webdriver.Chrome(options=chrome_options)
+
+    def _start_driver(self, chrome_options):
+        if self._driver_resolved:
+            return self._launch(self._driver_path, chrome_options)
+
+        # 尝试多种方式初始化浏览器
+        methods = [
+            ("本地缓存的ChromeDriver", _find_cached_driver),
+            ("自动下载ChromeDriver", _download_driver),
+            ("系统Chrome", lambda: None),
+        ]
+        last_error = None
+        for method_name, resolve in methods:
+            try:
+                driver_path = resolve()
+                if driver_path is None and resolve is _find_cached_driver:
+                    continue
+                driver = self._launch(driver_path, chrome_options)
+            except Exception as e:
+                logger.warning(f"{method_name} 启动浏览器失败: {e}")
+                last_error = e
+                continue
+            self._driver_path = driver_path
+            self._driver_resolved = True
+            logger.info(f"浏览器初始化成功 (使用 {method_name})")
+            return driver
+        raise RuntimeError(f"所有浏览器初始化方法都失败了: {last_error}")
+
+    def _create(self, site_key, user_agent):
+        profile_dir = tempfile.mkdtemp(prefix='scraper-chrome-')
+        try:
+            driver = self._start_driver(self._build_options(user_agent, profile_dir))
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        # 增加页面加载超时时间到120秒
+        driver.set_page_load_timeout(120)
+        # 不使用隐式等待：元素等待统一由 wait_until、wait_for_results 等显式等待处理，
+        # 否则每次 find_element 未找到（如探测可选按钮）都要空等隐式等待时长
+        driver.implicitly_wait(0)
+        # 设置脚本超时时间
+        driver.set_script_timeout(60)
+        logger.info(f"新建浏览器: {site_key}")
+        return PooledBrowser(driver, site_key, profile_dir)
+
+    def _expire_idle(self):
+        """移出空闲过久的浏览器，返回待关闭的列表（在锁外关闭）"""
+        now = time.monotonic()
+        expired = [b for b in self._idle if now - b.last_used > self.idle_timeout]
+        if expired:
+            self._idle = [b for b in self._idle if b not in expired]
+        return expired
+
+    def acquire(self, site_key, user_agent=DEFAULT_USER_AGENT, timeout=ACQUIRE_TIMEOUT):
+        """
+        借出一个浏览器
+
+        优先复用同一站点的空闲浏览器；池未满时新建；池已满时关闭其他站点的空闲浏览器腾出位置，
+        全部在用时等待归还。
+
+        Returns:
+            WebDriver 实例；启动失败或等待超时返回 None
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            to_close = []
+            browser = None
+            create = False
+            with self._cond:
+                to_close.extend(self._expire_idle())
+                for candidate in reversed(self._idle):
+                    if candidate.site_key == site_key:
+                        browser = candidate
+                        self._idle.remove(candidate)
+                        break
+                if browser is None:
+                    total = len(self._idle) + len(self._in_use) + self._creating
+                    if total >= self.max_size and self._idle:
+                        # 池满但有其他站点的空闲浏览器，关闭最久未用的一个
+                        oldest = min(self._idle, key=lambda b: b.last_used)
+                        self._idle.remove(oldest)
+                        to_close.append(oldest)
+                        total -= 1
+                    if total < self.max_size:
+                        self._creating += 1
+                        create = True
+                    elif not to_close:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            logger.warning(f"等待空闲浏览器超时: {site_key}")
+                            return None
+                        self._cond.wait(remaining)
+                        continue
+
+            for old in to_close:
+                old.quit()
+            if browser is None and not create:
+                continue
+
+            if create:
+                try:
+                    browser = self._create(site_key, user_agent)
+                except Exception as e:
+                    logger.error(f"浏览器启动失败: {e}")
+                    with self._cond:
+                        self._creating -= 1
+                        self._cond.notify()
+                    return None
+                with self._cond:
+                    self._creating -= 1
+                    self._in_use[id(browser.driver)] = browser
+                return browser.driver
+
+            if browser.is_alive():
+                with self._cond:
+                    self._in_use[id(browser.driver)] = browser
+                return browser.driver
+
+            # 健康检查失败，丢弃后重新借
+            logger.info(f"浏览器已失效，重新创建: {site_key}")
+            browser.quit()
+
+    def record_page_load(self, driver):
+        """记录一次页面加载，用于按加载次数回收"""
+        with self._cond:
+            browser = self._in_use.get(id(driver))
+            if browser:
+                browser.page_loads += 1
+
+    def release(self, driver, discard=False):
+        """归还浏览器；达到加载上限、已失效或 discard=True 时直接关闭"""
+        with self._cond:
+            browser = self._in_use.pop(id(driver), None)
+        if browser is None:
+            return
+
+        keep = not discard and browser.page_loads < self.max_page_loads
+        if keep:
+            try:
+                # 停止页面上仍在运行的脚本和请求
+                driver.get('about:blank')
+            except Exception:
+                keep = False
+
+        if keep:
+            browser.last_used = time.monotonic()
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify()
+        else:
+            if browser.page_loads >= self.max_page_loads:
+                logger.info(f"浏览器已加载 {browser.page_loads} 个页面，回收: {browser.site_key}")
+            browser.quit()
+            with self._cond:
+                self._cond.notify()
+
+    def shutdown(self):
+        """关闭池中所有浏览器（进程退出时调用）"""
+        with self._cond:
+            browsers = self._idle + list(self._in_use.values())
+            self._idle = []
+            self._in_use = {}
+        for browser in browsers:
+            browser.quit()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """获取进程内唯一的浏览器池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
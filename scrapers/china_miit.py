@@ -4,7 +4,6 @@
 网站: https://www.miit.gov.cn
 """
 
-import time
 from datetime import datetime
 from urllib.parse import quote, urljoin
 from bs4 import BeautifulSoup
@@ -19,6 +18,11 @@ class ChinaMIITScraper(BaseScraper):
     name = "中华人民共和国工业和信息化部"
     base_url = "https://www.miit.gov.cn"
 
+    WAIT_CONFIG = {
+        "results_selector": "div.jcse-result-box.news-result",
+        "pager_selector": "#pagination",
+    }
+
     DATE_FILTER_OPTIONS = {
         "1d": "一天内",
         "7d": "一周内",
@@ -50,11 +54,10 @@ class ChinaMIITScraper(BaseScraper):
         try:
             driver.get(search_url)
             self.log("页面加载中，等待搜索结果...")
-            time.sleep(8)
+            self.wait_for_results(driver)
 
             if date_filter:
                 self._click_date_filter(driver, date_filter)
-                time.sleep(4)
 
             results = self._scrape_all_pages(driver)
 
@@ -70,14 +73,14 @@ class ChinaMIITScraper(BaseScraper):
         self.log(f"尝试点击时间筛选按钮: {filter_name} (data-value={data_value})")
 
         try:
-            time.sleep(2)
+            before = self.page_state(driver)
             try:
                 css_selector = f'div.jsearch-condition-box-item[data-value="{data_value}"]'
                 date_btn = driver.find_element(By.CSS_SELECTOR, css_selector)
                 if date_btn and date_btn.is_displayed():
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(4)
+                    self.wait_for_results_change(driver, before)
                     return True
             except:
                 pass
@@ -96,7 +99,7 @@ class ChinaMIITScraper(BaseScraper):
                 clicked = driver.execute_script(js_code)
                 if clicked:
                     self.log(f"✓ 通过JavaScript成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(4)
+                    self.wait_for_results_change(driver, before)
                     return True
             except:
                 pass
@@ -115,10 +118,7 @@ class ChinaMIITScraper(BaseScraper):
         while current_page <= max_pages:
             self.log(f"正在爬取第 {current_page} 页...")
 
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            self.scroll_page(driver)
 
             page_source = driver.page_source
             soup = BeautifulSoup(page_source, 'lxml')
@@ -215,6 +215,7 @@ class ChinaMIITScraper(BaseScraper):
 
     def _click_next_page(self, driver, current_page):
         next_page = current_page + 1
+        before = self.page_state(driver)
 
         try:
             try:
@@ -228,8 +229,7 @@ class ChinaMIITScraper(BaseScraper):
                 if tag_name == 'a':
                     driver.execute_script("arguments[0].click();", next_page_element)
                     self.log(f"✓ 成功点击「下一页」按钮翻到第 {next_page} 页")
-                    time.sleep(4)
-                    return True
+                    return self.wait_for_results_change(driver, before)
             except:
                 pass
 
@@ -237,8 +237,7 @@ class ChinaMIITScraper(BaseScraper):
                 next_link = driver.find_element(By.CSS_SELECTOR, f'#pagination a[paged="{next_page}"]')
                 if next_link and next_link.is_displayed():
                     driver.execute_script("arguments[0].click();", next_link)
-                    time.sleep(4)
-                    return True
+                    return self.wait_for_results_change(driver, before)
             except:
                 pass
 
@@ -263,8 +262,7 @@ class ChinaMIITScraper(BaseScraper):
                 '''
                 clicked = driver.execute_script(js_code)
                 if clicked:
-                    time.sleep(4)
-                    return True
+                    return self.wait_for_results_change(driver, before)
             except:
                 pass
 
@@ -288,7 +286,7 @@ class ChinaMIITScraper(BaseScraper):
             for kw_idx, keyword in enumerate(keywords, 1):
                 print(f"\n[关键词 {kw_idx}/{len(keywords)}] 搜索: {keyword}", flush=True)
 
-                search_results = self.search_with_selenium(keyword, date_filter=date_filter)
+                search_results = self.search_keyword(keyword, date_filter=date_filter)
 
                 if not search_results:
                     continue
@@ -339,8 +337,6 @@ class ChinaMIITScraper(BaseScraper):
                     except Exception as e:
                         continue
 
-                time.sleep(1)
-
         finally:
             self.close_browser()
 
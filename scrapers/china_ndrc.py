@@ -5,7 +5,6 @@
 搜索页面: https://so.ndrc.gov.cn/s?siteCode=bm04000007&ssl=1&token=&qt=关键词
 """
 
-import time
 from urllib.parse import quote, urljoin
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
@@ -20,6 +19,8 @@ class ChinaNDRCScraper(BaseScraper):
     base_url = "https://www.ndrc.gov.cn"
     search_base_url = "https://so.ndrc.gov.cn"
 
+    WAIT_CONFIG = {"results_selector": "div.result-item, div.search-result, li.result-item"}
+
     DATE_FILTER_OPTIONS = {
         "1d": "最近1天",
         "7d": "最近7天",
@@ -42,11 +43,10 @@ class ChinaNDRCScraper(BaseScraper):
         try:
             driver.get(search_url)
             self.log("页面加载中，等待搜索结果...")
-            time.sleep(8)
+            self.wait_for_results(driver)
 
             if date_filter:
                 self._click_date_filter(driver, date_filter)
-                time.sleep(4)
 
             results = self._scrape_all_pages(driver)
 
@@ -58,12 +58,12 @@ class ChinaNDRCScraper(BaseScraper):
     def _click_date_filter(self, driver, date_filter):
         filter_name = self.DATE_FILTER_OPTIONS.get(date_filter, "全部")
         try:
-            time.sleep(2)
             try:
                 date_btn = driver.find_element(By.XPATH, f"//a[contains(text(), '{filter_name}')]")
                 if date_btn and date_btn.is_displayed():
+                    before = self.page_state(driver)
                     driver.execute_script("arguments[0].click();", date_btn)
-                    time.sleep(4)
+                    self.wait_for_results_change(driver, before)
                     return True
             except:
                 pass
@@ -80,10 +80,7 @@ class ChinaNDRCScraper(BaseScraper):
         while current_page <= max_pages:
             self.log(f"正在爬取第 {current_page} 页...")
 
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            self.scroll_page(driver)
 
             page_source = driver.page_source
             soup = BeautifulSoup(page_source, 'lxml')
@@ -173,6 +170,7 @@ class ChinaNDRCScraper(BaseScraper):
 
     def _click_next_page(self, driver, current_page):
         next_page = current_page + 1
+        before = self.page_state(driver)
 
         try:
             try:
@@ -183,8 +181,7 @@ class ChinaNDRCScraper(BaseScraper):
                         return False
 
                     driver.execute_script("arguments[0].click();", next_btn)
-                    time.sleep(4)
-                    return True
+                    return self.wait_for_results_change(driver, before)
             except:
                 pass
 
@@ -192,8 +189,7 @@ class ChinaNDRCScraper(BaseScraper):
                 next_link = driver.find_element(By.XPATH, f"//a[text()='{next_page}']")
                 if next_link and next_link.is_displayed():
                     driver.execute_script("arguments[0].click();", next_link)
-                    time.sleep(4)
-                    return True
+                    return self.wait_for_results_change(driver, before)
             except:
                 pass
 
@@ -217,7 +213,7 @@ class ChinaNDRCScraper(BaseScraper):
             for kw_idx, keyword in enumerate(keywords, 1):
                 print(f"\n[关键词 {kw_idx}/{len(keywords)}] 搜索: {keyword}", flush=True)
 
-                search_results = self.search_with_selenium(keyword, date_filter=date_filter)
+                search_results = self.search_keyword(keyword, date_filter=date_filter)
 
                 if not search_results:
                     continue
@@ -265,8 +261,6 @@ class ChinaNDRCScraper(BaseScraper):
                     except:
                         continue
 
-                time.sleep(1)
-
         finally:
             self.close_browser()
 
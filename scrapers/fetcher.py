@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+并发抓取
+正文提取、附件下载等逐条请求的任务放到线程池中并发执行，按域名限制并发数和请求间隔，
+整体速度受目标站点的限速约束，而不是逐个串行加载页面
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 同时进行的抓取任务数
+FETCH_WORKERS = int(os.getenv('SCRAPER_FETCH_WORKERS', 6))
+# 同一域名同时进行的请求数
+HOST_CONCURRENCY = int(os.getenv('SCRAPER_HOST_CONCURRENCY', 2))
+# 同一域名相邻两次请求开始的最小间隔（秒）
+HOST_INTERVAL = float(os.getenv('SCRAPER_HOST_INTERVAL', 0.5))
+
+
+class HostLimiter:
+    """按域名限制并发数和请求间隔"""
+
+    def __init__(self, max_per_host=HOST_CONCURRENCY, min_interval=HOST_INTERVAL):
+        self.max_per_host = max(1, max_per_host)
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def _reserve_start(self, host):
+        """预约下一次请求的开始时间，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.min_interval
+            return start - now
+
+    @contextmanager
+    def slot(self, url):
+        """占用 url 所在域名的一个请求名额"""
+        host = urlparse(url).netloc
+        semaphore = self._semaphore(host)
+        with semaphore:
+            delay = self._reserve_start(host)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_host_limiter():
+    """进程内共享的域名限速器（多个爬虫同时访问同一站点时共同受限）"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostLimiter()
+        return _limiter
+
+
+def run_concurrently(tasks, max_workers=FETCH_WORKERS):
+    """
+    并发执行抓取任务
+
+    Args:
+        tasks: [(url, 无参函数)]，函数在 url 所在域名的限速名额内执行
+    Returns:
+        与 tasks 顺序一致的返回值列表；任务抛出异常时对应位置为 None
+    """
+    if not tasks:
+        return []
+    limiter = get_host_limiter()
+
+    def run(url, func):
+        try:
+            with limiter.slot(url):
+                return func()
+        except Exception as e:
+            logger.error(f"抓取任务失败: {url}, {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))),
+                            thread_name_prefix="scraper-fetch") as executor:
+        futures = [executor.submit(run, url, func) for url, func in tasks]
+        return [future.result() for future in futures]
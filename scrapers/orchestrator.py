@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+爬取编排
+把一次爬取计划（多个站点 × 多个关键词）拆成 (站点, 关键词) 搜索任务并发执行，
+再按站点合并结果、按 URL 去重，最后按站点并发提取正文
+
+- 每个搜索任务使用独立的爬虫实例，浏览器从浏览器池借用（同一站点的任务复用已启动的浏览器）
+- 同一站点同时进行的搜索任务数受 CRAWL_SITE_CONCURRENCY 限制，避免对单个站点并发过高
+- 某个任务失败只记录错误，不影响其他关键词和站点；借不到浏览器（浏览器池等待超时）
+  也按失败记录，不会当作「该关键词无结果」
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 同时进行的搜索任务数（需要浏览器的站点还受 BROWSER_POOL_SIZE 限制）
+SEARCH_WORKERS = int(os.getenv('CRAWL_SEARCH_WORKERS', 4))
+# 同一站点同时进行的搜索任务数
+SITE_CONCURRENCY = int(os.getenv('CRAWL_SITE_CONCURRENCY', 2))
+
+
+def merge_results(result_lists):
+    """
+    合并多个关键词的搜索结果，按 URL 去重
+
+    同一 URL 被多个关键词命中时保留第一次出现的结果，合并其 matched_keywords 和 keyword_contexts。
+    """
+    merged = []
+    by_url = {}
+    for results in result_lists:
+        for result in results or []:
+            url = result.get('url', '')
+            existing = by_url.get(url) if url else None
+            if existing is None:
+                result = dict(result)
+                result['matched_keywords'] = list(result.get('matched_keywords', []))
+                result['keyword_contexts'] = list(result.get('keyword_contexts', []))
+                merged.append(result)
+                if url:
+                    by_url[url] = result
+                continue
+            for keyword in result.get('matched_keywords', []):
+                if keyword not in existing['matched_keywords']:
+                    existing['matched_keywords'].append(keyword)
+            known = {c.get('keyword') for c in existing['keyword_contexts']}
+            existing['keyword_contexts'].extend(
+                c for c in result.get('keyword_contexts', []) if c.get('keyword') not in known)
+    return merged
+
+
+class CrawlOrchestrator:
+    """
+    多站点、多关键词并发爬取
+
+    Args:
+        sites: 爬取计划，每项包含 region, department, keywords，可选 section_filter
+        start_date, end_date, date_filter: 与 scrape() 的参数相同，对所有站点生效
+        fetch_content: 是否提取正文和附件
+    """
+
+    def __init__(self, sites, start_date, end_date=None, date_filter=None, fetch_content=True,
+                 max_workers=SEARCH_WORKERS, site_concurrency=SITE_CONCURRENCY):
+        self.sites = sites
+        self.start_date = start_date
+        self.end_date = end_date
+        self.date_filter = date_filter
+        self.fetch_content = fetch_content
+        self.max_workers = max(1, max_workers)
+        self.site_concurrency = max(1, site_concurrency)
+        self._lock = threading.Lock()
+        self._done = 0
+        self._failed = 0
+
+    @staticmethod
+    def site_label(site):
+        return f"{site['region']}-{site['department']}"
+
+    def _search(self, scraper_class, site, keyword, site_semaphore, progress):
+        """执行一个 (站点, 关键词) 搜索任务，返回该关键词的结果列表"""
+        label = f"{self.site_label(site)}: {keyword}"
+        error = None
+        results = []
+        with site_semaphore:
+            if progress is None or not progress.cancel_requested:
+                scraper = scraper_class()
+                try:
+                    # 正文在合并去重后统一提取，避免多个关键词命中同一篇文章时重复下载
+                    results = scraper.scrape(
+                        keywords=[keyword],
+                        start_date=self.start_date,
+                        end_date=self.end_date,
+                        date_filter=self.date_filter,
+                        section_filter=site.get('section_filter') or 'all',
+                        fetch_content=False,
+                    ) or []
+                    if scraper.browser_error:
+                        raise RuntimeError(scraper.browser_error)
+                except Exception as e:
+                    logger.error(f"搜索任务失败: {label}, {e}")
+                    error = f"{keyword}: {e}"
+                finally:
+                    scraper.close_browser()
+
+        with self._lock:
+            self._done += 1
+            if error:
+                self._failed += 1
+            if progress is not None:
+                progress.update(current=self._done, success=self._done - self._failed,
+                                failed=self._failed, current_file=label)
+        return results, error
+
+    def _fetch_contents(self, scraper_class, results):
+        """提取一个站点合并后结果的正文和附件"""
+        scraper = scraper_class()
+        try:
+            scraper.fetch_article_contents(results, content_selectors=scraper.CONTENT_SELECTORS,
+                                           extract_attachments=True)
+        finally:
+            scraper.close_browser()
+
+    def run(self, progress=None):
+        """
+        执行爬取计划
+
+        Args:
+            progress: 可选的进度对象（core.jobs.JobProgress），用于汇报进度和响应取消
+        Returns:
+            按计划顺序的站点结果列表，每项包含 region, department, keywords, results, errors
+        """
+        from scrapers import get_scraper
+
+        outcomes = []
+        site_tasks = []
+        for site in self.sites:
+            outcome = dict(site, results=[], errors=[])
+            outcomes.append(outcome)
+            scraper_class = get_scraper(site['region'], site['department'])
+            if not scraper_class:
+                outcome['errors'].append(f"未找到 {self.site_label(site)} 对应的爬虫")
+                continue
+            outcome['scraper_class'] = scraper_class
+            semaphore = threading.BoundedSemaphore(self.site_concurrency)
+            site_tasks.append([(outcome, scraper_class, keyword, semaphore) for keyword in site['keywords']])
+
+        # 按站点轮流排列任务，避免线程池被同一站点的任务占满、在站点并发限制上空等
+        tasks = [site[i] for i in range(max((len(s) for s in site_tasks), default=0))
+                 for site in site_tasks if i < len(site)]
+
+        if progress is not None:
+            progress.start(len(tasks))
+        logger.info(f"开始并发爬取: {len(outcomes)} 个站点, {len(tasks)} 个搜索任务")
+
+        # 各站点的搜索结果，按关键词顺序合并，使结果顺序不受任务完成先后影响
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tasks) or 1)),
+                                thread_name_prefix="crawl-search") as executor:
+            futures = [(outcome, executor.submit(self._search, scraper_class, outcome, keyword, semaphore, progress))
+                       for outcome, scraper_class, keyword, semaphore in tasks]
+            keyword_results = {}
+            for outcome, future in futures:
+                results, error = future.result()
+                keyword_results.setdefault(id(outcome), []).append(results)
+                if error:
+                    outcome['errors'].append(error)
+
+        for outcome in outcomes:
+            outcome['results'] = merge_results(keyword_results.get(id(outcome), []))
+            logger.info(f"{self.site_label(outcome)}: 合并去重后 {len(outcome['results'])} 条结果")
+
+        cancelled = progress is not None and progress.cancel_requested
+        to_fetch = [o for o in outcomes
+                    if o['results'] and o.get('scraper_class') and o['scraper_class'].CONTENT_SELECTORS]
+        if self.fetch_content and to_fetch and not cancelled:
+            if progress is not None:
+                progress.update(current_file="提取正文和附件")
+            # 各站点的正文提取并发进行，站点内部的请求由 scrapers.fetcher 按域名限速
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(to_fetch)),
+                                    thread_name_prefix="crawl-content") as executor:
+                futures = [(o, executor.submit(self._fetch_contents, o['scraper_class'], o['results']))
+                           for o in to_fetch]
+                for outcome, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"提取正文失败: {self.site_label(outcome)}, {e}")
+                        outcome['errors'].append(f"提取正文失败: {e}")
+
+        for outcome in outcomes:
+            outcome.pop('scraper_class', None)
+        return outcomes
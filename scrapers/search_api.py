@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+搜索接口后端
+部分站点的搜索页通过 XHR 请求 JSON 接口渲染结果，直接用 requests 调用这些接口，
+按参数翻页，不必启动浏览器点击筛选和「下一页」
+
+- 复用爬虫的 requests.Session（请求头、cookie 与爬虫一致）
+- 每个后端固定接口地址、请求参数和结果列表在 JSON 中的路径，返回结构与预期不符时
+  抛出 SearchAPIError，由 BaseScraper.search_keyword 回退到 Selenium
+- 只有对照站点真实请求核实过的后端才登记到 SEARCH_API_BACKENDS
+"""
+
+import os
+import re
+import logging
+from datetime import datetime
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+
+# 设为 false 时所有站点都直接使用 Selenium
+SEARCH_API_ENABLED = os.getenv('SCRAPER_SEARCH_API', 'true').lower() not in ('0', 'false', 'no')
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+class SearchAPIError(Exception):
+    """搜索接口不可用（需要回退到 Selenium）"""
+
+
+class SearchAPIEmpty(SearchAPIError):
+    """接口第一页没有结果"""
+
+
+def _format_date(value):
+    """接口中的日期可能是字符串或毫秒时间戳"""
+    if value in (None, ''):
+        return ''
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit() and len(value) >= 10):
+        timestamp = int(value)
+        if timestamp > 10 ** 11:
+            timestamp //= 1000
+        try:
+            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        except (OverflowError, OSError, ValueError):
+            return ''
+    return str(value).strip()
+
+
+class SearchAPIBackend:
+    """搜索接口后端基类，子类提供接口地址和请求参数"""
+
+    endpoint = ""
+    method = "GET"
+    page_size = 20
+    max_pages = 50
+    timeout = 20
+    # 是否校验 HTTPS 证书：只有证书链有问题、且确认过接口地址的站点才在子类中关闭
+    verify_ssl = True
+    # 结果列表在返回 JSON 中的路径
+    records_path = ()
+    # 结果字段名：title、url 必填，date、content 可选
+    fields = {"title": "title", "url": "url", "date": "", "content": ""}
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.session = scraper.session
+
+    def build_params(self, keyword, page, date_filter=None, section_filter='all'):
+        """第 page 页（从 1 开始）的请求参数"""
+        raise NotImplementedError("子类必须实现 build_params 方法")
+
+    def request_headers(self):
+        return {
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "X-Requested-With": "XMLHttpRequest",
+            "Referer": self.scraper.base_url + "/",
+        }
+
+    def fetch(self, params):
+        """请求一页结果，返回解析后的 JSON"""
+        try:
+            if self.method == "POST":
+                response = self.session.post(self.endpoint, json=params, headers=self.request_headers(),
+                                             timeout=self.timeout, verify=self.verify_ssl)
+            else:
+                response = self.session.get(self.endpoint, params=params, headers=self.request_headers(),
+                                            timeout=self.timeout, verify=self.verify_ssl)
+            response.raise_for_status()
+            return response.json()
+        except ValueError as e:
+            raise SearchAPIError(f"搜索接口返回的不是 JSON: {e}")
+        except Exception as e:
+            raise SearchAPIError(f"搜索接口请求失败: {e}")
+
+    def extract_records(self, data):
+        """
+        按 records_path 取出结果列表
+
+        Raises:
+            SearchAPIError: 路径不存在，或列表中的记录缺少标题、链接字段（接口地址或返回格式不对）
+        """
+        node = data
+        for key in self.records_path:
+            if not isinstance(node, dict) or key not in node:
+                raise SearchAPIError(f"返回结构与预期不符: 缺少 {'.'.join(self.records_path)}")
+            node = node[key]
+        if node is None:
+            return []
+        if not isinstance(node, list):
+            raise SearchAPIError(f"返回结构与预期不符: {'.'.join(self.records_path)} 不是列表")
+        title_key, url_key = self.fields["title"], self.fields["url"]
+        for record in node:
+            if not isinstance(record, dict) or not record.get(title_key) or not record.get(url_key):
+                raise SearchAPIError(f"返回结构与预期不符: 记录缺少 {title_key} 或 {url_key} 字段")
+        return node
+
+    def to_result(self, record):
+        """把接口返回的一条记录转换成与 Selenium 搜索相同的结构"""
+        href = str(record[self.fields["url"]]).strip()
+        if href.startswith('//'):
+            href = 'https:' + href
+        elif not href.startswith('http'):
+            href = urljoin(self.scraper.base_url + '/', href)
+        date_key, content_key = self.fields.get("date"), self.fields.get("content")
+        return {
+            "title": TAG_PATTERN.sub('', str(record[self.fields["title"]])).strip() or "无标题",
+            "url": href,
+            "date": _format_date(record.get(date_key)) if date_key else '',
+            "content": TAG_PATTERN.sub('', str(record.get(content_key) or '')).strip() if content_key else '',
+        }
+
+    def search(self, keyword, date_filter=None, section_filter='all'):
+        """
+        按参数逐页请求，直到某页结果不足一页或没有新结果
+
+        Returns:
+            搜索结果列表，每项包含 title, url, date, content
+        Raises:
+            SearchAPIError: 接口不可用、返回结构与预期不符或第一页没有结果
+        """
+        results = []
+        seen_urls = set()
+        for page in range(1, self.max_pages + 1):
+            try:
+                data = self.fetch(self.build_params(keyword, page, date_filter, section_filter))
+            except SearchAPIError as e:
+                if page == 1:
+                    raise
+                # 已取到部分结果时不再回退，保留已有结果
+                self.scraper.log(f"[接口] 第 {page} 页请求失败，停止翻页: {e}", "error")
+                break
+            try:
+                records = self.extract_records(data)
+            except SearchAPIError as e:
+                if page == 1:
+                    raise
+                self.scraper.log(f"[接口] 第 {page} 页{e}，停止翻页", "error")
+                break
+            if page == 1 and not records:
+                raise SearchAPIEmpty("搜索接口第一页没有结果")
+
+            new_count = 0
+            for record in records:
+                result = self.to_result(record)
+                if result["url"] in seen_urls:
+                    continue
+                seen_urls.add(result["url"])
+                results.append(result)
+                new_count += 1
+
+            self.scraper.log(f"[接口] 第 {page} 页提取到 {new_count} 条结果，累计 {len(results)} 条")
+            if new_count == 0 or len(records) < self.page_size:
+                break
+            self.scraper.pause_between_requests()
+        return results
+
+
+# 爬虫类名 -> 搜索接口后端
+# 只登记接口地址、参数和返回路径都已对照站点真实 XHR 请求核实过的后端（并附真实返回的测试样例）
+SEARCH_API_BACKENDS = {}
+
+
+def get_search_api(scraper):
+    """获取爬虫对应的搜索接口后端，未配置或已禁用时返回 None"""
+    if not SEARCH_API_ENABLED:
+        return None
+    backend_class = SEARCH_API_BACKENDS.get(type(scraper).__name__)
+    return backend_class(scraper) if backend_class else None
@@ -5,7 +5,6 @@
 搜索页面: https://fgw.sh.gov.cn/websearch/#search/query=关键词
 """
 
-import time
 from datetime import datetime
 from urllib.parse import quote, urljoin
 from bs4 import BeautifulSoup
@@ -20,6 +19,9 @@ class ShanghaiFGWScraper(BaseScraper):
     name = "上海市发展和改革委员会"
     base_url = "https://fgw.sh.gov.cn"
 
+    WAIT_CONFIG = {"results_selector": "div.maya-result-item"}
+    CONTENT_SELECTORS = ['#ivs_content', '.xxgk_content_nr', '.article-content']
+
     DATE_FILTER_OPTIONS = {
         "all": "不限时间",
         "3d": "最近3天",
@@ -50,11 +52,10 @@ class ShanghaiFGWScraper(BaseScraper):
         try:
             driver.get(search_url)
             self.log("页面加载中，等待搜索结果...")
-            time.sleep(5)
+            self.wait_for_results(driver)
 
             if date_filter:
                 self._click_date_filter(driver, date_filter)
-                time.sleep(2)
 
             if section_filter and section_filter != 'all':
                 section_name = self.SECTION_OPTIONS.get(section_filter, section_filter)
@@ -76,13 +77,13 @@ class ShanghaiFGWScraper(BaseScraper):
         self.log(f"尝试点击时间筛选按钮: {filter_name}")
 
         try:
-            time.sleep(2)
             try:
                 date_btn = driver.find_element(By.CSS_SELECTOR, f'a[search-date-range="{date_filter}"]')
                 if date_btn and date_btn.is_displayed():
+                    before = self.page_state(driver)
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return True
             except:
                 pass
@@ -90,9 +91,10 @@ class ShanghaiFGWScraper(BaseScraper):
             try:
                 date_btn = driver.find_element(By.XPATH, f'//a[@search-date-range="{date_filter}"]')
                 if date_btn and date_btn.is_displayed():
+                    before = self.page_state(driver)
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 通过XPath成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return True
             except:
                 pass
@@ -116,7 +118,6 @@ class ShanghaiFGWScraper(BaseScraper):
                 return False
 
         try:
-            time.sleep(1)
             if check_active():
                 self.log(f"板块 {section_name} 已激活")
                 return True
@@ -124,15 +125,13 @@ class ShanghaiFGWScraper(BaseScraper):
             from selenium.webdriver.common.action_chains import ActionChains
             element = driver.find_element(By.CSS_SELECTOR, f'li[view-code="{section_filter}"]')
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.3)
+            before = self.page_state(driver)
             ActionChains(driver).move_to_element(element).click().perform()
 
-            for i in range(3):
-                time.sleep(1)
-                if check_active():
-                    self.log(f"✓ 板块 {section_name} 已激活")
-                    time.sleep(2)
-                    return True
+            if self.wait_until(check_active, timeout=3):
+                self.log(f"✓ 板块 {section_name} 已激活")
+                self.wait_for_results_change(driver, before)
+                return True
 
             return False
 
@@ -149,10 +148,7 @@ class ShanghaiFGWScraper(BaseScraper):
         while current_page <= max_pages:
             self.log(f"正在爬取第 {current_page} 页...")
 
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            self.scroll_page(driver)
 
             page_source = driver.page_source
             soup = BeautifulSoup(page_source, 'lxml')
@@ -225,9 +221,10 @@ class ShanghaiFGWScraper(BaseScraper):
         try:
             next_btn = driver.find_element(By.CSS_SELECTOR, 'span[title="下一页"]')
             if next_btn and next_btn.is_displayed():
+                before = self.page_state(driver)
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-                return True
+                # 结果列表未刷新说明已是最后一页
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -248,7 +245,7 @@ class ShanghaiFGWScraper(BaseScraper):
             for kw_idx, keyword in enumerate(keywords, 1):
                 print(f"\n[关键词 {kw_idx}/{len(keywords)}] 搜索: {keyword}", flush=True)
 
-                search_results = self.search_with_selenium(keyword, date_filter=date_filter, section_filter=section_filter)
+                search_results = self.search_keyword(keyword, date_filter=date_filter, section_filter=section_filter)
 
                 if not search_results:
                     continue
@@ -306,14 +303,12 @@ class ShanghaiFGWScraper(BaseScraper):
                     except Exception as e:
                         continue
 
-                time.sleep(1)
-
             if results and fetch_content:
                 print("\n开始提取正文内容和附件...")
                 skipped_quotes_count = 0
-                for idx, result in enumerate(results, 1):
+                to_fetch = []
+                for result in results:
                     title = result.get("title", "")
-                    url = result.get("url", "")
 
                     # 检查标题是否包含书名号
                     if '《' not in title or '》' not in title:
@@ -321,23 +316,14 @@ class ShanghaiFGWScraper(BaseScraper):
                         result["full_content"] = ""
                         result["attachments"] = []
                         continue
-
-                    if url:
-                        print(f"[{idx}/{len(results)}] 提取正文: {title[:50]}...")
-                        content_result = self.extract_article_content(
-                            url,
-                            content_selectors=['#ivs_content', '.xxgk_content_nr', '.article-content'],
-                            extract_attachments=True
-                        )
-
-                        if isinstance(content_result, dict):
-                            result["full_content"] = content_result.get("content", "")
-                            result["attachments"] = content_result.get("attachments", [])
-                        else:
-                            result["full_content"] = content_result
-                            result["attachments"] = []
-
-                        time.sleep(1)
+                    to_fetch.append(result)
+
+                # 并发提取正文和附件（按站点限速）
+                self.fetch_article_contents(
+                    to_fetch,
+                    content_selectors=self.CONTENT_SELECTORS,
+                    extract_attachments=True
+                )
 
         finally:
             self.close_browser()
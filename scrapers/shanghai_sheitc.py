@@ -13,7 +13,6 @@
 - 下一页按钮: <span title="下一页">»</span>
 """
 
-import time
 from datetime import datetime
 from urllib.parse import quote, urljoin
 from bs4 import BeautifulSoup
@@ -28,6 +27,10 @@ class ShanghaiSHEITCScraper(BaseScraper):
     name = "上海市经济和信息化委员会"
     base_url = "https://mhapi.sheitc.sh.gov.cn"
 
+    # 等待搜索结果条目出现、翻页后条目刷新
+    WAIT_CONFIG = {"results_selector": "div.maya-result-item"}
+    CONTENT_SELECTORS = ['#ivs_content', '.xxgk_content_nr', 'div.xxgk_content_nr', '.article-content']
+
     # 时间筛选选项映射
     DATE_FILTER_OPTIONS = {
         "3d": "最近3天",
@@ -73,13 +76,12 @@ class ShanghaiSHEITCScraper(BaseScraper):
             driver.get(search_url)
             self.log("页面加载中，等待搜索结果...")
 
-            # 等待页面加载
-            time.sleep(5)
+            # 等待搜索结果出现
+            self.wait_for_results(driver)
 
             # 先点击时间筛选，再点击板块筛选
             if date_filter:
                 self._click_date_filter(driver, date_filter)
-                time.sleep(2)
 
             # 如果指定了板块筛选，最后点击板块
             if section_filter and section_filter != 'all':
@@ -106,7 +108,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
         self.log(f"尝试点击时间筛选按钮: {filter_name}")
 
         try:
-            time.sleep(2)
+            before = self.page_state(driver)
 
             # 方法1: CSS选择器
             try:
@@ -115,7 +117,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
                     self.log(f"找到时间筛选按钮，尝试点击...")
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return True
             except Exception as e1:
                 self.log(f"CSS选择器方式失败: {e1}")
@@ -126,7 +128,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 if date_btn and date_btn.is_displayed():
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 通过XPath成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return True
             except Exception as e2:
                 self.log(f"XPath方式失败: {e2}")
@@ -141,7 +143,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 clicked = driver.execute_script(js_code)
                 if clicked:
                     self.log(f"✓ 通过JavaScript成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return True
                 else:
                     self.log(f"JavaScript未找到按钮")
@@ -169,8 +171,6 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 return False
 
         try:
-            time.sleep(1)
-
             # 如果已激活，直接返回
             if check_active():
                 self.log(f"板块 {section_name} 已激活")
@@ -180,16 +180,14 @@ class ShanghaiSHEITCScraper(BaseScraper):
             from selenium.webdriver.common.action_chains import ActionChains
             element = driver.find_element(By.CSS_SELECTOR, f'li[view-code="{section_filter}"]')
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.3)
+            before = self.page_state(driver)
             ActionChains(driver).move_to_element(element).click().perform()
 
             # 等待active状态变化
-            for i in range(3):
-                time.sleep(1)
-                if check_active():
-                    self.log(f"✓ 板块 {section_name} 已激活")
-                    time.sleep(2)  # 等待AJAX加载
-                    return True
+            if self.wait_until(check_active, timeout=3):
+                self.log(f"✓ 板块 {section_name} 已激活")
+                self.wait_for_results_change(driver, before)  # 等待AJAX加载
+                return True
 
             self.log(f"[警告] 板块切换未成功", "warning")
             return False
@@ -209,10 +207,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
             self.log(f"正在爬取第 {current_page} 页...")
 
             # 滚动页面确保内容加载
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            self.scroll_page(driver)
 
             # 获取当前页面源码并解析
             page_source = driver.page_source
@@ -295,15 +290,16 @@ class ShanghaiSHEITCScraper(BaseScraper):
         }
 
     def _click_next_page(self, driver):
-        """点击下一页按钮，返回是否成功"""
+        """点击下一页按钮，返回是否成功（点击后结果列表未刷新视为已到最后一页）"""
+        before = self.page_state(driver)
+
         # 方法1: CSS选择器
         try:
             next_btn = driver.find_element(By.CSS_SELECTOR, 'span[title="下一页"]')
             if next_btn and next_btn.is_displayed():
                 self.log(f"找到下一页按钮，点击翻页...")
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-                return True
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -313,8 +309,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
             if next_btn and next_btn.is_displayed():
                 self.log(f"通过XPath找到下一页按钮，点击翻页...")
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-                return True
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -328,8 +323,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
             clicked = driver.execute_script(js_code)
             if clicked:
                 self.log(f"通过JavaScript点击下一页按钮...")
-                time.sleep(3)
-                return True
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -372,7 +366,7 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 print("-"*50, flush=True)
 
                 # 使用Selenium搜索（传递板块筛选参数）
-                search_results = self.search_with_selenium(keyword, date_filter=date_filter, section_filter=section_filter)
+                search_results = self.search_keyword(keyword, date_filter=date_filter, section_filter=section_filter)
 
                 if not search_results:
                     self.log(f"关键词 '{keyword}' 未找到搜索结果")
@@ -446,9 +440,6 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 if skipped_by_date > 0:
                     self.log(f"因日期不在范围内跳过: {skipped_by_date} 条")
 
-                # 关键词之间稍作等待
-                time.sleep(1)
-
             # 提取所有结果的正文内容和附件
             if results and fetch_content:
                 print("\n" + "="*60, flush=True)
@@ -456,9 +447,9 @@ class ShanghaiSHEITCScraper(BaseScraper):
                 print("="*60, flush=True)
 
                 skipped_quotes_count = 0
-                for idx, result in enumerate(results, 1):
+                to_fetch = []
+                for result in results:
                     title = result.get("title", "")
-                    url = result.get("url", "")
 
                     # 检查标题是否包含书名号
                     if '《' not in title or '》' not in title:
@@ -466,31 +457,21 @@ class ShanghaiSHEITCScraper(BaseScraper):
                         result["full_content"] = ""
                         result["attachments"] = []
                         continue
-
-                    if url:
-                        print(f"\n[{idx}/{len(results)}] 提取正文: {title[:50]}...", flush=True)
-                        # 上海市经信委网站的内容选择器，同时提取附件
-                        content_result = self.extract_article_content(
-                            url,
-                            content_selectors=['#ivs_content', '.xxgk_content_nr', 'div.xxgk_content_nr', '.article-content'],
-                            extract_attachments=True
-                        )
-
-                        # 处理返回结果（可能是字符串或字典）
-                        if isinstance(content_result, dict):
-                            result["full_content"] = content_result.get("content", "")
-                            result["attachments"] = content_result.get("attachments", [])
-                        else:
-                            result["full_content"] = content_result
-                            result["attachments"] = []
-
-                        # 如果有附件，打印信息
-                        if result.get("attachments"):
-                            print(f"    找到 {len(result['attachments'])} 个附件:", flush=True)
-                            for att in result["attachments"]:
-                                print(f"      - {att.get('name', '未知')} ({att.get('file_type', '未知类型')})", flush=True)
-
-                        time.sleep(1)  # 避免请求过快
+                    to_fetch.append(result)
+
+                # 并发提取正文和附件（按站点限速）
+                self.fetch_article_contents(
+                    to_fetch,
+                    content_selectors=self.CONTENT_SELECTORS,
+                    extract_attachments=True
+                )
+
+                # 打印找到的附件
+                for result in to_fetch:
+                    if result.get("attachments"):
+                        print(f"  {result.get('title', '')[:50]}: 找到 {len(result['attachments'])} 个附件", flush=True)
+                        for att in result["attachments"]:
+                            print(f"      - {att.get('name', '未知')} ({att.get('file_type', '未知类型')})", flush=True)
             elif results and not fetch_content:
                 print("\n" + "="*60, flush=True)
                 print("  跳过提取正文内容（用户未勾选）", flush=True)
@@ -5,7 +5,6 @@
 搜索页面: https://stcsm.sh.gov.cn/searchAll/index.html#search/query=关键词
 """
 
-import time
 from datetime import datetime
 from urllib.parse import quote, urljoin
 from bs4 import BeautifulSoup
@@ -20,6 +19,9 @@ class ShanghaiSTCSMScraper(BaseScraper):
     name = "上海市科学技术委员会"
     base_url = "https://stcsm.sh.gov.cn"
 
+    WAIT_CONFIG = {"results_selector": "div.maya-result-item"}
+    CONTENT_SELECTORS = ['#ivs_content', '.xxgk_content_nr', 'div.xxgk_content_nr']
+
     DATE_FILTER_OPTIONS = {
         "3d": "最近3天",
         "7d": "最近7天",
@@ -53,11 +55,10 @@ class ShanghaiSTCSMScraper(BaseScraper):
                 return results
 
             self.log("页面加载完成，等待搜索结果...")
-            time.sleep(3)
+            self.wait_for_results(driver)
 
             if date_filter:
                 self._click_date_filter(driver, date_filter)
-                time.sleep(3)
 
             if section_filter and section_filter != 'all':
                 section_name = self.SECTION_OPTIONS.get(section_filter, section_filter)
@@ -88,7 +89,6 @@ class ShanghaiSTCSMScraper(BaseScraper):
                 return False
 
         try:
-            time.sleep(1)
             if check_active():
                 self.log(f"板块 {section_name} 已激活")
                 return True
@@ -96,15 +96,13 @@ class ShanghaiSTCSMScraper(BaseScraper):
             from selenium.webdriver.common.action_chains import ActionChains
             element = driver.find_element(By.CSS_SELECTOR, f'li[view-code="{section_filter}"]')
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.3)
+            before = self.page_state(driver)
             ActionChains(driver).move_to_element(element).click().perform()
 
-            for i in range(3):
-                time.sleep(1)
-                if check_active():
-                    self.log(f"✓ 板块 {section_name} 已激活")
-                    time.sleep(2)
-                    return True
+            if self.wait_until(check_active, timeout=3):
+                self.log(f"✓ 板块 {section_name} 已激活")
+                self.wait_for_results_change(driver, before)
+                return True
 
             self.log(f"[警告] 板块切换可能未成功", "warning")
             return False
@@ -118,13 +116,13 @@ class ShanghaiSTCSMScraper(BaseScraper):
         self.log(f"尝试点击时间筛选按钮: {filter_name}")
 
         try:
-            time.sleep(2)
+            before = self.page_state(driver)
             try:
                 date_btn = driver.find_element(By.CSS_SELECTOR, f'a[search-date-range="{date_filter}"]')
                 if date_btn:
                     driver.execute_script("arguments[0].click();", date_btn)
                     self.log(f"✓ 成功点击时间筛选按钮: {filter_name}")
-                    time.sleep(3)
+                    self.wait_for_results_change(driver, before)
                     return
             except Exception as e1:
                 self.log(f"CSS选择器方式失败: {e1}")
@@ -133,7 +131,7 @@ class ShanghaiSTCSMScraper(BaseScraper):
                 date_btn = driver.find_element(By.XPATH, f'//a[@search-date-range="{date_filter}"]')
                 driver.execute_script("arguments[0].click();", date_btn)
                 self.log(f"✓ 通过XPath成功点击时间筛选按钮: {filter_name}")
-                time.sleep(3)
+                self.wait_for_results_change(driver, before)
                 return
             except Exception as e2:
                 self.log(f"XPath方式失败: {e2}")
@@ -150,10 +148,7 @@ class ShanghaiSTCSMScraper(BaseScraper):
         while current_page <= max_pages:
             self.log(f"正在爬取第 {current_page} 页...")
 
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            self.scroll_page(driver)
 
             page_source = driver.page_source
             soup = BeautifulSoup(page_source, 'lxml')
@@ -217,12 +212,12 @@ class ShanghaiSTCSMScraper(BaseScraper):
         }
 
     def _click_next_page(self, driver):
+        before = self.page_state(driver)
         try:
             next_btn = driver.find_element(By.CSS_SELECTOR, 'span[title="下一页"]')
             if next_btn and next_btn.is_displayed():
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-                return True
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -230,8 +225,7 @@ class ShanghaiSTCSMScraper(BaseScraper):
             next_btn = driver.find_element(By.XPATH, '//span[@title="下一页"]')
             if next_btn and next_btn.is_displayed():
                 driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-                return True
+                return self.wait_for_results_change(driver, before)
         except:
             pass
 
@@ -252,7 +246,7 @@ class ShanghaiSTCSMScraper(BaseScraper):
             for kw_idx, keyword in enumerate(keywords, 1):
                 print(f"\n[关键词 {kw_idx}/{len(keywords)}] 搜索: {keyword}", flush=True)
 
-                search_results = self.search_with_selenium(keyword, date_filter=date_filter, section_filter=section_filter)
+                search_results = self.search_keyword(keyword, date_filter=date_filter, section_filter=section_filter)
 
                 if not search_results:
                     continue
@@ -310,31 +304,15 @@ class ShanghaiSTCSMScraper(BaseScraper):
                     except Exception as e:
                         continue
 
-                time.sleep(1)
-
             if results and fetch_content:
                 print(f"\n开始提取正文内容（已筛选 {len(results)} 条含书名号的政策）...")
 
-                for idx, result in enumerate(results, 1):
-                    url = result.get("url", "")
-                    title = result.get("title", "")
-
-                    if url:
-                        print(f"[{idx}/{len(results)}] 提取正文: {title[:50]}...")
-                        content_result = self.extract_article_content(
-                            url,
-                            content_selectors=['#ivs_content', '.xxgk_content_nr', 'div.xxgk_content_nr'],
-                            extract_attachments=True
-                        )
-
-                        if isinstance(content_result, dict):
-                            result["full_content"] = content_result.get("content", "")
-                            result["attachments"] = content_result.get("attachments", [])
-                        else:
-                            result["full_content"] = content_result
-                            result["attachments"] = []
-
-                        time.sleep(1)
+                # 并发提取正文和附件（按站点限速）
+                self.fetch_article_contents(
+                    results,
+                    content_selectors=self.CONTENT_SELECTORS,
+                    extract_attachments=True
+                )
 
         finally:
             self.close_browser()
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""测试公共夹具"""
+
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """使用临时 SQLite 数据库，不影响 data/policy_docs.db"""
+    import backend.database as database
+
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+    yield database
+    database.close_connection()
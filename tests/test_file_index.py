@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""目录列表索引：分页、排序、筛选和索引刷新"""
+
+import os
+
+import pytest
+
+from backend.services.file_index import FileIndex
+
+
+RESULTS = {
+    "甲_分析结果_58.0.md": 1000,
+    "乙_分析结果_90.md": 2000,
+    "丙_分析结果_75.5.md": 3000,
+    "丁_分析结果_60.md": 4000,
+    "说明.md": 5000,
+}
+
+
+def make_files(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, mtime in names.items():
+        path = directory / name
+        path.write_text("x", encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+
+def list_all_pages(root_name, root, limit, **options):
+    pages = []
+    cursor = None
+    while True:
+        listing = FileIndex.list_directory(root_name, str(root), limit=limit, cursor=cursor, **options)
+        pages.append(listing["files"])
+        cursor = listing["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def results_dir(tmp_path, db):
+    root = tmp_path / "analyze_result"
+    make_files(root, RESULTS)
+    (root / "子目录").mkdir()
+    (root / "忽略.txt").write_text("x", encoding="utf-8")
+    return root
+
+
+def test_score_pages_cover_every_file_once(results_dir):
+    pages = list_all_pages("analyze_result", results_dir, 2, sort="score", descending=True)
+
+    # 没有分数的文件按 -1 排在最后
+    assert pages == [
+        ["乙_分析结果_90.md", "丙_分析结果_75.5.md"],
+        ["丁_分析结果_60.md", "甲_分析结果_58.0.md"],
+        ["说明.md"],
+    ]
+
+
+def test_first_page_has_folders_and_total(results_dir):
+    first = FileIndex.list_directory("analyze_result", str(results_dir), limit=2, sort="date", descending=True)
+    second = FileIndex.list_directory("analyze_result", str(results_dir), limit=2, sort="date", descending=True,
+                                      cursor=first["nextCursor"])
+
+    assert first["files"] == ["说明.md", "丁_分析结果_60.md"]
+    assert first["folders"] == ["子目录"]
+    assert first["total"] == 5
+    assert second["files"] == ["丙_分析结果_75.5.md", "乙_分析结果_90.md"]
+    assert "folders" not in second and "total" not in second
+
+
+def test_keyword_and_min_score_filters(results_dir):
+    listing = FileIndex.list_directory("analyze_result", str(results_dir), keyword="分析结果", min_score=60,
+                                       sort="score", descending=True)
+
+    assert listing["files"] == ["乙_分析结果_90.md", "丙_分析结果_75.5.md", "丁_分析结果_60.md"]
+    assert listing["total"] == 3
+
+
+def test_policy_documents_do_not_parse_scores(tmp_path, db):
+    root = tmp_path / "policy_document"
+    make_files(root, {"通知_2024.md": 1000, "意见.md": 2000})
+
+    listing = FileIndex.list_directory("policy_document", str(root), sort="date", descending=True)
+    assert listing["files"] == ["意见.md", "通知_2024.md"]
+    assert all(row["score"] is None for row in db.get_dir_index_entries("policy_document", ""))
+
+    with pytest.raises(ValueError):
+        FileIndex.parse_args({"sort": "score"}, sort_fields=("title", "date"))
+
+
+def test_in_place_rewrite_refreshes_date_order(results_dir):
+    assert FileIndex.list_directory("analyze_result", str(results_dir), sort="date")["files"][0] == "甲_分析结果_58.0.md"
+
+    # 原地改写不会改变目录 mtime
+    dir_mtime = os.stat(results_dir).st_mtime_ns
+    os.utime(results_dir / "甲_分析结果_58.0.md", (9000, 9000))
+    assert os.stat(results_dir).st_mtime_ns == dir_mtime
+
+    assert FileIndex.list_directory("analyze_result", str(results_dir), sort="date")["files"][-1] == "甲_分析结果_58.0.md"
+    assert not FileIndex.refresh("analyze_result", str(results_dir), "")
+
+
+def test_invalid_cursor_and_path(results_dir):
+    with pytest.raises(ValueError):
+        FileIndex.list_directory("analyze_result", str(results_dir), limit=2, cursor="not-a-cursor")
+    assert FileIndex.list_directory("analyze_result", str(results_dir), rel_path="../..") is None
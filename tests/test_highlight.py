@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""高亮段落匹配：字面量自动机和逐段匹配"""
+
+import random
+
+from core.highlight import LiteralAutomaton, ParagraphMatcher, find_matching_paragraph
+
+
+def brute_force(words, text):
+    return {w for w in set(words) if w and w in text}
+
+
+def test_automaton_finds_overlapping_and_nested_literals():
+    words = ["he", "she", "his", "hers", "检测", "检测认证", "认证"]
+    automaton = LiteralAutomaton(words)
+
+    assert automaton.find_all("ushers") == {"he", "she", "hers"}
+    assert automaton.find_all("第三方检测认证机构") == {"检测", "检测认证", "认证"}
+    assert automaton.find_all("") == set()
+
+
+def test_automaton_matches_brute_force():
+    rng = random.Random(7)
+    alphabet = "检测认证计量标准质量"
+    for _ in range(50):
+        words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(30)]
+        text = "".join(rng.choice(alphabet) for _ in range(200))
+        assert LiteralAutomaton(words).find_all(text) == brute_force(words, text)
+
+
+def make_highlights(count):
+    highlights = []
+    for i in range(count):
+        highlights.append({
+            "text": f"第{i}条 支持检验检测机构开展第{i}项认证服务，推动质量基础设施建设。",
+            "score": i % 100,
+            "keywords": [f"事项{i}甲", f"事项{i}乙", "检验检测"],
+        })
+    return highlights
+
+
+def test_long_document_maps_paragraphs_to_best_highlight():
+    highlights = make_highlights(2000)
+    # 同一段落对应多条高亮时取评分高的
+    highlights.append({"text": highlights[21]["text"], "score": 99, "keywords": []})
+    matcher = ParagraphMatcher(highlights)
+
+    paragraphs = []
+    expected = []
+    for i in range(0, 2000, 7):
+        # 精确匹配
+        best = 2000 if i == 21 else i
+        paragraphs.append(highlights[i]["text"])
+        expected.append(best)
+        # 原文段落包含高亮段落
+        paragraphs.append("前言。" + highlights[i]["text"] + "后记。")
+        expected.append(best)
+        # 关键词匹配（至少 2 个）
+        paragraphs.append(f"本段提到事项{i}甲和事项{i}乙。")
+        expected.append(i)
+        # 不相关的段落
+        paragraphs.append(f"无关段落 {i}")
+        expected.append(-1)
+
+    assert [matcher.match(p) for p in paragraphs] == expected
+    # 高亮段落包含原文段落
+    assert matcher.match(highlights[10]["text"][:20]) == 10
+
+
+def test_matcher_agrees_with_first_match_on_unique_hits():
+    highlights = make_highlights(50)
+    matcher = ParagraphMatcher(highlights)
+    for i in (0, 13, 49):
+        assert matcher.match(highlights[i]["text"]) == find_matching_paragraph(highlights[i]["text"], highlights)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""共享分析队列：领取、失败重试、换 session 重新入队和取消"""
+
+import threading
+import time
+
+from core.job_queue import AnalysisJobQueue
+
+
+def drain(queue):
+    items = []
+    while True:
+        item = queue.get()
+        if item is None:
+            return items
+        items.append(item)
+        queue.task_done(item)
+
+
+def test_get_returns_items_in_order_then_none():
+    queue = AnalysisJobQueue(["a.md", "b.md", "c.md"])
+
+    assert [item.file_path for item in drain(queue)] == ["a.md", "b.md", "c.md"]
+    assert queue.get() is None
+
+
+def test_retry_backs_off_and_gives_up_after_max_retries():
+    queue = AnalysisJobQueue(["a.md"], max_retries=2, backoff_base=0.05, backoff_max=0.05)
+
+    item = queue.get()
+    assert queue.retry(item)
+    assert item.attempts == 1
+    started = time.monotonic()
+    assert queue.get() is item
+    # 退避带 0.5~1 倍抖动
+    assert time.monotonic() - started >= 0.02
+
+    assert queue.retry(item)
+    assert queue.get() is item
+    assert not queue.retry(item)
+    assert item.attempts == 3
+
+    queue.task_done(item)
+    assert queue.get() is None
+
+
+def test_requeue_is_immediate_and_bounded():
+    queue = AnalysisJobQueue(["a.md"], backoff_base=60, max_session_swaps=1)
+
+    item = queue.get()
+    assert queue.requeue(item)
+    assert item.attempts == 0
+    assert queue.get() is item
+    # 换 session 次数用完后由调用方改用 retry()
+    assert not queue.requeue(item)
+
+
+def test_get_blocks_while_an_item_is_in_progress():
+    queue = AnalysisJobQueue(["a.md"])
+    item = queue.get()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(queue.get()))
+    waiter.start()
+
+    time.sleep(0.05)
+    assert waiter.is_alive()
+    queue.task_done(item)
+    waiter.join(1)
+
+    assert not waiter.is_alive()
+    assert got == [None]
+
+
+def test_cancel_wakes_workers_waiting_on_backoff():
+    queue = AnalysisJobQueue(["a.md"], backoff_base=60, backoff_max=60)
+    item = queue.get()
+    assert queue.retry(item)
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(queue.get()))
+    waiter.start()
+
+    time.sleep(0.05)
+    started = time.monotonic()
+    queue.cancel()
+    waiter.join(1)
+
+    assert not waiter.is_alive()
+    assert time.monotonic() - started < 1
+    assert got == [None]
+    assert queue.cancelled
+
+
+def test_job_progress_cancel_runs_registered_callbacks():
+    from core.jobs import JobProgress
+
+    progress = JobProgress("job")
+    queue = AnalysisJobQueue(["a.md"], backoff_base=60, backoff_max=60)
+    progress.on_cancel(queue.cancel)
+
+    progress.cancel()
+
+    assert progress.cancel_requested
+    assert queue.cancelled
+    # 已取消后注册的回调立即调用
+    late = AnalysisJobQueue(["b.md"])
+    progress.on_cancel(late.cancel)
+    assert late.cancelled
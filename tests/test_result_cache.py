@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""分析结果缓存：内容规范化和按最近使用淘汰"""
+
+import time
+
+from core.result_cache import AnalysisCache, normalize_content
+
+
+DOC = "# 关于推进北斗应用的通知\n\n**检索时间**：2024-05-01 10:00\n**检索关键词**：北斗\n\n第一条　总则\n"
+
+
+def test_normalize_drops_search_metadata_and_unifies_whitespace():
+    assert normalize_content(DOC) == "# 关于推进北斗应用的通知\n第一条 总则"
+
+
+def test_hash_ignores_crawl_batch_and_line_endings():
+    other_batch = DOC.replace("2024-05-01 10:00", "2024-06-02 08:30").replace("北斗\n\n第", "导航\n\n第")
+    windows = DOC.replace("\n", "\r\n").replace("第一条　总则", "第一条   总则")
+
+    assert AnalysisCache.hash_text(other_batch) == AnalysisCache.hash_text(DOC)
+    assert AnalysisCache.hash_text(windows) == AnalysisCache.hash_text(DOC)
+    assert AnalysisCache.hash_text(DOC + "第二条 附则\n") != AnalysisCache.hash_text(DOC)
+
+
+def test_content_hash_reads_file(tmp_path, db):
+    path = tmp_path / "doc.md"
+    path.write_text(DOC, encoding="utf-8")
+
+    assert AnalysisCache("v1").content_hash(str(path)) == AnalysisCache.hash_text(DOC)
+
+
+def test_put_evicts_least_recently_used(db):
+    cache = AnalysisCache("v1", max_entries=2)
+    cache.put("a", "结果 A")
+    time.sleep(0.002)
+    cache.put("b", "结果 B")
+    time.sleep(0.002)
+    # 读取 a 后，b 成为最久未使用的条目
+    assert cache.get("a") == "结果 A"
+    time.sleep(0.002)
+    cache.put("c", "结果 C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "结果 A"
+    assert cache.get("c") == "结果 C"
+
+
+def test_skill_version_change_invalidates_old_entries(db):
+    AnalysisCache("v1").put("a", "旧结果")
+
+    cache = AnalysisCache("v2")
+
+    assert cache.get("a") is None
+    assert AnalysisCache("v1").get("a") is None
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""分析结果解析：元数据、概要、总分、相关段落和文件缓存"""
+
+import os
+
+import pytest
+
+from core import result_parser
+from core.result_parser import extract_total_score, parse_result_file, parse_result_text
+
+
+RESULT = """# 文档：关于推进北斗规模应用的实施意见
+
+### 基本信息
+- **发布机构**：上海市经济和信息化委员会
+- **发布日期**：2024-03-01
+- 原文链接：[原文](https://www.sheitc.sh.gov.cn/doc/123.html)
+
+### 全文概要
+推进北斗在交通、测绘领域的规模应用。
+
+重点支持高精度定位。
+
+> **总分**：85.5
+
+### 相关段落
+> 支持北斗高精度定位在自动驾驶中的应用。
+> - 评分：90/100 | 语义关联：高精度定位 | 关键词：北斗、高精度定位
+
+> 与业务无关的段落。
+> - 无评分行
+
+> 鼓励测绘地理信息企业开展技术攻关。
+> - 评分：70 / 100 | 关键词：测绘
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_parser_cache():
+    result_parser.clear_cache()
+    yield
+    result_parser.clear_cache()
+
+
+def test_parse_metadata_summary_and_score():
+    result = parse_result_text(RESULT)
+
+    assert result.title == "关于推进北斗规模应用的实施意见"
+    assert result.publish_org == "上海市经济和信息化委员会"
+    assert result.publish_date == "2024-03-01"
+    assert result.source_url == "https://www.sheitc.sh.gov.cn/doc/123.html"
+    assert result.summary == "推进北斗在交通、测绘领域的规模应用。\n\n重点支持高精度定位。"
+    assert result.total_score == 85.5
+    assert result.total_score_text == "85.5"
+
+
+def test_parse_paragraphs_with_score_lines_only():
+    paragraphs = parse_result_text(RESULT).paragraphs
+
+    assert [p.as_dict() for p in paragraphs] == [
+        {
+            "text": "支持北斗高精度定位在自动驾驶中的应用。",
+            "score": 90,
+            "keywords": ["北斗", "高精度定位"],
+            "business": "高精度定位",
+        },
+        {
+            "text": "鼓励测绘地理信息企业开展技术攻关。",
+            "score": 70,
+            "keywords": ["测绘"],
+            "business": None,
+        },
+    ]
+
+
+def test_extract_total_score():
+    assert extract_total_score(RESULT) == 85.5
+    assert extract_total_score("# 文档：无总分") is None
+
+
+def test_parse_result_file_caches_until_file_changes(tmp_path):
+    path = tmp_path / "a_分析结果_85.5.md"
+    path.write_text(RESULT, encoding="utf-8")
+
+    first = parse_result_file(str(path))
+    assert parse_result_file(str(path)) is first
+
+    path.write_text(RESULT.replace("85.5", "60"), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = parse_result_file(str(path))
+    assert second is not first
+    assert second.total_score == 60.0
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""搜索接口后端：按固定路径解析返回结构，结构不符时回退"""
+
+import copy
+
+import pytest
+
+from scrapers.search_api import (
+    SearchAPIBackend,
+    SearchAPIEmpty,
+    SearchAPIError,
+    get_search_api,
+)
+
+
+class FakeScraper:
+    def __init__(self, base_url="https://www.example.gov.cn"):
+        self.base_url = base_url
+        self.session = None
+        self.logs = []
+
+    def log(self, message, level="info"):
+        self.logs.append((level, message))
+
+    def pause_between_requests(self):
+        pass
+
+
+class ExampleSearchAPI(SearchAPIBackend):
+    """测试用后端：结果列表在 data.list，日期为毫秒时间戳或字符串"""
+
+    endpoint = "https://www.example.gov.cn/api/search"
+    page_size = 2
+    records_path = ("data", "list")
+    fields = {"title": "title", "url": "url", "date": "publishTime", "content": "summary"}
+
+    def build_params(self, keyword, page, date_filter=None, section_filter='all'):
+        return {"q": keyword, "page": page, "size": self.page_size}
+
+
+def page(*records):
+    return {"code": 0, "data": {"total": 99, "list": list(records)}}
+
+
+def record(n, date="2025-03-01"):
+    return {"title": f"<em>政策</em>{n}", "url": f"/zcwj/{n}.html", "publishTime": date, "summary": f"摘要<em>{n}</em>"}
+
+
+# 地址不对的接口也可能返回 200 和一组带标题、链接的推荐列表，不能当作搜索结果
+HOT_LIST = {"code": 0, "hotList": [{"title": "热点", "url": "/hot/1.html"}]}
+
+
+def make_backend(pages):
+    """pages 依次作为每页的返回（超出后返回空页），记录每次请求的参数"""
+    backend = ExampleSearchAPI(FakeScraper())
+    requested = []
+
+    def fetch(params):
+        requested.append(params)
+        return copy.deepcopy(pages[len(requested) - 1]) if len(requested) <= len(pages) else page()
+
+    backend.fetch = fetch
+    backend.requested = requested
+    return backend
+
+
+def test_parses_and_paginates():
+    backend = make_backend([page(record(1), record(2, 1740787200000)), page(record(3))])
+
+    results = backend.search("人工智能")
+
+    assert [r["url"] for r in results] == [f"https://www.example.gov.cn/zcwj/{n}.html" for n in (1, 2, 3)]
+    assert results[0] == {"title": "政策1", "url": "https://www.example.gov.cn/zcwj/1.html",
+                          "date": "2025-03-01", "content": "摘要1"}
+    # 毫秒时间戳按本地时区换算
+    assert len(results[1]["date"]) == 10
+    # 第二页不足一页，不再请求
+    assert [p["page"] for p in backend.requested] == [1, 2]
+
+
+def test_stops_on_repeated_page():
+    backend = make_backend([page(record(1), record(2)), page(record(1), record(2))])
+
+    assert len(backend.search("人工智能")) == 2
+    assert len(backend.requested) == 2
+
+
+def test_unexpected_shape_raises():
+    backend = make_backend([HOT_LIST])
+
+    with pytest.raises(SearchAPIError) as exc_info:
+        backend.search("人工智能")
+    assert not isinstance(exc_info.value, SearchAPIEmpty)
+
+
+def test_record_missing_url_raises():
+    broken = record(1)
+    del broken["url"]
+    backend = make_backend([page(broken)])
+
+    with pytest.raises(SearchAPIError):
+        backend.search("人工智能")
+
+
+def test_empty_first_page():
+    backend = make_backend([page()])
+
+    with pytest.raises(SearchAPIEmpty):
+        backend.search("人工智能")
+
+
+def test_keeps_results_when_later_page_fails():
+    backend = make_backend([page(record(1), record(2)), HOT_LIST])
+
+    results = backend.search("人工智能")
+
+    assert len(results) == 2
+    assert len(backend.requested) == 2
+    assert any(level == "error" for level, _ in backend.scraper.logs)
+
+
+def test_verifies_certificates_by_default():
+    assert ExampleSearchAPI.verify_ssl is True
+
+
+def test_unregistered_scraper_has_no_backend():
+    assert get_search_api(FakeScraper()) is None
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""全文检索：中文切分和 MATCH 表达式"""
+
+from core.search_index import build_match_query, tokenize, tokenize_unigrams
+
+
+def test_tokenize_splits_chinese_runs_into_bigrams():
+    assert tokenize("北斗导航").split() == ["北斗", "斗导", "导航"]
+    assert tokenize("GNSS北斗").split() == ["GNSS", "北斗"]
+    # 单个汉字保持原样
+    assert tokenize("测").split() == ["测"]
+
+
+def test_tokenize_unigrams_splits_every_character():
+    assert tokenize_unigrams("2023年北斗").split() == ["2023", "年", "北", "斗"]
+
+
+def test_match_query_uses_bigram_columns_for_multi_character_terms():
+    assert build_match_query("北斗导航") == '{title body} : "北斗 斗导 导航"'
+
+
+def test_match_query_uses_unigram_columns_for_single_characters():
+    assert build_match_query("航") == '{title_uni body_uni} : "航"'
+    assert build_match_query("2023年") == '{title_uni body_uni} : "2023 年"'
+
+
+def test_match_query_joins_terms_with_and():
+    assert build_match_query("北斗  卫星") == '{title body} : "北斗" AND {title body} : "卫星"'
+
+
+def test_match_query_splits_punctuation_like_unicode61():
+    assert build_match_query("COVID-19") == '{title body} : "COVID 19"'
+    assert build_match_query('"北斗"') == '{title body} : "北斗"'
+
+
+def test_match_query_without_searchable_terms():
+    assert build_match_query("") is None
+    assert build_match_query("  -- ") is None